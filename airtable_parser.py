@@ -1,11 +1,346 @@
 import re
 import logging
-from bs4 import BeautifulSoup
+import threading
+from collections import Counter
+from bs4 import BeautifulSoup, Tag
+from config import ALL_CONFIG
+
+try:
+    import lxml.html
+except ImportError:  # lxml is optional; the BeautifulSoup backend is always available
+    lxml = None
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever parse_diff output changes; cached results from other versions are ignored
+PARSER_VERSION = 2
+
+
+# --- Single-pass scan ---
+class _Node:
+    """One element of a diff, with the ancestry facts the column handlers need."""
+    __slots__ = (
+        "element", "tag", "cls", "classes", "parent", "in_cell", "in_container",
+        "truncate", "has_plus", "stars", "next_div"
+    )
+
+
+class DiffScan:
+    """
+    Everything parse_diff needs, collected in one pre-order walk of the diff tree:
+    every element in document order (`nodes`), the metadata elements, and per-element
+    facts that previously took separate selector searches (first .truncate-pre
+    descendant, whether the subtree holds a Plus icon, visible rating stars, and the
+    next sibling <div>).
+    """
+
+    def __init__(self, parser):
+        self.nodes = []
+        self.container = None
+        self.header = None
+        self.cell = None
+        self.first_cell = None
+
+        by_element = {}
+        stack = []
+        self._push_children(parser, stack, None, None)
+        while stack:
+            element, parent, next_div = stack.pop()
+            node = _Node()
+            node.element = element
+            node.tag = parser._tag(element)
+            node.cls = parser._class_attr(element)
+            node.classes = frozenset(node.cls.split())
+            node.parent = parent
+            node.in_cell = parent is not None and (parent.in_cell or "historicalCellValue" in parent.classes)
+            node.in_container = parent is not None and (parent.in_container or parent is self.container)
+            node.truncate = None
+            node.has_plus = False
+            node.stars = 0
+            node.next_div = next_div
+            self.nodes.append(node)
+            by_element[id(element)] = node
+            self._note(parser, node)
+
+            self._push_children(parser, stack, element, node)
+
+        for node in self.nodes:
+            if node.next_div is not None:
+                node.next_div = by_element[id(node.next_div)]
+
+    @staticmethod
+    def _push_children(parser, stack, element, node):
+        """Pushes (child, parent node, next sibling <div>) so children pop in document order."""
+        following_div = None
+        for child in reversed(parser._children(element)):
+            stack.append((child, node, following_div))
+            if parser._tag(child) == 'div':
+                following_div = child
+
+    def _note(self, parser, node):
+        classes = node.classes
+        if self.container is None and "historicalCellContainer" in classes:
+            self.container = node
+        if node.in_container:
+            if self.header is None and {"micro", "strong", "caps"} <= classes:
+                self.header = node
+            if self.cell is None and "historicalCellValue" in classes:
+                self.cell = node
+        if self.first_cell is None and "historicalCellValue" in classes:
+            self.first_cell = node
+
+        if "truncate-pre" in classes:
+            for ancestor in self.ancestors(node):
+                if ancestor.truncate is None:
+                    ancestor.truncate = node
+        elif node.tag == 'use' and '#Plus' in (parser._attr(node.element, 'href') or ''):
+            if any(ancestor.tag == 'svg' for ancestor in self.ancestors(node)):
+                for ancestor in self.ancestors(node):
+                    ancestor.has_plus = True
+        elif node.tag == 'path' and parser._attr(node.element, 'fill') is not None:
+            # A star counts towards every rating container above a visible (non-.invisible) <svg>
+            visible_svg = False
+            for ancestor in self.ancestors(node):
+                if visible_svg and "ratingContainer" in ancestor.classes:
+                    ancestor.stars += 1
+                if ancestor.tag == 'svg' and "invisible" not in ancestor.classes:
+                    visible_svg = True
+
+    @staticmethod
+    def ancestors(node):
+        node = node.parent
+        while node is not None:
+            yield node
+            node = node.parent
+
+    def is_descendant(self, node, ancestor):
+        return any(parent is ancestor for parent in self.ancestors(node))
+
+
+# --- Column-type handlers ---
+# columnType -> handler(parser, scan), which appends to parser.old_values / parser.new_values
+COLUMN_HANDLERS = {}
+# Column types whose values are de-duplicated, sorted and joined with " | "
+MULTI_VALUE_TYPES = set()
+
+
+def column_handler(*column_types, multi_value=False):
+    """Registers the decorated function as the handler for `column_types`."""
+    def register(handler):
+        for column_type in column_types:
+            COLUMN_HANDLERS[column_type] = handler
+            if multi_value:
+                MULTI_VALUE_TYPES.add(column_type)
+            else:
+                MULTI_VALUE_TYPES.discard(column_type)
+        return handler
+    return register
+
+
+@column_handler('text', 'multilineText', 'phone', 'number', 'date', 'currency', 'percent')
+def _parse_simple_text_fields(parser, scan):
+    """Parses Text, Number, Date, Phone fields."""
+    for node in scan.nodes:
+        if not node.in_cell:
+            continue
+        cls = node.cls
+        # --- Extract Old Value (Removed) ---
+        if "colors-background-negative" in cls or "colors-foreground-accent-negative" in cls or "strikethrough" in cls:
+            val = parser._text(node.element)
+            if val: parser.old_values.append(val)
+        # --- Extract New Value (Added) ---
+        if "colors-background-success" in cls:
+            val = parser._text(node.element)
+            if val: parser.new_values.append(val.strip())
+
+
+@column_handler('select')
+@column_handler('multiSelect', multi_value=True)
+def _parse_select_fields(parser, scan):
+    """Parses Single Select and Multi Select fields."""
+    removed, active = [], []
+    for node in scan.nodes:
+        if "choiceToken" in node.classes:
+            style = parser._attr(node.element, 'style')
+            (removed if style and "line-through" in style else active).append(node)
+
+    def pill_text(pill):
+        return parser._attr(pill.element, 'title') or parser._text(pill.truncate.element if pill.truncate else None)
+
+    # --- Extract Old Value (Removed) ---
+    for pill in removed:
+        parser.old_values.append(pill_text(pill))
+
+    # --- Extract New Value (Added/Retained) ---
+    for pill in active:
+        text = pill_text(pill)
+        # Mark as added if the sibling contains the plus icon SVG
+        if pill.next_div is not None and pill.next_div.has_plus:
+            parser.new_values.append(f"{text} +")
+        else:
+            parser.new_values.append(text)
+
+
+@column_handler('checkbox')
+def _parse_checkbox_field(parser, scan):
+    """Parses Checkbox fields."""
+    if any(node.in_cell and "redLight2" in node.classes for node in scan.nodes):
+        parser.old_values.append("True")
+    if any(node.in_cell and "greenLight2" in node.classes for node in scan.nodes):
+        parser.new_values.append("True")
+
+
+@column_handler('multipleAttachment', multi_value=True)
+def _parse_attachment_field(parser, scan):
+    """Parses Multiple Attachment fields."""
+    for node in scan.nodes:
+        if "preview" in node.classes:
+            val = parser._attr(node.element, 'title')
+            if val and val.endswith(" was removed"):
+                parser.old_values.append(val[:-12])
+            elif val and val.endswith(" was added"):
+                parser.new_values.append(val[:-10])
+
+
+@column_handler('rating')
+def _parse_rating_field(parser, scan):
+    """Parses Rating fields."""
+    containers = [node for node in scan.nodes if "ratingContainer" in node.classes]
+
+    # Removed rating has negative background
+    old = next((node for node in containers if "colors-background-negative" in node.cls), None)
+    if old is not None and old.stars > 0:
+        parser.old_values.append(str(old.stars))
+
+    # Added/New rating has success background or is the final state
+    new = next((node for node in containers if "colors-background-success" in node.cls), None)
+    if new is None:
+        new = next((node for node in containers if "colors-background-negative" not in node.cls), None)
+    if new is not None and new.stars > 0:
+        parser.new_values.append(str(new.stars))
+
+
+@column_handler('foreignKey', multi_value=True)
+def _parse_foreign_key_field(parser, scan):
+    """Parses Foreign key field."""
+    for node in scan.nodes:
+        if node.in_cell and "foreignRecord" in node.classes:
+            if "removed" in node.classes:
+                parser.old_values.append(parser._attr(node.element, 'title') or parser._text(node.element))
+            if "added" in node.classes:
+                parser.new_values.append(parser._attr(node.element, 'title') or parser._text(node.element))
+
+
+def _is_removed(parser, node):
+    """True if the node, or an ancestor inside the cell, is marked as a removed value."""
+    while node is not None and node.in_cell:
+        cls = node.cls
+        if "removed" in node.classes or "strikethrough" in cls or "-negative" in cls:
+            return True
+        style = parser._attr(node.element, 'style')
+        if style and "line-through" in style:
+            return True
+        node = node.parent
+    return False
+
+
+def _collect_tokens(parser, scan, is_token):
+    """Splits the outermost cell nodes matching `is_token` into old (removed) and new values."""
+    taken = set()
+    for node in scan.nodes:
+        if not node.in_cell or not is_token(node):
+            continue
+        if any(id(ancestor) in taken for ancestor in scan.ancestors(node)):
+            continue
+        taken.add(id(node))
+        value = parser._attr(node.element, 'title') or parser._text(node.element)
+        (parser.old_values if _is_removed(parser, node) else parser.new_values).append(value)
+
+
+@column_handler('url', 'email', 'barcode', 'duration', 'autoNumber', 'formula')
+def _parse_plain_value_fields(parser, scan):
+    """
+    Parses single-value fields, shown either with coloured text spans or as a
+    struck-through old .flex-auto value next to the new one.
+    """
+    _parse_simple_text_fields(parser, scan)
+    if not parser.new_values:
+        for node in scan.nodes:
+            if node.in_cell and "flex-auto" in node.classes and not _is_removed(parser, node):
+                val = parser._text(node.element)
+                if val:
+                    parser.new_values.append(val)
+                    break
+
+
+def _is_collaborator_token(node):
+    return "collaborator" in node.cls.lower()
+
+
+@column_handler('collaborator')
+@column_handler('multipleCollaborators', multi_value=True)
+def _parse_collaborator_fields(parser, scan):
+    """Parses User and multiple-user fields from their collaborator tokens."""
+    _collect_tokens(parser, scan, _is_collaborator_token)
+
+
+_LOOKUP_TOKEN_CLASSES = frozenset(("choiceToken", "foreignRecord", "flex-auto"))
+
+
+def _is_lookup_token(node):
+    cls = node.cls
+    return (
+        not node.classes.isdisjoint(_LOOKUP_TOKEN_CLASSES) or _is_collaborator_token(node)
+        or "colors-background-" in cls or "-negative" in cls or "strikethrough" in cls
+    )
+
+
+@column_handler('lookup', multi_value=True)
+def _parse_lookup_field(parser, scan):
+    """Parses Lookup fields, which show the looked-up values as tokens of the source field's type."""
+    _collect_tokens(parser, scan, _is_lookup_token)
+
+
+class ParseCoverage:
+    """
+    Counts parsed activities and, per column type, those only resolved by the generic
+    fallback, so production runs show which column types still need a handler.
+    """
+
+    def __init__(self):
+        self.activities = 0
+        self.fallback = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, details):
+        with self._lock:
+            self.activities += 1
+            if details.get("usedFallback"):
+                self.fallback[details.get("columnType")] += 1
+
+    def log_stats(self):
+        total = sum(self.fallback.values())
+        if self.activities:
+            by_type = ", ".join(f"{column_type}: {count}" for column_type, count in self.fallback.most_common())
+            logger.info(
+                f"Diff parser fallback used for {total} of {self.activities} activities"
+                + (f" ({by_type})." if by_type else ".")
+            )
+
+
+# Process-wide coverage, recorded by utils.parse_revision_history
+PARSE_COVERAGE = ParseCoverage()
+
+
 class AirtableHtmlParser:
-    """Class to extract column details and old/new values from Airtable's row activity diffRowHtml."""
+    """
+    Class to extract column details and old/new values from Airtable's row activity diffRowHtml.
+
+    parse_diff walks the tree once (DiffScan) and hands the result to the handler
+    registered for the column type in COLUMN_HANDLERS. The tree is only touched
+    through the small set of DOM helpers below, so alternative backends such as
+    LxmlHtmlParser override those and produce identical output.
+    """
 
     def __init__(self, html):
         self.html = html
@@ -16,136 +351,74 @@ class AirtableHtmlParser:
         self.old_values = []
         self.new_values = []
 
-    def _extract_metadata(self):
+    # --- DOM helpers (overridden by other backends) ---
+    def _children(self, element):
+        """Child elements of `element` (the top-level elements when None)."""
+        return [child for child in (self.soup if element is None else element).children if isinstance(child, Tag)]
+
+    def _tag(self, element):
+        return element.name
+
+    def _class_attr(self, element):
+        classes = element.get('class')
+        return " ".join(classes) if isinstance(classes, list) else classes or ""
+
+    def _text(self, element):
+        return element.get_text(strip=True)
+
+    def _attr(self, element, name):
+        return element.get(name)
+
+    def _extract_metadata(self, scan):
         """Extracts Column Name, ID, and Type from the container."""
-        container = self.soup.select_one('.historicalCellContainer')
-        if container:
-            header_div = container.select_one('.micro.strong.caps')
-            if header_div:
-                self.column_name = header_div.get_text(strip=True)
-                self.column_id = header_div.get('columnid')
-            
-            cell_value_div = container.select_one('.historicalCellValue')
-            if cell_value_div:
-                self.column_type = cell_value_div.get('data-columntype')
-        
+        if scan.header is not None:
+            self.column_name = self._text(scan.header.element)
+            self.column_id = self._attr(scan.header.element, 'columnid')
+        if scan.cell is not None:
+            self.column_type = self._attr(scan.cell.element, 'data-columntype')
+
         if not self.column_type:
             logger.debug("Could not determine column type for HTML diff.")
             return False
         return True
 
-    def _parse_simple_text_fields(self):
-        """Parses Text, Number, Date, Phone fields."""
-        
-        # --- Extract Old Value (Removed) ---
-        removed_text_blocks = self.soup.select(
-            '.historicalCellValue [class*="colors-background-negative"],'
-            '.historicalCellValue [class*="colors-foreground-accent-negative"],'
-            '.historicalCellValue [class*="strikethrough"]'
-        )
-        for rec in removed_text_blocks:
-            val = rec.get_text(strip=True)
-            if val: self.old_values.append(val)
-        
-        # --- Extract New Value (Added) ---
-        added_text_blocks = self.soup.select('.historicalCellValue [class*="colors-background-success"]')
-        for rec in added_text_blocks:
-            val = rec.get_text(strip=True)
-            if val: self.new_values.append(val.strip())
+    def _fallback_values(self, scan):
+        """Generic old/new lookup for changes the type handler did not resolve."""
+        diff_container = scan.first_cell
+        if diff_container is None:
+            return None, None
+        old_el = new_el = None
+        for node in scan.nodes:
+            if not scan.is_descendant(node, diff_container):
+                continue
+            if old_el is None and "strikethrough" in node.cls:
+                old_el = node
+            if new_el is None and "flex-auto" in node.classes and "strikethrough" not in node.parent.cls:
+                new_el = node
+        old_val = self._text(old_el.element) if old_el is not None else None
+        new_val = self._text(new_el.element) if new_el is not None else None
+        return old_val, new_val
 
-    def _parse_select_fields(self):
-        """Parses Single Select and Multi Select fields."""
-        
-        # --- Extract Old Value (Removed) ---
-        removed_by_style = self.soup.select('.choiceToken[style*="line-through"]')
-        for pill in removed_by_style:
-            self.old_values.append(pill.get('title') or pill.select_one('.truncate-pre').get_text(strip=True))
-
-        # --- Extract New Value (Added/Retained) ---
-        active_pills = self.soup.select('.choiceToken:not([style*="line-through"])')
-        for pill in active_pills:
-            text = pill.get('title') or pill.select_one('.truncate-pre').get_text(strip=True)
-            next_sibling = pill.find_next_sibling('div')
-            # Mark as added if the sibling contains the plus icon SVG
-            if next_sibling and next_sibling.select_one('svg use[href*="#Plus"]'):
-                self.new_values.append(f"{text} +")
-            else:
-                self.new_values.append(text)
-
-    def _parse_checkbox_field(self):
-        """Parses Checkbox fields."""
-        if self.soup.select_one('.historicalCellValue .redLight2'):
-            self.old_values.append("True")
-        if self.soup.select_one('.historicalCellValue .greenLight2'):
-            self.new_values.append("True")
-
-    def _parse_attachment_field(self):
-        """Parses Multiple Attachment fields."""
-        removed_attachments = self.soup.select('.preview[title*="was removed"], .preview.rounded[class*="border-red-light1"]')
-        for att in removed_attachments:
-            val = att.get('title')
-            if val and val.endswith(" was removed"):
-                self.old_values.append(val[:-12])
-
-        added_attachments = self.soup.select('.preview[title*="was added"], .preview.rounded[class*="border-green-light1"]')
-        for att in added_attachments:
-            val = att.get('title')
-            if val and val.endswith(" was added"):
-                self.new_values.append(val[:-10])
-
-    def _parse_rating_field(self):
-        """Parses Rating fields."""
-        # Removed rating has negative background
-        rating_container_old = self.soup.select_one('.ratingContainer[class*="colors-background-negative"]')
-        if rating_container_old:
-            count = len(rating_container_old.select('svg:not(.invisible) path[fill]'))
-            if count > 0: self.old_values.append(str(count))
-
-        # Added/New rating has success background or is the final state
-        rating_container_new = self.soup.select_one('.ratingContainer[class*="colors-background-success"]') or self.soup.select_one('.ratingContainer:not([class*="colors-background-negative"])')
-        if rating_container_new:
-            count = len(rating_container_new.select('svg:not(.invisible) path[fill]'))
-            if count > 0: self.new_values.append(str(count))
-
-    def _parse_foreign_key_field(self):
-        """Parses Foreign key field."""
-        
-        # --- Extract Old Value (Removed) ---
-        removed = self.soup.select('.historicalCellValue .foreignRecord.removed')
-        for rec in removed:
-            self.old_values.append(rec.get('title') or rec.get_text(strip=True))
-
-         # --- Extract New Value (Added) ---
-        added = self.soup.select('.historicalCellValue .foreignRecord.added')
-        for rec in added:
-            self.new_values.append(rec.get('title') or rec.get_text(strip=True))
-       
     def parse_diff(self):
         """
         Orchestrates the parsing based on column type and returns the final result.
+        `usedFallback` is True when no handler resolved a value and the generic fallback ran.
         """
-        if not self._extract_metadata():
+        scan = DiffScan(self)
+        if not self._extract_metadata(scan):
             return {
                 "columnId": self.column_id, "columnName": self.column_name,
-                "columnType": None, "oldValue": None, "newValue": None
+                "columnType": None, "oldValue": None, "newValue": None,
+                "usedFallback": False
             }
 
         # Dispatch parsing based on column type
-        if self.column_type in ('text', 'multilineText', 'phone', 'number', 'date', 'currency', 'percent'):
-            self._parse_simple_text_fields()
-        elif self.column_type in ('select', 'multiSelect'):
-            self._parse_select_fields()
-        elif self.column_type == 'checkbox':
-            self._parse_checkbox_field()
-        elif self.column_type == 'multipleAttachment':
-            self._parse_attachment_field()
-        elif self.column_type == 'rating':
-            self._parse_rating_field()
-        elif self.column_type == 'foreignKey':
-            self._parse_foreign_key_field()
+        handler = COLUMN_HANDLERS.get(self.column_type)
+        if handler is not None:
+            handler(self, scan)
         
         # --- Final Formatting ---
-        if self.column_type in ('multiSelect', 'multipleAttachment', 'foreignKey'):
+        if self.column_type in MULTI_VALUE_TYPES:
             old_val = " | ".join(sorted(list(set(filter(None, self.old_values))))) or None
             new_val = " | ".join(sorted(list(set(filter(None, self.new_values))))) or None
         else:
@@ -153,18 +426,98 @@ class AirtableHtmlParser:
             new_val = self.new_values[0] if self.new_values else None
 
         # Fallback for simple changes 
-        if not old_val and not new_val:
-            diff_container = self.soup.select_one('.historicalCellValue')
-            if diff_container:
-                old_el = diff_container.select_one('[class*="strikethrough"]')
-                new_el = diff_container.select_one(':not([class*="strikethrough"]) > .flex-auto')
-                old_val = old_el.get_text(strip=True) if old_el else None
-                new_val = new_el.get_text(strip=True) if new_el else None
+        used_fallback = not old_val and not new_val
+        if used_fallback:
+            old_val, new_val = self._fallback_values(scan)
         
         return {
             "columnId": self.column_id,
             "columnName": self.column_name,
             "columnType": self.column_type,
             "oldValue": old_val,
-            "newValue": new_val
-        }
\ No newline at end of file
+            "newValue": new_val,
+            "usedFallback": used_fallback
+        }
+
+
+# Elements whose content BeautifulSoup's get_text() leaves out
+NON_TEXT_TAGS = frozenset(("script", "style", "template"))
+
+
+class LxmlHtmlParser(AirtableHtmlParser):
+    """
+    Same parsing logic as AirtableHtmlParser, backed by lxml's C parser instead of
+    BeautifulSoup.
+    """
+
+    def __init__(self, html):
+        self.html = html
+        self.soup = None
+        self.tree = lxml.html.document_fromstring(html) if html and html.strip() else None
+        self.column_id = None
+        self.column_name = None
+        self.column_type = None
+        self.old_values = []
+        self.new_values = []
+
+    def _children(self, element):
+        if element is None:
+            # The <html> root is never matched itself, as with BeautifulSoup
+            if self.tree is None:
+                return []
+            element = self.tree
+        # Skips comments and processing instructions, whose tag is not a string
+        return [child for child in element if isinstance(child.tag, str)]
+
+    def _tag(self, element):
+        return element.tag
+
+    def _class_attr(self, element):
+        return element.get('class') or ""
+
+    def _text(self, element):
+        return "".join(self._strings(element))
+
+    def _strings(self, element):
+        """Stripped text of `element` and its descendants, minus what get_text() drops (script/style/template, comments)."""
+        if element.tag in NON_TEXT_TAGS:
+            return
+        if element.text:
+            yield element.text.strip()
+        for child in element:
+            if isinstance(child.tag, str):
+                yield from self._strings(child)
+            if child.tail:
+                yield child.tail.strip()
+
+    def _attr(self, element, name):
+        return element.get(name)
+
+
+PARSER_BACKENDS = {
+    "bs4": AirtableHtmlParser,
+    "lxml": LxmlHtmlParser,
+}
+
+
+def get_parser_class(backend=None):
+    """Resolves a PARSER_BACKEND name ('auto', 'lxml' or 'bs4') to a parser class."""
+    backend = backend or ALL_CONFIG.get('CORE', {}).get('PARSER_BACKEND', 'auto')
+    if backend == "auto":
+        backend = "lxml" if lxml is not None else "bs4"
+    if backend == "lxml" and lxml is None:
+        logger.warning("lxml is not installed; falling back to the BeautifulSoup parser.")
+        backend = "bs4"
+    return PARSER_BACKENDS.get(backend, AirtableHtmlParser)
+
+
+def create_html_parser(html, backend=None):
+    """Builds a diff parser for the configured backend, falling back to BeautifulSoup if lxml rejects the HTML."""
+    parser_class = get_parser_class(backend)
+    if parser_class is AirtableHtmlParser:
+        return AirtableHtmlParser(html)
+    try:
+        return parser_class(html)
+    except Exception as e:
+        logger.debug(f"{parser_class.__name__} could not parse diff HTML ({e}); using BeautifulSoup.")
+        return AirtableHtmlParser(html)
@@ -1,33 +1,46 @@
-import os
 import json
 import logging
-import pickle
+import threading
+import time
 import requests
-import urllib3
+from concurrent.futures import Future
 from pathlib import Path
 from requests.adapters import HTTPAdapter
 from config import ALL_CONFIG 
 from utils import (
     get_csrf_token, 
     get_socket_id, 
-    generate_request_id,
-    parse_revision_history
+    build_activity_params,
+    build_view_data_params,
+    extract_view_row_ids,
+    parse_view_url,
+    is_invalid_socket_response,
+    is_page_size_rejection,
+    parse_revision_history,
+    trim_page_to_mark,
+    merge_revision_entries
 )
+from data_models import RevisionEntry, parse_field_list, needs_diff_fields
+from scrape_state import HighWaterMarkStore
+from checkpoint import PaginationJournal
+from writers import StreamingRevisionWriter, STREAMING_FORMATS, COLUMNAR_FORMATS, OUTPUT_EXTENSIONS
+from columnar import write_columnar, write_parquet, ColumnarReader, read_parquet_entries
+from parse_pool import ParallelDiffParser
+from pipeline import RevisionPipeline
+from parse_cache import get_diff_cache
+from airtable_parser import PARSE_COVERAGE
+from sqlite_store import SQLiteRevisionStore
+from rate_limiter import RateLimiter, endpoint_for, parse_retry_after
+from retry_policy import build_retry_policies, log_retry_stats
+from metrics import RunMetrics, write_summary_json, write_prometheus_textfile
+from session_store import format_timestamp
+from session_context import SessionContextMixin
 
 logger = logging.getLogger(__name__)
 
-# --- Retry Setup ---
-retry_strategy = urllib3.Retry(
-    total=5,
-    backoff_factor=1, 
-    status_forcelist=[429, 500, 502, 503, 504],
-    allowed_methods=["GET", "POST"]
-)
-adapter = HTTPAdapter(max_retries=retry_strategy)
-
 
-class AirtableScraper:
-    def __init__(self, email, password):
+class AirtableScraper(SessionContextMixin):
+    def __init__(self, email, password, page_size=None, incremental=None):
         self.email = email
         self.password = password
 
@@ -36,8 +49,48 @@ class AirtableScraper:
         self.app_id = self.config.get('APPLICATION_ID')
         self.table_view_url = self.config.get('TABLE_VIEW_URL')
         self.activity_endpoint_template = self.config.get('ACTIVITY_ENDPOINT_TEMPLATE')
-        self.cookies_file = self.config.get('COOKIES_FILE')
+        self.view_data_endpoint_template = self.config.get('VIEW_DATA_ENDPOINT_TEMPLATE', 'v0.3/table/{}/readData')
+        # Stored session, auth broker and socket/CSRF context (SessionContextMixin)
+        self.init_session_context(self.config)
         self.output_file = self.config.get('OUTPUT_FILE','results.json')
+        self.output_format = self.config.get('OUTPUT_FORMAT', 'json')
+        if self.output_format in COLUMNAR_FORMATS:
+            self.output_file = str(Path(self.output_file).with_suffix(OUTPUT_EXTENSIONS[self.output_format]))
+        self.max_concurrent_requests = self.config.get('MAX_CONCURRENT_REQUESTS', 8)
+
+        # Activity page size; adaptive mode starts at the max and backs off on rejection/truncation
+        self.adaptive_page_size = self.config.get('ADAPTIVE_PAGE_SIZE', False)
+        self.min_page_size = self.config.get('MIN_PAGE_SIZE', 10)
+        self.max_page_size = self.config.get('MAX_PAGE_SIZE', 100)
+        self.page_size = page_size or (self.max_page_size if self.adaptive_page_size else self.config.get('PAGE_SIZE', 10))
+        self.page_size_rejection_statuses = tuple(self.config.get('PAGE_SIZE_REJECTION_STATUSES', (400, 413, 422)))
+        self.page_requests = 0
+        self.page_items = 0
+
+        # Incremental mode: only fetch entries newer than the per-record high-water mark
+        self.incremental = self.config.get('INCREMENTAL', False) if incremental is None else incremental
+        self.state = HighWaterMarkStore(self.config.get('STATE_FILE', 'scrape_state.json')) if self.incremental else None
+        # Journal each fetched page next to the output file so interrupted runs can resume
+        self.checkpoints = self.config.get('CHECKPOINTS', True)
+        # A journal started longer ago than this (seconds) is not resumed
+        self.resume_max_age = self.config.get('RESUME_MAX_AGE', 12 * 3600)
+
+        # Optional SQLite sink that every fetched batch is upserted into
+        sqlite_db = self.config.get('SQLITE_DB')
+        self.store = SQLiteRevisionStore(sqlite_db) if sqlite_db else None
+
+        # Optional process pool for diff parsing, overlapped with fetching the next page
+        parse_workers = self.config.get('PARSE_WORKERS', 0)
+        self.diff_pool = ParallelDiffParser(parse_workers, self.config.get('PARSE_CHUNK_SIZE', 64)) if parse_workers > 0 else None
+        # Output field projection; without diff fields, diffRowHtml is never parsed
+        self.fields = parse_field_list(self.config.get('OUTPUT_FIELDS'))
+        self.lazy_diffs = self.config.get('LAZY_DIFFS', False) or not needs_diff_fields(self.fields)
+        if self.fields is not None and self.output_format in COLUMNAR_FORMATS:
+            logger.warning(f"OUTPUT_FIELDS is ignored by the {self.output_format} format, which keeps every column.")
+
+        # Optional fetch/parse/write stages connected by bounded queues
+        self.pipeline = self.config.get('PIPELINE', False)
+        self.pipeline_queue_size = self.config.get('PIPELINE_QUEUE_SIZE', 4)
      
         login_urls = ALL_CONFIG.get('LOGIN_URLS', {})
         self.initial_page_url = login_urls.get('INITIAL_PAGE_URL')
@@ -48,48 +101,111 @@ class AirtableScraper:
         self.rev_headers_template = ALL_CONFIG.get('REV_HEADERS', {})
 
         self.session = requests.Session()
-        # Mount the retry adapter to the session
-        self.session.mount("http://", adapter)
-        self.session.mount("https://", adapter)
-        
+        # Mount a pooled adapter sized so concurrent workers share connections;
+        # retries are handled per request in _send using the RETRY policies
+        pooled_adapter = HTTPAdapter(
+            pool_connections=self.max_concurrent_requests,
+            pool_maxsize=self.max_concurrent_requests
+        )
+        self.session.mount("http://", pooled_adapter)
+        self.session.mount("https://", pooled_adapter)
 
+        # Global cap on in-flight requests, shared by every worker using this scraper
+        self._request_slots = threading.BoundedSemaphore(self.max_concurrent_requests)
+        # Serializes socket refreshes and re-logins across worker threads
+        self._context_lock = threading.RLock()
+        # Client-side token buckets, so requests are paced before the server has to reject them
+        self.rate_limiter = RateLimiter(ALL_CONFIG.get('RATE_LIMIT', {}))
+        # Jittered retry policies per endpoint class (login, page, activity), with per-run counts
+        self.retry_policies = build_retry_policies(ALL_CONFIG.get('RETRY', {}))
+        # Per-phase timings and byte totals, summarised by report_run()
+        self.metrics = RunMetrics()
 
-    def save_cookies(self):
-        try:
-            with open(self.cookies_file, 'wb') as f:
-                pickle.dump(self.session.cookies, f)
-            logger.info("Cookies saved to file.")
-        except Exception as e:
-            logger.error(f"Error saving cookies: {e}")
 
-    def load_cookies(self):
-        if not Path(self.cookies_file).exists():
-            logger.info("Cookies file not found, login required.")
-            return False
-        try:
-            with open(self.cookies_file, 'rb') as f:
-                cookies = pickle.load(f)
-                self.session.cookies.update(cookies)
-            logger.info("Cookies loaded from file.")
-            return True
-        except Exception as e:
-            logger.error(f"Error loading cookies: {e}. Clearing file to force re-login.")
-            self.clear_cookies()
-            return False
+    # --- Cookies ---
+    def _cookies_to_save(self):
+        return self.session.cookies
 
-    def clear_cookies(self):
-        """Removes the local cookie file and session cookies."""
-        if Path(self.cookies_file).exists():
-            os.remove(self.cookies_file)
-            logger.warning("Invalid cookies file removed. Forced re-login.")
+    def _replace_cookies(self, state):
         self.session.cookies.clear()
+        self.session_store.apply_cookies(state, self.session.cookies)
+
+    def _drop_cookies(self):
+        self.session.cookies.clear()
+
+    def refresh_session_if_expiring(self):
+        """
+        Logs in again shortly before the session expires, instead of after a failed request,
+        and after the server rejected it (through the broker, so only one worker logs in).
+        """
+        if not self.session_needs_refresh():
+            return True
+        with self._context_lock:
+            # Another worker may have refreshed it while we waited for the lock
+            if self.session_rejected:
+                logger.info("Session was rejected; getting a new one.")
+                return self.run_login_flow()
+            if self.session_store.is_expiring(self.session_expires_at):
+                logger.info(f"Session expires {format_timestamp(self.session_expires_at)}; refreshing it now.")
+                return self.run_login_flow()
+        return True
 
 
     # --- Network Methods ---
-    def _make_request(self, method, url, **kwargs):
-        """Generic request wrapper with error logging."""
+    def _send(self, method, url, **kwargs):
+        """
+        Sends one request through the rate limiter, retrying network errors and retryable
+        statuses under the endpoint's RetryPolicy. The response records the seconds spent
+        waiting on the limiter (`rate_limit_wait`) and the number of retries (`retries`).
+        """
+        endpoint = endpoint_for(url)
+        attempt = self.retry_policies.get(endpoint, self.retry_policies["default"]).start()
+        waited = 0.0
+        while True:
+            _, delay = self.rate_limiter.acquire(url)
+            waited += delay
+            try:
+                # Network time only; page_fetch also includes rate-limit waits and retry backoff
+                with self._request_slots, self.metrics.phase("http_request"):
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                backoff = attempt.backoff()
+                if backoff is None:
+                    raise
+                logger.warning(f"{type(e).__name__} for {url}, retry {attempt.retries} in {backoff:.1f}s.")
+                time.sleep(backoff)
+                continue
+
+            retry_after_header = response.headers.get('Retry-After')
+            retry_after = self.rate_limiter.observe(endpoint, response.status_code, retry_after_header)
+            if attempt.retryable(response.status_code):
+                # The server's Retry-After bounds the delay even with the rate limiter disabled
+                backoff = attempt.backoff(parse_retry_after(retry_after_header, retry_after))
+                if backoff is not None:
+                    logger.warning(f"HTTP {response.status_code} for {url}, retry {attempt.retries} in {backoff:.1f}s.")
+                    response.close()
+                    time.sleep(backoff)
+                    continue
+            break
+
+        response.rate_limit_wait = waited
+        response.retries = attempt.retries
+        self.metrics.count("requests")
+        self.metrics.count("retries", attempt.retries)
+        self.metrics.count("rate_limit_wait_seconds", waited)
+        if waited:
+            logger.debug(f"Waited {waited:.2f}s on the rate limiter for {url}")
+        return response
+
+    def _make_request(self, method, url, accept_statuses=(), **kwargs):
+        """
+        Generic request wrapper with error logging. Error responses whose status is in
+        `accept_statuses` are returned for the caller to handle instead.
+        """
         try:
-            response = self.session.request(method, url, **kwargs)
+            response = self._send(method, url, **kwargs)
+            if response.status_code in accept_statuses:
+                return response
             response.raise_for_status()
             return response
         except requests.exceptions.HTTPError as e:
@@ -97,13 +213,16 @@ class AirtableScraper:
             if e.response.status_code in [401, 403]:
                 logger.warning("Auth failure detected. Clearing cookies.")
                 self.clear_cookies()
+                self.invalidate_socket_context("auth failure")
+            elif is_invalid_socket_response(e.response.text):
+                self.invalidate_socket_context("invalid socket response")
             return None
         except Exception as e:
             logger.error(f"Network Error for {url}: {e}")
             return None
 
     def get_initial_page(self):
-        return self._make_request('GET', self.initial_page_url, headers=self.headers)
+        return self._make_request('GET', self.initial_page_url, headers=self.headers, stream=True)
 
     def post_email_req(self, csrf_token):
         payload = {
@@ -113,7 +232,8 @@ class AirtableScraper:
             "didConsentToMarketing": "", 
             "email": self.email
         }
-        return self._make_request('POST', self.email_submit_url, data=payload, headers=self.headers, allow_redirects=True
+        return self._make_request('POST', self.email_submit_url, data=payload, headers=self.headers, allow_redirects=True,
+            stream=True
         )
 
     def post_login_req(self, csrf_token):
@@ -127,13 +247,35 @@ class AirtableScraper:
 
     def get_secret_socket_id(self):
         """Fetches the home page to extract the latest socket ID."""
-        homepage_resp = self._make_request('GET', self.config.get('BASE_URL'), headers=self.headers)
-        if homepage_resp and homepage_resp.status_code == 200:
-            return get_socket_id(homepage_resp)
-        return None
+        with self.metrics.phase("socket_fetch") as timing:
+            # Streamed: the socket ID sits near the top of a large page, so stop reading there
+            homepage_resp = self._make_request('GET', self.config.get('BASE_URL'), headers=self.headers, stream=True)
+            if not homepage_resp or homepage_resp.status_code != 200:
+                return None
+            socket_id = get_socket_id(homepage_resp)
+            timing.bytes = homepage_resp.bytes_read
+        return socket_id
+
+    def get_socket_context(self):
+        """Returns the cached socket ID, fetching it from the home page when missing or older than SOCKET_MAX_AGE."""
+        if self._has_fresh_socket():
+            return self.socket_id
+        with self._context_lock:
+            # Another worker may have refreshed it while we waited for the lock, or another
+            # process on the same session may already have stored a new one
+            if not self._has_fresh_socket() and not self._adopt_shared_socket_id():
+                self._record_socket_id(self.get_secret_socket_id())
+            return self.socket_id
 
     def run_login_flow(self):
-        """Executes the full login process and saves cookies."""
+        """
+        Logs in through the auth broker: adopts a session another worker has just created,
+        or performs the full login process once for everyone and saves the session.
+        """
+        with self.metrics.phase("login"):
+            return self.auth_broker.login(self)
+
+    def _login(self):
         logger.info("Starting login.")
         
         initial_resp = self.get_initial_page()
@@ -147,76 +289,305 @@ class AirtableScraper:
         login_resp = self.post_login_req(csrf_token_2)
         if not login_resp: return False
 
+        # A fresh login starts a new session; any cached socket belongs to the old one
+        self.invalidate_socket_context("new login")
+        self.csrf_token = csrf_token_2
         self.save_cookies()
         logger.info("Login completed successfully.")
         return True
     
    
     # --- Data Fetching ---
-    def get_record_revision_history(self, offset_v2=None):
-        headers = self.rev_headers_template.copy()
-        headers['Referer'] = f"{self.table_view_url}/{self.record_id}"
-        headers['x-airtable-application-id'] = self.app_id
-        
-        socket_id = self.get_secret_socket_id()
+    def require_socket_context(self):
+        """
+        Returns a socket ID for the next API request, refreshing an expiring or rejected
+        session and logging in again when no socket can be obtained. Returns None on failure.
+        """
+        if not self.refresh_session_if_expiring():
+            logger.error("Session refresh failed.")
+            return None
+        socket_id = self.get_socket_context()
         if not socket_id:
-            logger.error("Could not obtain a socket ID, attempting re-login.")
-            if not self.run_login_flow():
-                 return [], None
-            socket_id = self.get_secret_socket_id()
+            with self._context_lock:
+                # Only the first worker to get here logs in again; the rest reuse its socket
+                socket_id = self.get_socket_context()
+                if not socket_id:
+                    logger.error("Could not obtain a socket ID, attempting re-login.")
+                    if not self.run_login_flow():
+                         return None
+                    socket_id = self.get_socket_context()
             if not socket_id:
                 logger.error("Failed to get socket ID even after re-login.")
-                return [], None
-
-        params = {
-            "stringifiedObjectParams": json.dumps({
-                "limit": 10, "offsetV2": offset_v2,
-                "shouldReturnDeserializedActivityItems": True,
-                "shouldIncludeRowActivityOrCommentUserObjById": True
-            }),
-            "requestId": generate_request_id(),
-            "secretSocketId": socket_id
-        }
+                return None
+        return socket_id
+
+    def fetch_activity_page(self, offset_v2=None, record_id=None, limit=None):
+        """Fetches one raw page of activities/comments. Returns the API 'data' payload or None."""
+        return self._fetch_activity_page(offset_v2, record_id, limit)[0]
+
+    def _fetch_activity_page(self, offset_v2=None, record_id=None, limit=None):
+        """
+        fetch_activity_page() that also reports why a page failed. Returns (data, rejected):
+        rejected is True only when the server refused the requested page size (an error
+        body about the limit, with one of PAGE_SIZE_REJECTION_STATUSES or a non-SUCCESS
+        message), not for stale sockets, network errors, exhausted retries or failed re-logins.
+        """
+        record_id = record_id or self.record_id
+        limit = limit or self.page_size
+        headers = self.rev_headers_template.copy()
+        headers['Referer'] = f"{self.table_view_url}/{record_id}"
+        headers['x-airtable-application-id'] = self.app_id
 
         base_url = self.config.get('BASE_URL')
         if not base_url:
             logger.error("Configuration missing BASE_URL")
-            return [], None
+            return None, False
         
-        url_path = self.activity_endpoint_template.format(self.record_id)
+        url_path = self.activity_endpoint_template.format(record_id)
         url = f"{base_url}/{url_path}"
 
-        response = self._make_request('GET', url, headers=headers, params=params)
-        
-        if not response:
+        # One extra attempt with a refreshed socket context if the cached one went stale
+        for attempt in range(2):
+            socket_id = self.require_socket_context()
+            if not socket_id:
+                return None, False
+
+            params = build_activity_params(socket_id, offset_v2, limit)
+
+            with self.metrics.phase("page_fetch") as timing:
+                response = self._make_request(
+                    'GET', url, headers=headers, params=params, accept_statuses=self.page_size_rejection_statuses
+                )
+                timing.bytes = len(response.content) if response is not None else 0
+            if response is None:
+                if self.socket_id:
+                    # Failure unrelated to the socket context; retrying would not help
+                    return None, False
+                logger.info("Retrying revision history batch with a refreshed socket context.")
+                continue
+            if response.status_code in self.page_size_rejection_statuses:
+                if is_invalid_socket_response(response.text):
+                    self.invalidate_socket_context("invalid socket response")
+                    continue
+                logger.error(f"HTTP Error {response.status_code} for page of {limit} items: {response.text[:100]}...")
+                return None, is_page_size_rejection(response.text)
+
+            try:
+                with self.metrics.phase("json_decode") as timing:
+                    timing.bytes = len(response.content)
+                    data = response.json()
+            except Exception as e:
+                logger.error(f"Error decoding revision history response: {e}")
+                return None, False
+
+            if data.get("msg") != "SUCCESS":
+                if is_invalid_socket_response(response.text):
+                    self.invalidate_socket_context("invalid socket response")
+                    continue
+                logger.error("Failed to fetch revision history: API message failed.")
+                return None, is_page_size_rejection(response.text)
+
+            logger.info(f"Revision history batch fetched for {record_id}. Offset: {offset_v2}")
+            return data.get("data", {}), False
+
+        logger.error("Revision history batch failed after refreshing the socket context.")
+        return None, False
+
+    def list_view_record_ids(self, view_url=None):
+        """
+        Lists the record IDs in a table view (TABLE_VIEW_URL by default), in view order,
+        through the same private readData API the web client uses. Returns None on failure.
+        """
+        view_url = view_url or self.table_view_url
+        _, table_id, view_id = parse_view_url(view_url)
+        if not table_id or not view_id:
+            logger.error(f"Table mode needs a view URL with table and view IDs (.../tblXXX/viwXXX), got: {view_url}")
+            return None
+        headers = self.rev_headers_template.copy()
+        headers['Referer'] = view_url
+        headers['x-airtable-application-id'] = self.app_id
+        url = f"{self.config.get('BASE_URL')}/{self.view_data_endpoint_template.format(table_id)}"
+
+        for attempt in range(2):
+            socket_id = self.require_socket_context()
+            if not socket_id:
+                return None
+
+            with self.metrics.phase("view_list") as timing:
+                response = self._make_request('GET', url, headers=headers, params=build_view_data_params(socket_id, view_id))
+                timing.bytes = len(response.content) if response else 0
+            if not response:
+                if self.socket_id:
+                    return None
+                logger.info("Retrying view listing with a refreshed socket context.")
+                continue
+
+            try:
+                data = response.json()
+            except Exception as e:
+                logger.error(f"Error decoding view data response: {e}")
+                return None
+            if data.get("msg") != "SUCCESS":
+                if is_invalid_socket_response(response.text):
+                    self.invalidate_socket_context("invalid socket response")
+                    continue
+                logger.error(f"Failed to list records of view {view_id}: API message failed.")
+                return None
+
+            record_ids = extract_view_row_ids(data.get("data") or {}, view_id)
+            if record_ids is None:
+                logger.error(f"View data response for {view_id} contained no row order.")
+                return None
+            logger.info(f"Listed {len(record_ids)} records in view {view_id}.")
+            return record_ids
+
+        logger.error("View listing failed after refreshing the socket context.")
+        return None
+
+    def fetch_revision_page(self, offset_v2=None, record_id=None):
+        """
+        Fetches the next raw page using the current page size. In adaptive mode a page the
+        server rejects for its size is retried at half the size, and a truncated page lowers
+        the size to what the server actually returned. Other failures keep the size.
+        """
+        limit = self.page_size
+        while True:
+            page, rejected = self._fetch_activity_page(offset_v2, record_id, limit)
+            if not rejected or not self.adaptive_page_size or limit <= self.min_page_size:
+                break
+            limit = max(self.min_page_size, limit // 2)
+            self.page_size = min(self.page_size, limit)
+            logger.warning(f"Page rejected, retrying with page size {limit}.")
+
+        if page is None:
+            return None
+
+        item_count = len(page.get("orderedActivityAndCommentIds", []))
+        self.page_requests += 1
+        self.page_items += item_count
+        if self.adaptive_page_size and page.get("offsetV2") and self.min_page_size <= item_count < limit:
+            # More pages remain but the server returned less than asked: that is its cap
+            self.page_size = min(self.page_size, item_count)
+            logger.warning(f"Page truncated to {item_count} items, lowering page size to {self.page_size}.")
+        logger.info(f"Items per request: {item_count} (page size {limit}).")
+        return page
+
+    def cut_page_at_mark(self, page, since=None):
+        """Cuts a raw page at the high-water mark. Returns (page, next offset or None when pagination should stop)."""
+        page, reached_mark = trim_page_to_mark(page, since)
+        offset_v2_out = page.get("offsetV2")
+        if reached_mark:
+            logger.info("Reached previously saved entries; stopping pagination.")
+            offset_v2_out = None
+        return page, offset_v2_out
+
+    def start_page_parse(self, page):
+        """
+        Starts parsing a raw page into entries. Returns a future of the entries; without a
+        diff pool the page is parsed right away and the future is already resolved.
+        Lazy entries skip the pool, as their diffs are parsed on first access, if ever.
+        """
+        if self.diff_pool and not self.lazy_diffs:
+            return self.diff_pool.submit_page(page)
+        future = Future()
+        with self.metrics.phase("parse"):
+            future.set_result(parse_revision_history(page, lazy=self.lazy_diffs))
+        return future
+
+    def _submit_page(self, page, since=None):
+        """Starts parsing a raw page, cut at the high-water mark. Returns (future of entries, next offset)."""
+        page, offset_v2_out = self.cut_page_at_mark(page, since)
+        return self.start_page_parse(page), offset_v2_out
+
+    def _parse_page(self, page, since=None):
+        """Parses a raw page into entries, cut at the high-water mark. Returns (entries, next offset)."""
+        future, offset_v2_out = self._submit_page(page, since)
+        return future.result(), offset_v2_out
+
+    def get_record_revision_history(self, offset_v2=None, record_id=None, since=None):
+        page = self.fetch_revision_page(offset_v2, record_id)
+        if page is None:
             return [], None
         
         try:
-            data = response.json()
-            if data.get("msg") != "SUCCESS":
-                logger.error("Failed to fetch revision history: API message failed.")
-                return [], None
-            
-            logger.info(f"Revision history batch fetched. Offset: {offset_v2}")
-            parsed_data = parse_revision_history(data.get("data", {}))
-            offset_v2_out = data.get("data", {}).get("offsetV2")
-            
-            return parsed_data, offset_v2_out
+            return self._parse_page(page, since)
         
         except Exception as e:
             logger.error(f"Error processing revision history response: {e}")
             return [], None
 
-    def get_all_revision_history(self):
+    def collect_revision_history(self, record_id=None, since=None, journal=None, sink=None):
+        """
+        Pages through a record's history, stopping early at the high-water mark `since`.
+        With a PaginationJournal, each page is committed as it arrives and a previous
+        interrupted run is resumed from its last committed page. With a sink (e.g. a
+        StreamingRevisionWriter) batches are handed over as they arrive instead of collected.
+        With PIPELINE on, pages go through a RevisionPipeline rather than the sequential loop.
+        Returns (entries sorted newest first, complete) where complete is False if a page failed.
+        """
+        record_id = record_id or self.record_id
         all_results = []
         offset_v2 = None
+        complete = True
+        finished = False
+        resumed = False
+        committed = 0
+        if journal:
+            all_results, offset_v2, finished = journal.resume()
+            resumed = offset_v2 is not None
+            if sink:
+                sink.write_batch(all_results)
+                all_results = []
 
-        while True:
-            batch, offset_v2 = self.get_record_revision_history(offset_v2)
-            all_results.extend(batch)
-            if not offset_v2:
-                break
-            logger.info(f"Fetched {len(batch)} items. Continuing...")
+        def commit(pending_batch):
+            nonlocal committed
+            future, next_offset = pending_batch
+            if self.diff_pool:
+                # Pool parsing overlaps fetching; what is left to wait for here is the parse cost on the critical path
+                with self.metrics.phase("parse"):
+                    batch = future.result()
+            else:
+                batch = future.result()
+            if journal:
+                journal.append(batch, next_offset)
+            if self.store:
+                self.store.write_batch(record_id, batch)
+            if sink:
+                sink.write_batch(batch)
+            else:
+                all_results.extend(batch)
+            committed += 1
+            logger.info(f"Fetched {len(batch)} items.")
+
+        # The previous page keeps parsing (in the diff pool, if any) while the next one is fetched
+        pending = None
+        try:
+            if self.pipeline and not finished:
+                # Fetching, parsing and writing run as overlapping stages instead of in turn
+                finished = True
+                complete = RevisionPipeline(self, self.pipeline_queue_size).run(record_id, offset_v2, since, commit)
+            while not finished:
+                page = self.fetch_revision_page(offset_v2, record_id)
+                if page is None:
+                    complete = False
+                    break
+                submitted = self._submit_page(page, since)
+                if pending:
+                    commit(pending)
+                pending = submitted
+                offset_v2 = submitted[1]
+                if not offset_v2:
+                    break
+            if pending:
+                commit(pending)
+        except Exception as e:
+            logger.error(f"Error processing revision history response: {e}")
+            complete = False
+
+        if resumed and not complete and not committed:
+            # The journal's offset led nowhere (e.g. it expired); the next run starts over
+            logger.warning(f"Resumed fetch for {record_id} failed at its first page; discarding the journal.")
+            journal.discard()
 
         try:
             all_results.sort(key=lambda entry: entry.timestamp, reverse=True) 
@@ -224,31 +595,209 @@ class AirtableScraper:
         except Exception as e:
             logger.error(f"Failed to sort revision history entries: {e}")     
 
-        return all_results
+        return all_results, complete
+
+    def get_all_revision_history(self, record_id=None, since=None):
+        return self.collect_revision_history(record_id, since)[0]
     
     
     # --- Save File ---
-    def save_to_file(self, parsed_data):
+    def save_to_file(self, parsed_data, output_file=None):
+        output_file = output_file or self.output_file
+        with self.metrics.phase("save") as timing:
+            saved = self._save(parsed_data, output_file)
+            if saved and Path(output_file).is_file():
+                timing.bytes = Path(output_file).stat().st_size
+        return saved
+
+    def _save(self, parsed_data, output_file):
+        if self.output_format in COLUMNAR_FORMATS:
+            return self.save_to_columns(parsed_data, output_file)
         try:
-            data_to_save = [entry.to_dict() for entry in parsed_data]
-            with open(self.output_file, 'w', encoding='utf-8') as f:
+            data_to_save = [entry.to_dict(self.fields) for entry in parsed_data]
+            with open(output_file, 'w', encoding='utf-8') as f:
                 json.dump(data_to_save, f, indent=4, ensure_ascii=False)
-            logger.info(f"Revision history saved to {self.config['OUTPUT_FILE']}")
+            logger.info(f"Revision history saved to {output_file}")
+            return True
         except Exception as e:
             logger.error(f"Error saving JSON to file: {e}")
+            return False
+
+    def save_to_columns(self, parsed_data, output_file):
+        """Saves entries in a columnar format: a column directory or a Parquet file."""
+        try:
+            if self.output_format == "parquet":
+                write_parquet(parsed_data, output_file)
+            else:
+                write_columnar(parsed_data, output_file)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving columnar output to {output_file}: {e}")
+            return False
+
+    def load_from_file(self, output_file=None):
+        """Loads previously saved entries. Returns None if the file is missing or unreadable."""
+        output_file = output_file or self.output_file
+        if not Path(output_file).exists():
+            return None
+        try:
+            if self.output_format == "parquet":
+                return read_parquet_entries(output_file)
+            if self.output_format == "columnar":
+                return ColumnarReader(output_file).read_entries()
+            with open(output_file, 'r', encoding='utf-8') as f:
+                return [RevisionEntry.from_dict(item) for item in json.load(f)]
+        except Exception as e:
+            logger.error(f"Error loading saved revision history from {output_file}: {e}")
+            return None
+
+    def scrape_to_file(self, record_id=None, output_file=None):
+        """
+        Fetches a record's history and saves it. In incremental mode only entries newer than
+        the stored high-water mark are fetched and merged into the existing output.
+        Returns the number of entries saved, or None if nothing was saved.
+        """
+        record_id = record_id or self.record_id
+        output_file = output_file or self.output_file
+        if self.output_format in STREAMING_FORMATS:
+            return self.stream_to_file(record_id, output_file)
+
+        mark = self.state.get(record_id) if self.incremental else None
+        existing = []
+        if mark:
+            existing = self.load_from_file(output_file)
+            if existing is None:
+                logger.warning(f"No saved output for {record_id}; running a full scrape.")
+                mark, existing = None, []
+
+        journal = PaginationJournal(f"{output_file}.journal", record_id, self.fields, self.resume_max_age) if self.checkpoints else None
+        entries, complete = self.collect_revision_history(record_id, since=mark, journal=journal)
+        if mark:
+            logger.info(f"Fetched {len(entries)} new entries for {record_id} since {mark.get('createdTime')}.")
+            entries = merge_revision_entries(existing, entries)
+
+        if not entries:
+            logger.error(f"No revision data to save for {record_id}.")
+            return None
+        if not self.save_to_file(entries, output_file):
+            return None
+
+        # Only advance the mark when pagination finished, otherwise the gap would be skipped next run
+        if self.incremental and complete:
+            self.state.update(record_id, entries[0])
+        if journal and complete:
+            journal.discard()
+        return len(entries)
+
+    def stream_to_file(self, record_id=None, output_file=None):
+        """
+        Like scrape_to_file, but writes each batch to disk as it arrives (NDJSON or compact
+        JSON array) so memory stays flat however long the history is.
+        """
+        record_id = record_id or self.record_id
+        output_file = output_file or self.output_file
+
+        writer = StreamingRevisionWriter(output_file, self.output_format, fields=self.fields)
+        mark = self.state.get(record_id) if self.incremental else None
+        if mark and not writer.add_existing():
+            logger.warning(f"No saved streaming output for {record_id}; running a full scrape.")
+            mark = None
+
+        journal = PaginationJournal(f"{output_file}.journal", record_id, self.fields, self.resume_max_age) if self.checkpoints else None
+        try:
+            _, complete = self.collect_revision_history(record_id, since=mark, journal=journal, sink=writer)
+            with self.metrics.phase("save") as timing:
+                count = writer.close()
+                timing.bytes = Path(output_file).stat().st_size if count else 0
+        except Exception as e:
+            writer.discard()
+            logger.error(f"Error streaming revision history to {output_file}: {e}")
+            return None
+
+        if not count:
+            logger.error(f"No revision data to save for {record_id}.")
+            return None
+        if self.incremental and complete:
+            self.state.update(record_id, RevisionEntry.from_dict(writer.newest))
+        if journal and complete:
+            journal.discard()
+        return count
+
 
-    
     # --- Run ---
+    def ensure_session(self):
+        """Loads the saved session, falling back to a fresh login. Returns False if both fail."""
+        if self.load_cookies():
+            return True
+        return self.run_login_flow()
+
     def run(self):
-        if not self.load_cookies():
-            if not self.run_login_flow():
-                logger.critical("Login failed and cookies could not be loaded. Exiting.")
-                return
+        if not self.ensure_session():
+            logger.critical("Login failed and cookies could not be loaded. Exiting.")
+            return
 
-        revision_data = self.get_all_revision_history()
-        
-        if revision_data:
-            self.save_to_file(revision_data)
-        else:
-            logger.error("No revision data to save.")
+        self.scrape_to_file()
+
+        self.finish_run()
+
+        logger.info(f"Socket context refreshed {self.socket_refresh_count} time(s) during this run.")
+        self.log_page_stats()
+        self.report_run()
+
+    def finish_run(self):
+        """Releases run-scoped resources: the diff pool, the SQLite sink and pending diff cache writes."""
+        if self.diff_pool:
+            self.diff_pool.shutdown()
+        if self.store:
+            self.store.close()
+        cache = get_diff_cache()
+        if cache is not None:
+            cache.flush()
+            cache.log_stats()
+        PARSE_COVERAGE.log_stats()
+        self.rate_limiter.log_stats()
+        log_retry_stats(self.retry_policies)
+        self.auth_broker.log_stats()
+
+    def report_run(self, counters=None):
+        """
+        Logs the machine-readable run summary (per-phase counts, p50/p95/p99 latencies,
+        bytes, and run counters) as one JSON line and writes it to METRICS_FILE, plus the
+        Prometheus textfile when PROMETHEUS_TEXTFILE is set. Returns the summary.
+        """
+        run_counters = {
+            "socket_refreshes": self.socket_refresh_count,
+            "page_requests": self.page_requests,
+            "page_items": self.page_items,
+            "final_page_size": self.page_size,
+            "logins": self.auth_broker.logins,
+            "sessions_adopted": self.auth_broker.adoptions,
+        }
+        for name, policy in self.retry_policies.items():
+            run_counters[f"retries_{name}"] = policy.retries
+            run_counters[f"retries_gave_up_{name}"] = policy.gave_up
+        cache = get_diff_cache()
+        if cache is not None:
+            run_counters.update(diff_cache_hits=cache.hits + cache.disk_hits, diff_cache_misses=cache.misses)
+        run_counters.update(
+            parsed_activities=PARSE_COVERAGE.activities,
+            parser_fallback_activities=sum(PARSE_COVERAGE.fallback.values())
+        )
+        run_counters.update(counters or {})
+
+        summary = self.metrics.summary(run_counters)
+        logger.info(f"Run summary: {json.dumps(summary)}")
+        if self.config.get('METRICS_FILE'):
+            write_summary_json(summary, self.config['METRICS_FILE'])
+        if self.config.get('PROMETHEUS_TEXTFILE'):
+            write_prometheus_textfile(summary, self.config['PROMETHEUS_TEXTFILE'])
+        return summary
+
+    def log_page_stats(self):
+        """Logs the effective items-per-request over the run, for tuning PAGE_SIZE."""
+        if self.page_requests:
+            logger.info(
+                f"Fetched {self.page_items} items in {self.page_requests} page requests "
+                f"({self.page_items / self.page_requests:.1f} items/request, final page size {self.page_size})."
+            )
 
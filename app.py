@@ -1,11 +1,95 @@
 import os
 import logging
+import asyncio
+import argparse
 from airtable_scraper import AirtableScraper
+from batch_scraper import BatchScraper, load_record_ids
 from config import ALL_CONFIG
+from data_models import parse_field_list
 from logger import setup_logging
 
+# CORE settings only the thread-pool scraper honours; --async warns when the environment turns them on
+ASYNC_IGNORED_SETTINGS = ("OUTPUT_FORMAT", "INCREMENTAL", "SQLITE_DB", "PIPELINE", "ADAPTIVE_PAGE_SIZE", "PROMETHEUS_TEXTFILE")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scrape Airtable record revision history.")
+    parser.add_argument(
+        "--records-file",
+        help="File with record IDs to scrape ('-' reads stdin). Enables multi-record mode."
+    )
+    parser.add_argument(
+        "--table", action="store_true",
+        help="Table mode: list every record in AIRTABLE_TABLE_VIEW_URL's view and scrape each one. "
+             "Interrupted runs resume where they stopped."
+    )
+    parser.add_argument(
+        "--workers", type=int,
+        help="Number of records fetched concurrently in multi-record mode."
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="Directory for per-record output files in multi-record mode."
+    )
+    parser.add_argument(
+        "--output-format", choices=["json", "ndjson", "json-compact", "columnar", "parquet"],
+        help="Output format; ndjson and json-compact are streamed to disk batch by batch, "
+             "columnar and parquet store one column per field."
+    )
+    parser.add_argument(
+        "--sqlite-db",
+        help="Also upsert every fetched batch into this SQLite database."
+    )
+    parser.add_argument(
+        "--prometheus-textfile",
+        help="Also write the run metrics summary to this file in the Prometheus text format."
+    )
+    parser.add_argument(
+        "--fields",
+        help="Comma-separated output fields, e.g. id,timestamp,user,comment (id and timestamp are always kept). "
+             "Leaving out columnId/columnName/columnType/oldValue/newValue skips diff HTML parsing."
+    )
+    parser.add_argument(
+        "--lazy-diffs", action="store_true",
+        help="Parse each activity's diff HTML only when one of its fields is first needed."
+    )
+    parser.add_argument(
+        "--pipeline", action="store_true",
+        help="Fetch, parse and write pages as overlapping stages connected by bounded queues."
+    )
+    parser.add_argument(
+        "--incremental", action="store_true", default=None,
+        help="Only fetch entries newer than the last saved run and merge them into the output."
+    )
+    parser.add_argument(
+        "--async", dest="use_async", action="store_true",
+        help="Use the asyncio client instead of a thread pool in multi-record mode. It writes one JSON file "
+             "per record without checkpoints or run metrics, so it cannot be combined with --table, "
+             "--incremental, --sqlite-db, --pipeline, --prometheus-textfile or a non-json --output-format."
+    )
+    args = parser.parse_args()
+    if args.table and args.use_async:
+        # The asyncio client has no bounded submission, progress reporting, resume ledger or sharded layout
+        parser.error("--table cannot be combined with --async; table mode uses the thread pool.")
+    if args.use_async:
+        unsupported = [flag for flag, value in (
+            ("--output-format", args.output_format not in (None, "json")),
+            ("--incremental", args.incremental),
+            ("--sqlite-db", args.sqlite_db),
+            ("--pipeline", args.pipeline),
+            ("--prometheus-textfile", args.prometheus_textfile),
+        ) if value]
+        if unsupported:
+            parser.error(f"--async cannot be combined with {', '.join(unsupported)}; the asyncio client only writes one JSON file per record.")
+    try:
+        parse_field_list(args.fields)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
 
 def main():
+    args = parse_args()
 
     # 1. Initialize logging 
     setup_logging(ALL_CONFIG.get('LOGGING'))
@@ -19,12 +103,13 @@ def main():
     record_id = core_config.get('RECORD_ID')
     app_id = core_config.get('APPLICATION_ID')
     view_url = core_config.get('TABLE_VIEW_URL')
+    multi_record = bool(args.records_file or core_config.get('RECORD_IDS') or args.table)
 
     # 3. Validate requried parameters
     missing_vars = []
     if not email: missing_vars.append("AIRTABLE_EMAIL")
     if not password: missing_vars.append("AIRTABLE_PASSWORD")
-    if not record_id: missing_vars.append("AIRTABLE_RECORD_ID")
+    if not record_id and not multi_record: missing_vars.append("AIRTABLE_RECORD_ID")
     if not app_id: missing_vars.append("AIRTABLE_APP_ID")
     if not view_url: missing_vars.append("AIRTABLE_TABLE_VIEW_URL")
 
@@ -37,10 +122,39 @@ def main():
 
     logger.info("All necessary configuration loaded. Starting Airtable Scraper...")
     
+    if args.output_format:
+        core_config['OUTPUT_FORMAT'] = args.output_format
+    if args.sqlite_db:
+        core_config['SQLITE_DB'] = args.sqlite_db
+    if args.prometheus_textfile:
+        core_config['PROMETHEUS_TEXTFILE'] = args.prometheus_textfile
+    if args.fields:
+        core_config['OUTPUT_FIELDS'] = args.fields
+    if args.lazy_diffs:
+        core_config['LAZY_DIFFS'] = True
+    if args.pipeline:
+        core_config['PIPELINE'] = True
+
     # 3. Star Scraping
     logger.info("Starting Airtable Scraper...")
-    scraper = AirtableScraper(email, password)
-    scraper.run()
+    if args.table:
+        scraper = AirtableScraper(email, password, incremental=args.incremental)
+        layout = core_config.get('OUTPUT_LAYOUT') or "sharded"
+        BatchScraper(scraper, workers=args.workers, output_dir=args.output_dir, layout=layout, resume=True).run_table()
+    elif multi_record and args.use_async:
+        from async_scraper import run_async
+        ignored = [key for key in ASYNC_IGNORED_SETTINGS if core_config.get(key) and core_config.get(key) != "json"]
+        if ignored:
+            logger.warning(f"The asyncio client ignores these settings: {', '.join(ignored)}.")
+        record_ids = load_record_ids(args.records_file)
+        asyncio.run(run_async(email, password, record_ids, output_dir=args.output_dir, workers=args.workers))
+    elif multi_record:
+        scraper = AirtableScraper(email, password, incremental=args.incremental)
+        record_ids = load_record_ids(args.records_file)
+        BatchScraper(scraper, workers=args.workers, output_dir=args.output_dir).run(record_ids)
+    else:
+        scraper = AirtableScraper(email, password, incremental=args.incremental)
+        scraper.run()
 
     logger.info("Airtable Scraper finished execution.")
 
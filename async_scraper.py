@@ -0,0 +1,377 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from pathlib import Path
+from email.utils import parsedate_to_datetime
+import aiohttp
+from yarl import URL
+from requests.cookies import create_cookie
+from config import ALL_CONFIG
+from parse_cache import get_diff_cache
+from airtable_parser import PARSE_COVERAGE
+from rate_limiter import RateLimiter, endpoint_for, parse_retry_after
+from retry_policy import build_retry_policies, log_retry_stats
+from data_models import parse_field_list, needs_diff_fields
+from session_context import SessionContextMixin
+from utils import (
+    extract_csrf_token,
+    extract_socket_id,
+    build_activity_params,
+    is_invalid_socket_response,
+    parse_revision_history
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAirtableScraper(SessionContextMixin):
+    """
+    Asyncio counterpart of AirtableScraper. Login, socket-id retrieval and activity
+    pagination run as coroutines over one shared aiohttp connection pool, so many
+    record fetches can be in flight from a single thread.
+
+    Use as an async context manager:
+        async with AsyncAirtableScraper(email, password) as scraper:
+            await scraper.run(record_ids)
+    """
+
+    def __init__(self, email, password, max_concurrent_requests=None, output_dir=None, workers=None):
+        self.email = email
+        self.password = password
+
+        self.config = ALL_CONFIG.get('CORE', {})
+        self.base_url = self.config.get('BASE_URL')
+        self.app_id = self.config.get('APPLICATION_ID')
+        self.table_view_url = self.config.get('TABLE_VIEW_URL')
+        self.activity_endpoint_template = self.config.get('ACTIVITY_ENDPOINT_TEMPLATE')
+        # Stored session, auth broker and socket/CSRF context, shared with AirtableScraper
+        self.init_session_context(self.config)
+        self.output_dir = Path(output_dir or self.config.get('OUTPUT_DIR', 'revision_history'))
+        self.max_concurrent_requests = max_concurrent_requests or self.config.get('MAX_CONCURRENT_REQUESTS', 8)
+        # Records in flight at once; each holds its parsed history in memory until saved
+        self.workers = max(1, workers or self.config.get('WORKERS', 4))
+        self.page_size = self.config.get('PAGE_SIZE', 10)
+        # Output field projection; without diff fields, diffRowHtml is never parsed
+        self.fields = parse_field_list(self.config.get('OUTPUT_FIELDS'))
+        self.lazy_diffs = self.config.get('LAZY_DIFFS', False) or not needs_diff_fields(self.fields)
+
+        login_urls = ALL_CONFIG.get('LOGIN_URLS', {})
+        self.initial_page_url = login_urls.get('INITIAL_PAGE_URL')
+        self.email_submit_url = login_urls.get('EMAIL_SUBMIT_URL')
+        self.login_action_url = login_urls.get('LOGIN_ACTION_URL')
+
+        self.headers = ALL_CONFIG.get('HEADERS', {})
+        self.rev_headers_template = ALL_CONFIG.get('REV_HEADERS', {})
+
+        self.session = None
+        self._context_lock = None
+        self.rate_limiter = RateLimiter(ALL_CONFIG.get('RATE_LIMIT', {}))
+        self.retry_policies = build_retry_policies(ALL_CONFIG.get('RETRY', {}))
+
+    async def __aenter__(self):
+        # Shared pool: at most max_concurrent_requests connections across all records
+        connector = aiohttp.TCPConnector(limit=self.max_concurrent_requests)
+        self.session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.CookieJar())
+        self._context_lock = asyncio.Lock()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+
+
+    # --- Cookies ---
+    def _cookies_to_save(self):
+        """The aiohttp jar's cookies as http.cookiejar cookies, which SessionStore.save_login takes."""
+        now = time.time()
+        cookies = []
+        for morsel in self.session.cookie_jar:
+            expires = None
+            try:
+                if morsel["max-age"]:
+                    expires = int(now + int(morsel["max-age"]))
+                elif morsel["expires"]:
+                    expires = int(parsedate_to_datetime(morsel["expires"]).timestamp())
+            except (TypeError, ValueError):
+                pass
+            cookies.append(create_cookie(
+                morsel.key, morsel.value, domain=morsel["domain"], path=morsel["path"] or "/",
+                expires=expires, secure=bool(morsel["secure"])
+            ))
+        return cookies
+
+    def _replace_cookies(self, state):
+        self.session.cookie_jar.clear()
+        for cookie in state.get("cookies", []):
+            self.session.cookie_jar.update_cookies(
+                {cookie["name"]: cookie["value"]}, URL(f"https://{cookie['domain'].lstrip('.')}")
+            )
+
+    def _drop_cookies(self):
+        self.session.cookie_jar.clear()
+
+    async def refresh_session_if_expiring(self):
+        """Logs in again (through the auth broker) once the session was rejected or is about to expire."""
+        if not self.session_needs_refresh():
+            return True
+        async with self._context_lock:
+            # Another coroutine may have refreshed it while we waited for the lock
+            if self.session_needs_refresh():
+                logger.info("Session was rejected or expires soon; getting a new one.")
+                return await self.run_login_flow()
+        return True
+
+
+    # --- Network Methods ---
+    async def _make_request(self, method, url, **kwargs):
+        """Request wrapper with retries under the endpoint's RetryPolicy. Returns (status, text) or None."""
+        endpoint = endpoint_for(url)
+        attempt = self.retry_policies.get(endpoint, self.retry_policies["default"]).start()
+        while True:
+            _, delay = self.rate_limiter.reserve(url)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    text = await response.text()
+                    status = response.status
+                    retry_after_header = response.headers.get('Retry-After')
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                backoff = attempt.backoff()
+                if backoff is None:
+                    logger.error(f"Network Error for {url}: {e}")
+                    return None
+                logger.warning(f"{type(e).__name__} for {url}, retry {attempt.retries} in {backoff:.1f}s.")
+                await asyncio.sleep(backoff)
+                continue
+            except Exception as e:
+                logger.error(f"Network Error for {url}: {e}")
+                return None
+
+            retry_after = self.rate_limiter.observe(endpoint, status, retry_after_header)
+            if attempt.retryable(status):
+                # The server's Retry-After bounds the delay even with the rate limiter disabled
+                backoff = attempt.backoff(parse_retry_after(retry_after_header, retry_after))
+                if backoff is not None:
+                    logger.warning(f"HTTP {status} for {url}, retry {attempt.retries} in {backoff:.1f}s.")
+                    await asyncio.sleep(backoff)
+                    continue
+
+            if status >= 400:
+                logger.error(f"HTTP Error {status} for {url}: {text[:100]}...")
+                if status in (401, 403):
+                    logger.warning("Auth failure detected. Clearing cookies.")
+                    self.clear_cookies()
+                    self.invalidate_socket_context("auth failure")
+                elif is_invalid_socket_response(text):
+                    self.invalidate_socket_context("invalid socket response")
+                return None
+            return status, text
+
+    async def run_login_flow(self):
+        """
+        Logs in through the auth broker: adopts a session another worker has just created,
+        or performs the full login process once for everyone and saves the session.
+        """
+        return await self.auth_broker.login_async(self)
+
+    async def _login(self):
+        logger.info("Starting login.")
+
+        initial_resp = await self._make_request('GET', self.initial_page_url, headers=self.headers)
+        csrf_token_1 = extract_csrf_token(initial_resp[1]) if initial_resp else None
+        if not csrf_token_1: return False
+
+        payload = {
+            "_csrf": csrf_token_1,
+            "urlToRedirectTo": "",
+            "countryCode": "",
+            "didConsentToMarketing": "",
+            "email": self.email
+        }
+        email_resp = await self._make_request('POST', self.email_submit_url, data=payload, headers=self.headers)
+        csrf_token_2 = extract_csrf_token(email_resp[1]) if email_resp else None
+        if not csrf_token_2: return False
+
+        payload = {
+            "_csrf": csrf_token_2,
+            "urlToRedirectTo": "",
+            "email": self.email,
+            "password": self.password
+        }
+        login_resp = await self._make_request('POST', self.login_action_url, data=payload, headers=self.headers)
+        if not login_resp: return False
+
+        self.invalidate_socket_context("new login")
+        self.csrf_token = csrf_token_2
+        self.save_cookies()
+        logger.info("Login completed successfully.")
+        return True
+
+    async def get_socket_context(self):
+        """Returns the cached socket ID, fetching it from the home page when missing or older than SOCKET_MAX_AGE."""
+        if self._has_fresh_socket():
+            return self.socket_id
+        async with self._context_lock:
+            # Another worker on the same session may already have fetched a new one
+            if not self._has_fresh_socket() and not self._adopt_shared_socket_id():
+                homepage_resp = await self._make_request('GET', self.base_url, headers=self.headers)
+                self._record_socket_id(extract_socket_id(homepage_resp[1]) if homepage_resp else None)
+            return self.socket_id
+
+    async def ensure_session(self):
+        """Loads saved cookies, falling back to a fresh login. Returns False if both fail."""
+        if self.load_cookies():
+            return True
+        return await self.run_login_flow()
+
+
+    # --- Data Fetching ---
+    async def fetch_activity_page(self, record_id, offset_v2=None):
+        """Fetches one raw page of activities/comments. Returns the API 'data' payload or None."""
+        headers = self.rev_headers_template.copy()
+        headers['Referer'] = f"{self.table_view_url}/{record_id}"
+        headers['x-airtable-application-id'] = self.app_id
+        # aiohttp rejects None header values where requests silently drops them
+        headers = {key: value for key, value in headers.items() if value is not None}
+        url = f"{self.base_url}/{self.activity_endpoint_template.format(record_id)}"
+
+        for attempt in range(2):
+            if not await self.refresh_session_if_expiring():
+                logger.error("Session refresh failed.")
+                return None
+            socket_id = await self.get_socket_context()
+            if not socket_id:
+                async with self._context_lock:
+                    if not self.socket_id:
+                        logger.error("Could not obtain a socket ID, attempting re-login.")
+                        if not await self.run_login_flow():
+                            return None
+                socket_id = await self.get_socket_context()
+                if not socket_id:
+                    logger.error("Failed to get socket ID even after re-login.")
+                    return None
+
+            params = build_activity_params(socket_id, offset_v2, self.page_size)
+            response = await self._make_request('GET', url, headers=headers, params=params)
+            if not response:
+                if self.socket_id:
+                    return None
+                logger.info("Retrying revision history batch with a refreshed socket context.")
+                continue
+
+            try:
+                data = json.loads(response[1])
+            except Exception as e:
+                logger.error(f"Error decoding revision history response: {e}")
+                return None
+
+            if data.get("msg") != "SUCCESS":
+                if is_invalid_socket_response(response[1]):
+                    self.invalidate_socket_context("invalid socket response")
+                    continue
+                logger.error("Failed to fetch revision history: API message failed.")
+                return None
+
+            logger.info(f"Revision history batch fetched for {record_id}. Offset: {offset_v2}")
+            return data.get("data", {})
+
+        logger.error("Revision history batch failed after refreshing the socket context.")
+        return None
+
+    async def get_all_revision_history(self, record_id):
+        """
+        Pages through a record's history. Returns (entries sorted newest first, complete)
+        where complete is False if a page failed.
+        """
+        all_results = []
+        offset_v2 = None
+        complete = True
+
+        while True:
+            page = await self.fetch_activity_page(record_id, offset_v2)
+            if page is None:
+                complete = False
+                break
+            try:
+                # Parsing is CPU-bound; keep it off the event loop so other fetches progress
+                batch = await asyncio.to_thread(parse_revision_history, page, None, self.lazy_diffs)
+            except Exception as e:
+                logger.error(f"Error processing revision history response: {e}")
+                complete = False
+                break
+            all_results.extend(batch)
+            offset_v2 = page.get("offsetV2")
+            if not offset_v2:
+                break
+
+        try:
+            all_results.sort(key=lambda entry: entry.timestamp, reverse=True)
+        except Exception as e:
+            logger.error(f"Failed to sort revision history entries: {e}")
+        return all_results, complete
+
+
+    # --- Save File ---
+    def save_to_file(self, parsed_data, output_file):
+        try:
+            data_to_save = [entry.to_dict(self.fields) for entry in parsed_data]
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(data_to_save, f, indent=4, ensure_ascii=False)
+            logger.info(f"Revision history saved to {output_file}")
+        except Exception as e:
+            logger.error(f"Error saving JSON to file: {e}")
+
+
+    # --- Run ---
+    async def scrape_record(self, record_id):
+        """Fetches and saves one record. Returns the number of entries saved, or None on failure."""
+        entries, complete = await self.get_all_revision_history(record_id)
+        if not complete:
+            # There is no resume journal here, so a partial history would pass for a full one
+            logger.error(f"Revision history for {record_id} is incomplete; not saving it.")
+            return None
+        if not entries:
+            logger.error(f"No revision data to save for {record_id}.")
+            return None
+        await asyncio.to_thread(self.save_to_file, entries, self.output_dir / f"{record_id}.json")
+        return len(entries)
+
+    async def run(self, record_ids):
+        """Scrapes all records concurrently. Returns {record_id: entry count or None}."""
+        if not await self.ensure_session():
+            logger.critical("Login failed and cookies could not be loaded. Exiting.")
+            return {}
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        slots = asyncio.Semaphore(self.workers)
+
+        async def scrape_bounded(record_id):
+            async with slots:
+                return await self.scrape_record(record_id)
+
+        counts = await asyncio.gather(*(scrape_bounded(record_id) for record_id in record_ids))
+        results = dict(zip(record_ids, counts))
+
+        cache = get_diff_cache()
+        if cache is not None:
+            cache.flush()
+            cache.log_stats()
+        PARSE_COVERAGE.log_stats()
+        self.rate_limiter.log_stats()
+        self.auth_broker.log_stats()
+        log_retry_stats(self.retry_policies)
+
+        failed = [record_id for record_id, count in results.items() if count is None]
+        logger.info(
+            f"Async run finished: {len(results) - len(failed)} succeeded, {len(failed)} failed. "
+            f"Socket context refreshed {self.socket_refresh_count} time(s)."
+        )
+        return results
+
+
+async def run_async(email, password, record_ids, output_dir=None, workers=None):
+    """Convenience entry point used by app.py."""
+    async with AsyncAirtableScraper(email, password, output_dir=output_dir, workers=workers) as scraper:
+        return await scraper.run(record_ids)
@@ -0,0 +1,26 @@
+import os
+import threading
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path, mode='w', permissions=0o666, encoding='utf-8'):
+    """
+    Opens a temporary file next to `path` and renames it over `path` when the block
+    exits cleanly, so readers never see a partially written file. If the block raises,
+    the temporary file is removed and `path` is left as it was.
+
+    `permissions` applies from creation (subject to the umask), e.g. 0o600 for files
+    holding credentials. The temporary name is unique per process and thread.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    # O_BINARY (Windows) leaves newline handling to the text layer, as with open()
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), permissions)
+    try:
+        with os.fdopen(fd, mode, encoding=None if 'b' in mode else encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,93 @@
+import time
+import logging
+from session_store import format_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+class AuthBroker:
+    """
+    Coordinates logins between every scraper (thread or process) sharing a SessionStore.
+
+    Logins happen under the store's exclusive file lock: the first worker that needs one
+    performs the three-step login flow, and workers queued behind it find the new session
+    generation in the store and adopt its cookies and socket ID instead of logging in again.
+    A 401/403 only flags the generation that failed, so a burst of auth failures across
+    workers leads to one re-login rather than a storm of them.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.logins = 0
+        self.adoptions = 0
+
+    def usable(self, state, known_generation=None):
+        """
+        True if `state` is a session the caller can switch to: present, not rejected, not
+        about to expire, and not the generation the caller already holds (that one is
+        why it is asking).
+        """
+        if not state or state.get("rejected_at"):
+            return False
+        if known_generation is not None and state.get("generation") == known_generation:
+            return False
+        return not self.store.is_expiring(self.store.session_expires_at(state))
+
+    def login(self, scraper):
+        """
+        Gives `scraper` a working session: adopts one another worker just created, or runs
+        scraper._login() while holding the lock so nobody else logs in at the same time.
+        Returns False if the login failed.
+        """
+        waited = time.perf_counter()
+        with self.store.locked():
+            if self._adopt(scraper, time.perf_counter() - waited):
+                return True
+            self.logins += 1
+            return scraper._login()
+
+    async def login_async(self, scraper):
+        """
+        login() for AsyncAirtableScraper, awaiting its coroutine _login(). Waiting for the
+        lock blocks the event loop, which only happens while another process logs in.
+        """
+        waited = time.perf_counter()
+        with self.store.locked():
+            if self._adopt(scraper, time.perf_counter() - waited):
+                return True
+            self.logins += 1
+            return await scraper._login()
+
+    def _adopt(self, scraper, waited):
+        """Switches `scraper` to the stored session if it is usable. Call with the lock held."""
+        state = self.store.load()
+        if not self.usable(state, scraper.session_generation):
+            return False
+        scraper.adopt_session(state)
+        self.adoptions += 1
+        logger.info(
+            f"Adopted session generation {state.get('generation')} from {self.store.path} "
+            f"after waiting {waited:.1f}s (expires {format_timestamp(self.store.session_expires_at(state))})."
+        )
+        return True
+
+    def report_rejected(self, generation):
+        """Records that the server rejected session `generation`; only the first report counts."""
+        if generation is None:
+            return
+        if self.store.mark_rejected(generation):
+            logger.warning(f"Session generation {generation} was rejected; the next login replaces it for all workers.")
+
+    def shared_socket_id(self, generation, rejected=None):
+        """A socket ID another worker stored for session `generation`, unless it is stale or `rejected`."""
+        state = self.store.load()
+        if not state or state.get("generation") != generation or state.get("rejected_at"):
+            return None, None
+        socket_id, obtained_at = self.store.context_value(state, "socket_id", self.store.socket_max_age)
+        if socket_id == rejected:
+            return None, None
+        return socket_id, obtained_at
+
+    def log_stats(self):
+        if self.logins or self.adoptions:
+            logger.info(f"Auth broker: {self.logins} login(s) performed, {self.adoptions} session(s) adopted from other workers.")
@@ -0,0 +1,285 @@
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import ALL_CONFIG
+from writers import OUTPUT_EXTENSIONS
+from atomic_file import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+def load_record_ids(source=None):
+    """
+    Reads record IDs from a file path, '-' for stdin, or the AIRTABLE_RECORD_IDS setting.
+    IDs may be separated by commas or whitespace; duplicates are dropped, order is kept.
+    """
+    if source == "-":
+        raw = sys.stdin.read()
+    elif source:
+        try:
+            raw = Path(source).read_text(encoding='utf-8')
+        except Exception as e:
+            logger.error(f"Error reading record IDs from {source}: {e}")
+            return []
+    else:
+        raw = ALL_CONFIG.get('CORE', {}).get('RECORD_IDS') or ""
+
+    record_ids = []
+    seen = set()
+    for record_id in re.split(r'[\s,]+', raw):
+        if record_id and record_id not in seen:
+            seen.add(record_id)
+            record_ids.append(record_id)
+    return record_ids
+
+
+class ProgressReporter:
+    """
+    Progress of a multi-record run (done/total, failures, records per second, ETA), logged
+    and optionally written to a JSON file at most every `interval` seconds and once at the
+    end, so a 50k-record run produces a readable log rather than one line per record.
+    """
+
+    def __init__(self, total, interval=30, progress_file=None, already_done=0):
+        self.total = total
+        self.interval = interval
+        self.progress_file = Path(progress_file) if progress_file else None
+        self.resumed = already_done
+        self.done = already_done
+        self.failed = 0
+        self.entries = 0
+        self.started = time.monotonic()
+        self._last_report = self.started
+        self._lock = threading.Lock()
+
+    def record(self, record_id, count):
+        with self._lock:
+            self.done += 1
+            if count is None:
+                self.failed += 1
+            else:
+                self.entries += count
+            now = time.monotonic()
+            due = now - self._last_report >= self.interval
+            if due:
+                self._last_report = now
+        if due:
+            self.report()
+
+    def snapshot(self):
+        elapsed = time.monotonic() - self.started
+        rate = (self.done - self.resumed) / elapsed if elapsed > 0 else 0.0
+        remaining = self.total - self.done
+        return {
+            "total": self.total,
+            "done": self.done,
+            "failed": self.failed,
+            "resumed": self.resumed,
+            "entries": self.entries,
+            "elapsed_seconds": round(elapsed, 1),
+            "records_per_second": round(rate, 3),
+            "eta_seconds": round(remaining / rate, 1) if rate else None,
+        }
+
+    def report(self, final=False):
+        progress = self.snapshot()
+        eta = f", ETA {progress['eta_seconds']:.0f}s" if progress["eta_seconds"] and not final else ""
+        logger.info(
+            f"{'Finished' if final else 'Progress'}: {progress['done']}/{progress['total']} records "
+            f"({progress['done'] / max(progress['total'], 1):.1%}), {progress['failed']} failed, "
+            f"{progress['entries']} entries, {progress['records_per_second']:.2f} records/s{eta}."
+        )
+        if self.progress_file:
+            try:
+                with atomic_write(self.progress_file) as f:
+                    json.dump({**progress, "finished": final}, f, indent=4)
+            except Exception as e:
+                logger.error(f"Error writing progress file {self.progress_file}: {e}")
+
+
+class BatchScraper:
+    """
+    Fetches revision history for many records concurrently over one authenticated scraper session.
+
+    With `resume`, every saved record is appended to <output_dir>/_completed.ndjson, and a
+    rerun after an interruption skips those records. The ledger belongs to one pass: it
+    is removed when the pass finishes (failures are listed in _failed.txt for a retry with
+    --records-file), and one left by a pass that started over RESUME_MAX_AGE ago is ignored.
+    The "sharded" layout spreads per-record files over 256 subdirectories keyed by a hash
+    of the record ID.
+    """
+    COMPLETED_FILE = "_completed.ndjson"
+    FAILED_FILE = "_failed.txt"
+    PROGRESS_FILE = "_progress.json"
+    RECORDS_FILE = "_records.txt"
+
+    def __init__(self, scraper, workers=None, output_dir=None, layout=None, resume=False):
+        config = ALL_CONFIG.get('CORE', {})
+        self.scraper = scraper
+        self.workers = max(1, workers or config.get('WORKERS', 4))
+        self.output_dir = Path(output_dir or config.get('OUTPUT_DIR', 'revision_history'))
+        self.layout = layout or config.get('OUTPUT_LAYOUT') or "flat"
+        self.resume = resume
+        self.progress_interval = config.get('PROGRESS_INTERVAL', 30)
+        self.resume_max_age = config.get('RESUME_MAX_AGE', 12 * 3600)
+        self._ledger_lock = threading.Lock()
+
+    def output_path(self, record_id):
+        """Returns the per-record output file path."""
+        extension = OUTPUT_EXTENSIONS.get(self.scraper.output_format, ".json")
+        if self.layout == "sharded":
+            shard = hashlib.sha1(record_id.encode('utf-8')).hexdigest()[:2]
+            return self.output_dir / shard / f"{record_id}{extension}"
+        return self.output_dir / f"{record_id}{extension}"
+
+    def scrape_record(self, record_id):
+        """Fetches and saves one record. Returns the number of entries saved, or None on failure."""
+        try:
+            output_path = self.output_path(record_id)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            return self.scraper.scrape_to_file(record_id, output_path)
+        except Exception as e:
+            logger.error(f"Error fetching revision history for {record_id}: {e}")
+            return None
+
+    # --- Resume ledger ---
+    def load_completed(self):
+        """
+        Returns {record_id: entry count} for records saved by an interrupted earlier pass.
+        A ledger from a pass that started more than RESUME_MAX_AGE ago (or has no start
+        time) is removed instead, as its records are due to be scraped again.
+        """
+        ledger = self.output_dir / self.COMPLETED_FILE
+        if not ledger.exists():
+            return {}
+        started_at = None
+        completed = {}
+        with open(ledger, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn final line
+                if "run_started_at" in item:
+                    started_at = item["run_started_at"]
+                else:
+                    completed[item["id"]] = item.get("entries")
+        if started_at is None or time.time() - started_at > self.resume_max_age:
+            logger.info(f"Ignoring {ledger}: its pass started over {self.resume_max_age}s ago; scraping every record again.")
+            os.remove(ledger)
+            return {}
+        return completed
+
+    def start_ledger(self):
+        """Starts the ledger of a new pass, stamped with its start time."""
+        with open(self.output_dir / self.COMPLETED_FILE, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"run_started_at": time.time()}) + "\n")
+
+    def mark_completed(self, record_id, count):
+        with self._ledger_lock:
+            with open(self.output_dir / self.COMPLETED_FILE, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({"id": record_id, "entries": count}) + "\n")
+
+    def finish_pass(self, failed):
+        """
+        Ends the pass: removes the ledger so the next run scrapes every record again, and
+        lists the failed records in _failed.txt (removed when there are none).
+        """
+        failed_file = self.output_dir / self.FAILED_FILE
+        if failed:
+            failed_file.write_text("\n".join(failed) + "\n", encoding='utf-8')
+            logger.warning(f"{len(failed)} failed record IDs written to {failed_file}; retry them with --records-file.")
+        elif failed_file.exists():
+            os.remove(failed_file)
+        ledger = self.output_dir / self.COMPLETED_FILE
+        if ledger.exists():
+            os.remove(ledger)
+
+    # --- Run ---
+    def run_table(self, view_url=None):
+        """
+        Table mode: lists every record in the table view (TABLE_VIEW_URL by default) and
+        scrapes each one. The listing is saved to <output_dir>/_records.txt.
+        """
+        if not self.scraper.ensure_session():
+            logger.critical("Login failed and cookies could not be loaded. Exiting.")
+            return {}
+        record_ids = self.scraper.list_view_record_ids(view_url)
+        if not record_ids:
+            logger.error("No records listed from the table view.")
+            return {}
+        os.makedirs(self.output_dir, exist_ok=True)
+        (self.output_dir / self.RECORDS_FILE).write_text("\n".join(record_ids) + "\n", encoding='utf-8')
+        return self.run(record_ids)
+
+    def run(self, record_ids):
+        """Scrapes all records with a bounded worker pool. Returns {record_id: entry count or None}."""
+        if not record_ids:
+            logger.error("No record IDs given for multi-record mode.")
+            return {}
+        if not self.scraper.ensure_session():
+            logger.critical("Login failed and cookies could not be loaded. Exiting.")
+            return {}
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        completed = {}
+        if self.resume:
+            wanted = set(record_ids)
+            completed = {record_id: count for record_id, count in self.load_completed().items() if record_id in wanted}
+            if completed:
+                logger.info(f"Resuming: {len(completed)} of {len(record_ids)} records were already saved; skipping them.")
+            if not (self.output_dir / self.COMPLETED_FILE).exists():
+                self.start_ledger()
+        pending = [record_id for record_id in record_ids if record_id not in completed]
+        logger.info(f"Scraping {len(pending)} records with {self.workers} workers.")
+
+        progress = ProgressReporter(
+            len(record_ids), self.progress_interval,
+            self.output_dir / self.PROGRESS_FILE if self.resume else None, already_done=len(completed)
+        )
+        results = dict(completed)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # Only a few records per worker are queued at a time, so huge tables don't create every future up front
+            remaining = iter(pending)
+            futures = {}
+
+            def submit_next():
+                record_id = next(remaining, None)
+                if record_id is not None:
+                    futures[executor.submit(self.scrape_record, record_id)] = record_id
+
+            for _ in range(self.workers * 2):
+                submit_next()
+            while futures:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record_id = futures.pop(future)
+                    results[record_id] = future.result()
+                    if results[record_id] is not None and self.resume:
+                        self.mark_completed(record_id, results[record_id])
+                    progress.record(record_id, results[record_id])
+                    logger.debug(f"[{progress.done}/{len(record_ids)}] {record_id}: {results[record_id]} entries.")
+                    submit_next()
+        progress.report(final=True)
+
+        self.scraper.finish_run()
+
+        failed = [record_id for record_id, count in results.items() if count is None]
+        logger.info(
+            f"Multi-record run finished: {len(results) - len(failed)} succeeded, {len(failed)} failed. "
+            f"Socket context refreshed {self.scraper.socket_refresh_count} time(s)."
+        )
+        if failed:
+            logger.warning(f"Failed records: {', '.join(failed[:100])}{' ...' if len(failed) > 100 else ''}")
+        if self.resume:
+            self.finish_pass(failed)
+        self.scraper.log_page_stats()
+        self.scraper.report_run({"records_succeeded": len(results) - len(failed), "records_failed": len(failed)})
+        return results
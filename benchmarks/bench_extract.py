@@ -0,0 +1,141 @@
+"""
+Token extraction benchmark: the streaming byte scanner (get_csrf_token / get_socket_id)
+against the regex extractors on large pages, in milliseconds and body bytes read.
+
+Pages are synthesized at several sizes with the token near the top, as on airtable.com;
+pass saved pages (e.g. the home page from a logged-in browser) to time those instead:
+    python benchmarks/bench_extract.py [--sizes-mb 1 5 20] [--page home.html ...]
+    python benchmarks/bench_extract.py --output after.json --compare before.json
+"""
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+from utils import STREAM_CHUNK_SIZE, get_csrf_token, get_socket_id, extract_csrf_token, extract_socket_id
+from bench_pipeline import compare, git_commit
+
+EXTRACTORS = {
+    "csrf": (get_csrf_token, extract_csrf_token),
+    "socket": (get_socket_id, extract_socket_id),
+}
+
+
+def synthesize_page(kind, size):
+    """An HTML page of about `size` bytes whose token script is followed by a large app payload."""
+    if kind == "csrf":
+        script = '<script>window.initData = {"csrfToken":"bench-csrf","isDev":false,"user":null}</script>'
+    else:
+        script = '<script>window.resolveLiveappDataPromise({"secretSocketId":"bench-socket","sessionUserId":"usrBENCH"});</script>'
+    head = '<html><head><meta charset="utf-8"><title>Airtable</title>' + script
+    row = '{"id":"rec%014d","cellValuesByColumnId":{"fld1":"Some cell text","fld2":[1,2,3]}},'
+    rows, total, i = [], len(head), 0
+    while total < size:
+        rows.append(row % i)
+        total += len(rows[-1])
+        i += 1
+    body = '<script>window.appData = {"rows":[' + ''.join(rows).rstrip(',') + ']};</script></head><body></body></html>'
+    return (head + body).encode('utf-8')
+
+
+def streamed_response(payload):
+    """A requests.Response whose body is read from `payload` in iter_content chunks, like stream=True."""
+    class Raw:
+        def __init__(self):
+            self.offset = 0
+
+        def stream(self, chunk_size, decode_content=True):
+            while self.offset < len(payload):
+                chunk = payload[self.offset:self.offset + chunk_size]
+                self.offset += len(chunk)
+                yield chunk
+
+        def close(self):
+            pass
+
+    response = requests.Response()
+    response.status_code = 200
+    response.encoding = 'utf-8'
+    response.raw = Raw()
+    return response
+
+
+def bench_page(name, kind, payload, repeat):
+    stream_extract, regex_extract = EXTRACTORS[kind]
+    responses = []
+
+    def stream_once():
+        response = streamed_response(payload)
+        responses.append(response)
+        return stream_extract(response)
+
+    def regex_once():
+        return regex_extract(payload.decode('utf-8'))
+
+    streamed, regex = stream_once(), regex_once()
+    if streamed != regex:
+        print(f"mismatch on {name}: stream={streamed!r} regex={regex!r}", file=sys.stderr)
+    stream_s = min(timeit.repeat(stream_once, number=1, repeat=repeat))
+    regex_s = min(timeit.repeat(regex_once, number=1, repeat=repeat))
+    return {
+        f"extract.{name}.bytes": len(payload),
+        f"extract.{name}.stream_bytes_read": responses[-1].bytes_read,
+        f"extract.{name}.stream_ms": round(stream_s * 1e3, 3),
+        f"extract.{name}.regex_ms": round(regex_s * 1e3, 3),
+        f"extract.{name}.match": streamed == regex,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 5, 20], help="Synthetic page sizes.")
+    parser.add_argument("--page", action="append", default=[], help="Saved page to time (token kind is detected).")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per timing; the best is kept.")
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against.")
+    args = parser.parse_args()
+
+    pages = []
+    for size in args.sizes_mb:
+        for kind in EXTRACTORS:
+            pages.append((f"{kind}_{size:g}mb", kind, synthesize_page(kind, int(size * 1e6))))
+    for path in args.page:
+        with open(path, 'rb') as f:
+            payload = f.read()
+        kind = "socket" if b"window.resolveLiveappDataPromise(" in payload else "csrf"
+        pages.append((os.path.basename(path), kind, payload))
+
+    results = {}
+    print(f"chunk size {STREAM_CHUNK_SIZE} bytes")
+    print(f"{'page':<24}{'MB':>8}{'read KB':>10}{'stream ms':>11}{'regex ms':>11}")
+    for name, kind, payload in pages:
+        page_results = bench_page(name, kind, payload, args.repeat)
+        results.update(page_results)
+        print(
+            f"{name:<24}{len(payload) / 1e6:>8.1f}{page_results[f'extract.{name}.stream_bytes_read'] / 1e3:>10.0f}"
+            f"{page_results[f'extract.{name}.stream_ms']:>11.3f}{page_results[f'extract.{name}.regex_ms']:>11.3f}"
+        )
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+    if args.compare:
+        compare(args.compare, report)
+    if not all(value for name, value in results.items() if name.endswith(".match")):
+        sys.exit("Streaming and regex extractors disagree.")
+
+
+if __name__ == "__main__":
+    main()
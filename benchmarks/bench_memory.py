@@ -0,0 +1,90 @@
+"""
+Memory benchmark for RevisionEntry: bytes per entry for 100k entries, comparing the
+previous dict-backed class, the slotted class and columnar RevisionBatch storage.
+
+Run from the repository root:
+    python benchmarks/bench_memory.py [--entries 100000]
+"""
+import os
+import sys
+import gc
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_models import RevisionEntry, RevisionBatch
+
+
+class LegacyRevisionEntry:
+    """The pre-__slots__ RevisionEntry: per-instance __dict__ and a copied user dict."""
+
+    def __init__(self, data):
+        self.id = data.get("id")
+        self.type = data.get("type")
+        self.timestamp = data.get("createdTime")
+        user = data.get("user", {})
+        self.user = {
+            "id": user.get("id"),
+            "email": user.get("email"),
+            "name": user.get("name")
+        }
+        self.comment = data.get("comment")
+        self.columnId = data.get("columnId")
+        self.columnName = data.get("columnName")
+        self.columnType = data.get("columnType")
+        self.oldValue = data.get("oldValue")
+        self.newValue = data.get("newValue")
+
+
+def make_entry_data(count, user_count=25, column_count=40):
+    """Yields API-shaped entry dicts with repeating users and columns, like a real table."""
+    users = [{"id": f"usr{u:014d}", "email": f"user{u}@example.com", "name": f"User {u}"} for u in range(user_count)]
+    for i in range(count):
+        column = i % column_count
+        # Fresh string objects per entry, as json.loads would produce them
+        yield {
+            "id": f"act{i:014d}",
+            "type": "".join(["cell", "Value"]),
+            "createdTime": f"2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}.000Z",
+            "user": dict(users[i % user_count]),
+            "columnId": f"fld{column:014d}",
+            "columnName": f"Column {column}",
+            "columnType": "".join(["te", "xt"]),
+            "oldValue": f"old value {i}",
+            "newValue": f"new value {i}",
+        }
+
+
+def measure(build, count):
+    """Returns bytes retained by the structure `build` creates from `count` entries."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    retained = build(make_entry_data(count))
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del retained
+    return after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    args = parser.parse_args()
+
+    results = {
+        "legacy (dict per entry)": measure(lambda data: [LegacyRevisionEntry(d) for d in data], args.entries),
+        "slotted + interned users": measure(lambda data: [RevisionEntry(d) for d in data], args.entries),
+        "columnar RevisionBatch": measure(lambda data: RevisionBatch(RevisionEntry(d) for d in data), args.entries),
+    }
+
+    baseline = results["legacy (dict per entry)"]
+    print(f"{'representation':<28}{'total MB':>10}{'bytes/entry':>14}{'vs legacy':>11}")
+    for name, total in results.items():
+        print(f"{name:<28}{total / 1e6:>10.1f}{total / args.entries:>14.0f}{total / baseline:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Diff parser microbenchmark: microseconds per diffRowHtml for each column type and
+parser backend, split into building the tree (constructor) and parse_diff itself.
+
+Run from the repository root:
+    python benchmarks/bench_parser.py [--diffs 200] [--output after.json --compare before.json]
+"""
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from airtable_parser import COLUMN_HANDLERS, PARSER_BACKENDS, get_parser_class
+from fixtures import COLUMN_TYPES, EXTENDED_COLUMN_TYPES, diff_html
+from bench_pipeline import compare, git_commit
+
+
+def best_of(function, repeat):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--diffs", type=int, default=200, help="Distinct diffs timed per column type.")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per timing; the best is kept.")
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against.")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'column type':<24}{'backend':<8}{'build us':>10}{'parse us':>10}{'total us':>10}")
+    for backend in PARSER_BACKENDS:
+        parser_class = get_parser_class(backend)
+        if parser_class is not PARSER_BACKENDS[backend]:
+            continue  # Backend not installed
+        for column_type in COLUMN_TYPES + EXTENDED_COLUMN_TYPES:
+            if column_type not in COLUMN_HANDLERS:
+                continue
+            htmls = [diff_html(column_type, i) for i in range(args.diffs)]
+            build = best_of(lambda: [parser_class(html) for html in htmls], args.repeat)
+            total = best_of(lambda: [parser_class(html).parse_diff() for html in htmls], args.repeat)
+            build_us, total_us = build / len(htmls) * 1e6, total / len(htmls) * 1e6
+            results[f"parse.{backend}.{column_type}.us_per_diff"] = round(total_us, 3)
+            results[f"parse.{backend}.{column_type}.build_us_per_diff"] = round(build_us, 3)
+            print(f"{column_type:<24}{backend:<8}{build_us:>10.1f}{total_us - build_us:>10.1f}{total_us:>10.1f}")
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+    if args.compare:
+        compare(args.compare, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Fetch-parse-save benchmark: replays fixture pages from a local stub server and reports
+end-to-end records/sec, diffRowHtml parse cost per column type and parser backend,
+output write time per format and peak RSS. Also checks that every backend parses the
+fixtures identically.
+
+Results are written as flat JSON so runs from two commits can be compared:
+    python benchmarks/bench_pipeline.py --output before.json
+    python benchmarks/bench_pipeline.py --output after.json --compare before.json
+"""
+import os
+import sys
+import json
+import time
+import timeit
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from collections import defaultdict
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import config
+from fixtures import FIXTURE_FILE, COLUMN_TYPES, load_pages, iter_fixture_diffs
+from stub_server import start_stub_server
+
+
+def configure(base_url, work_dir, diff_cache, pipeline=False):
+    """Points the scraper at the stub server and keeps all run artefacts in work_dir."""
+    core = config.CONFIG
+    core.update({
+        "BASE_URL": base_url,
+        "TABLE_VIEW_URL": f"{base_url}/appBENCH000000000/tblBENCH000000000/viwBENCH000000000",
+        "APPLICATION_ID": "appBENCH",
+        "SESSION_FILE": os.path.join(work_dir, "session.json"),
+        "OUTPUT_FILE": os.path.join(work_dir, "revision_history.json"),
+        "STATE_FILE": os.path.join(work_dir, "scrape_state.json"),
+        "OUTPUT_FORMAT": "json",
+        "INCREMENTAL": False,
+        "METRICS_FILE": "",
+        "PROMETHEUS_TEXTFILE": None,
+        "DIFF_CACHE_SIZE": core.get("DIFF_CACHE_SIZE", 10000) if diff_cache else 0,
+        "DIFF_CACHE_FILE": None,
+        "PIPELINE": pipeline,
+    })
+    config.ALL_CONFIG["LOGIN_URLS"] = {
+        "INITIAL_PAGE_URL": f"{base_url}/login",
+        "EMAIL_SUBMIT_URL": f"{base_url}/auth/getLoginTypeForEmail",
+        "LOGIN_ACTION_URL": f"{base_url}/auth/login/",
+    }
+    # Measure the scraper, not the client-side throttle
+    config.ALL_CONFIG["RATE_LIMIT"]["ENABLED"] = False
+
+
+def bench_end_to_end(records, workers, work_dir, table=False):
+    """Scrapes `records` records; in table mode they are listed from the stub's table view."""
+    from airtable_scraper import AirtableScraper
+    from batch_scraper import BatchScraper
+
+    scraper = AirtableScraper("bench@example.com", "bench")
+    start = time.perf_counter()
+    batch = BatchScraper(scraper, workers=workers, output_dir=os.path.join(work_dir, "records"), layout="sharded" if table else None, resume=table)
+    results = batch.run_table() if table else batch.run(bench_record_ids(records))
+    elapsed = time.perf_counter() - start
+    entries = sum(count or 0 for count in results.values())
+    failed = sum(1 for count in results.values() if count is None)
+    return {
+        "e2e.records": records,
+        "e2e.failed_records": failed,
+        "e2e.seconds": elapsed,
+        "e2e.records_per_second": records / elapsed,
+        "e2e.entries_per_second": entries / elapsed,
+    }
+
+
+def bench_record_ids(records):
+    return [f"rec{i:014d}" for i in range(records)]
+
+
+def bench_parse(pages, repeat):
+    """Best-of-`repeat` microseconds per diff, per backend and column type (no diff cache)."""
+    from airtable_parser import PARSER_BACKENDS, get_parser_class
+
+    by_type = defaultdict(list)
+    for column_type, html in iter_fixture_diffs(pages):
+        by_type[column_type].append(html)
+
+    results = {}
+    for backend in PARSER_BACKENDS:
+        parser_class = get_parser_class(backend)
+        if parser_class is not PARSER_BACKENDS[backend]:
+            continue  # Backend not installed
+        for column_type in COLUMN_TYPES:
+            htmls = by_type.get(column_type)
+            if not htmls:
+                continue
+            best = min(timeit.repeat(lambda: [parser_class(html).parse_diff() for html in htmls], number=1, repeat=repeat))
+            results[f"parse.{backend}.{column_type}.us_per_diff"] = best / len(htmls) * 1e6
+    return results
+
+
+def check_parity(pages):
+    """Counts diffs where an installed backend disagrees with the BeautifulSoup parser."""
+    from airtable_parser import PARSER_BACKENDS, AirtableHtmlParser, get_parser_class
+
+    results = {}
+    for backend in PARSER_BACKENDS:
+        parser_class = get_parser_class(backend)
+        if parser_class is AirtableHtmlParser or parser_class is not PARSER_BACKENDS[backend]:
+            continue
+        mismatches = 0
+        for column_type, html in iter_fixture_diffs(pages):
+            expected = AirtableHtmlParser(html).parse_diff()
+            actual = parser_class(html).parse_diff()
+            if actual != expected:
+                mismatches += 1
+                print(f"parity mismatch ({backend}, {column_type}): {actual} != {expected}", file=sys.stderr)
+        results[f"parity.{backend}.mismatches"] = mismatches
+    return results
+
+
+def bench_write(pages, copies, work_dir):
+    """Seconds to write the parsed fixture entries (times `copies`) in each output format."""
+    from utils import parse_revision_history
+    from writers import StreamingRevisionWriter
+    from columnar import write_columnar, write_parquet, pyarrow
+
+    entries = [entry for page in pages for entry in parse_revision_history(page)] * copies
+    out_dir = os.path.join(work_dir, "write")
+    os.makedirs(out_dir, exist_ok=True)
+
+    def save_json(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump([entry.to_dict() for entry in entries], f, indent=4, ensure_ascii=False)
+
+    def save_streaming(fmt):
+        def save(path):
+            writer = StreamingRevisionWriter(path, fmt)
+            writer.write_batch(entries)
+            writer.close()
+        return save
+
+    writers = {
+        "json": save_json,
+        "ndjson": save_streaming("ndjson"),
+        "json-compact": save_streaming("json-compact"),
+        "columnar": lambda path: write_columnar(entries, path),
+    }
+    if pyarrow is not None:
+        writers["parquet"] = lambda path: write_parquet(entries, path)
+
+    results = {"write.entries": len(entries)}
+    for fmt, save in writers.items():
+        start = time.perf_counter()
+        save(os.path.join(out_dir, f"out.{fmt}"))
+        results[f"write.{fmt}.seconds"] = time.perf_counter() - start
+    return results
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes elsewhere
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(baseline_file, results):
+    """Prints each metric next to the baseline and the relative change."""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\nvs {baseline_file} ({baseline.get('commit')}):")
+    print(f"{'metric':<46}{'baseline':>14}{'current':>14}{'change':>10}")
+    for name, value in results["results"].items():
+        before = baseline["results"].get(name)
+        if isinstance(value, (int, float)) and isinstance(before, (int, float)) and before:
+            print(f"{name:<46}{before:>14.3f}{value:>14.3f}{(value - before) / before:>+10.1%}")
+        else:
+            print(f"{name:<46}{str(before):>14}{str(value):>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", default=FIXTURE_FILE)
+    parser.add_argument("--records", type=int, default=50, help="Records scraped end to end (each replays all fixture pages).")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per parse timing; the best is kept.")
+    parser.add_argument("--write-copies", type=int, default=100, help="Fixture entries are repeated this many times for write timings.")
+    parser.add_argument("--diff-cache", action="store_true", help="Keep the diff parse cache on during the end-to-end run.")
+    parser.add_argument("--table", action="store_true", help="Run the end-to-end records in table mode (listed from the view).")
+    parser.add_argument("--pipeline", action="store_true", help="Scrape with the staged fetch/parse/write pipeline.")
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    pages = load_pages(args.fixtures)
+    server, base_url = start_stub_server(pages, bench_record_ids(args.records))
+    work_dir = tempfile.mkdtemp(prefix="airtable-bench-")
+    configure(base_url, work_dir, args.diff_cache, args.pipeline)
+
+    try:
+        results = {}
+        results.update(bench_end_to_end(args.records, args.workers, work_dir, args.table))
+        results["memory.peak_rss_mb_after_e2e"] = peak_rss_mb()
+        results.update(bench_parse(pages, args.repeat))
+        results.update(check_parity(pages))
+        results.update(bench_write(pages, args.write_copies, work_dir))
+        results["memory.peak_rss_mb"] = peak_rss_mb()
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "fixtures": os.path.relpath(args.fixtures, ROOT),
+        "results": {name: round(value, 6) if isinstance(value, float) else value for name, value in results.items()},
+    }
+    for name, value in report["results"].items():
+        print(f"{name:<46}{value}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+    if args.compare:
+        compare(args.compare, report)
+    if any(value for name, value in results.items() if name.startswith("parity.")):
+        sys.exit("Parser backends disagree on the fixtures.")
+
+
+if __name__ == "__main__":
+    main()
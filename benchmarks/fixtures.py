@@ -0,0 +1,193 @@
+"""
+Recorded readRowActivitiesAndComments pages replayed by the benchmark stub server.
+
+The fixture file is a JSON list of page payloads (the API's "data" object), in page
+order. Regenerate the synthetic fixture, or record one from a real record:
+    python benchmarks/fixtures.py synthesize [--pages 6 --page-size 20]
+    python benchmarks/fixtures.py record recXXXXXXXXXXXXXX   (needs AIRTABLE_* env vars)
+"""
+import os
+import sys
+import json
+import argparse
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIXTURE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "activity_pages.json")
+
+# Column types the benchmark reports parse cost for
+COLUMN_TYPES = ("text", "select", "multiSelect", "checkbox", "multipleAttachment", "rating", "foreignKey")
+# Further types diff_html can render; bench_parser times these too
+EXTENDED_COLUMN_TYPES = (
+    "url", "email", "barcode", "duration", "autoNumber", "formula",
+    "lookup", "collaborator", "multipleCollaborators"
+)
+
+
+def _cell(column_type, column_id, column_name, inner):
+    return (
+        f'<div class="historicalCellContainer"><div class="micro strong caps mb1" columnid="{column_id}">{column_name}</div>'
+        f'<div class="historicalCellValue" data-columntype="{column_type}">{inner}</div></div>'
+    )
+
+
+def _choice(text, removed=False, added=False):
+    style = ' style="text-decoration: line-through"' if removed else ''
+    plus = '<div><svg><use href="#Plus"></use></svg></div>' if added else ''
+    return f'<div class="choiceToken"{style} title="{text}"><div class="truncate-pre">{text}</div></div>{plus}'
+
+
+def _stars(count, total=5):
+    return "".join(
+        '<svg><path fill="currentColor"/></svg>' if star < count else '<svg class="invisible"><path fill="currentColor"/></svg>'
+        for star in range(total)
+    )
+
+
+def diff_html(column_type, i):
+    """A representative diffRowHtml for one change to a column of `column_type`."""
+    column_id = f"fld{(COLUMN_TYPES + EXTENDED_COLUMN_TYPES).index(column_type):014d}"
+    name = f"{column_type.title()} field"
+    if column_type == "text":
+        inner = (
+            f'<div class="flex"><span class="colors-background-negative strikethrough">Draft note {i} &amp; details</span> '
+            f'<span class="colors-background-success">Reviewed note {i} &amp; details</span></div>'
+        )
+    elif column_type == "select":
+        inner = _choice(f"Stage {i % 4}", removed=True) + _choice(f"Stage {(i + 1) % 4}", added=True)
+    elif column_type == "multiSelect":
+        inner = _choice(f"Tag {i % 7}", removed=True) + _choice(f"Tag {(i + 2) % 7}", added=True) + _choice(f"Tag {(i + 3) % 7}")
+    elif column_type == "checkbox":
+        inner = '<div class="redLight2"></div>' if i % 2 else '<div class="greenLight2"></div>'
+    elif column_type == "multipleAttachment":
+        inner = (
+            f'<div class="preview rounded border-red-light1" title="scan_{i}.pdf was removed"></div>'
+            f'<div class="preview rounded border-green-light1" title="scan_{i}_v2.pdf was added"></div>'
+            f'<div class="preview rounded" title="cover_{i % 3}.png"></div>'
+        )
+    elif column_type == "rating":
+        inner = (
+            f'<div class="ratingContainer colors-background-negative">{_stars(i % 5)}</div>'
+            f'<div class="ratingContainer colors-background-success">{_stars(i % 5 + 1)}</div>'
+        )
+    elif column_type in ("url", "email", "barcode"):
+        value = {"url": "https://example.com/item/{}", "email": "person{}@example.com", "barcode": "4006381{:06d}"}[column_type]
+        inner = (
+            f'<div class="strikethrough"><div class="flex-auto">{value.format(i)}</div></div>'
+            f'<div><div class="flex-auto">{value.format(i + 1)}</div></div>'
+        )
+    elif column_type in ("duration", "autoNumber", "formula"):
+        old, new = (f"{i}:30", f"{i + 1}:45") if column_type == "duration" else (str(i * 7), str(i * 7 + 3))
+        inner = (
+            f'<span class="colors-foreground-accent-negative">{old}</span>'
+            f'<span class="colors-background-success">{new}</span>'
+        )
+    elif column_type in ("collaborator", "multipleCollaborators"):
+        inner = (
+            f'<div class="collaboratorToken" style="text-decoration: line-through" title="User {i % 5}"></div>'
+            f'<div class="collaboratorToken" title="User {(i + 1) % 5}"><span class="truncate">User {(i + 1) % 5}</span></div>'
+        )
+    elif column_type == "lookup":
+        inner = (
+            f'<div class="choiceToken removed" title="Region {i % 3}"></div>'
+            f'<div class="choiceToken" title="Region {(i + 1) % 3}"></div>'
+        )
+    else:  # foreignKey
+        inner = (
+            f'<div class="foreignRecord removed" title="Company {i % 11}">Company {i % 11}</div>'
+            f'<div class="foreignRecord added" title="Company {(i + 1) % 11}">Company {(i + 1) % 11}</div>'
+        )
+    return _cell(column_type, column_id, name, inner)
+
+
+def synthesize_pages(pages=6, page_size=20):
+    """Builds pages cycling through COLUMN_TYPES, with a comment every tenth entry."""
+    users = {
+        f"usr{u:014d}": {"id": f"usr{u:014d}", "email": f"user{u}@example.com", "name": f"User {u}"}
+        for u in range(5)
+    }
+    user_ids = list(users)
+    newest = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    result = []
+    for page_index in range(pages):
+        activities, comments, ordered = {}, {}, []
+        for position in range(page_size):
+            i = page_index * page_size + position
+            created = (newest - timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+            user_id = user_ids[i % len(user_ids)]
+            if i % 10 == 9:
+                entry_id = f"com{i:014d}"
+                comments[entry_id] = {"id": entry_id, "createdTime": created, "userId": user_id, "text": f"Comment {i}"}
+            else:
+                entry_id = f"act{i:014d}"
+                activities[entry_id] = {
+                    "diffRowHtml": diff_html(COLUMN_TYPES[i % len(COLUMN_TYPES)], i),
+                    "createdTime": created,
+                    "originatingUserId": user_id,
+                    "groupType": "cellValue",
+                }
+            ordered.append(entry_id)
+        result.append({
+            "rowActivityOrCommentUserObjById": users,
+            "rowActivityInfoById": activities,
+            "commentsById": comments,
+            "orderedActivityAndCommentIds": ordered,
+            "offsetV2": str(page_index + 1) if page_index + 1 < pages else None,
+        })
+    return result
+
+
+def record_pages(record_id):
+    """Records a real record's pages through AirtableScraper (credentials from the environment)."""
+    from airtable_scraper import AirtableScraper
+    scraper = AirtableScraper(os.getenv("AIRTABLE_EMAIL"), os.getenv("AIRTABLE_PASSWORD"))
+    if not scraper.ensure_session():
+        raise SystemExit("Login failed.")
+    pages, offset_v2 = [], None
+    while True:
+        page = scraper.fetch_activity_page(offset_v2, record_id)
+        if page is None:
+            raise SystemExit(f"Fetching {record_id} failed after {len(pages)} pages.")
+        pages.append(page)
+        offset_v2 = page.get("offsetV2")
+        if not offset_v2:
+            return pages
+
+
+def load_pages(path=FIXTURE_FILE):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def iter_fixture_diffs(pages):
+    """Yields (columnType, diffRowHtml) for every activity in the fixture pages."""
+    for page in pages:
+        for activity in page.get("rowActivityInfoById", {}).values():
+            html = activity.get("diffRowHtml", "")
+            marker = 'data-columntype="'
+            start = html.find(marker)
+            column_type = html[start + len(marker):html.find('"', start + len(marker))] if start >= 0 else None
+            yield column_type, html
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    synthesize = commands.add_parser("synthesize")
+    synthesize.add_argument("--pages", type=int, default=6)
+    synthesize.add_argument("--page-size", type=int, default=20)
+    record = commands.add_parser("record")
+    record.add_argument("record_id")
+    parser.add_argument("--output", default=FIXTURE_FILE)
+    args = parser.parse_args()
+
+    pages = synthesize_pages(args.pages, args.page_size) if args.command == "synthesize" else record_pages(args.record_id)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(pages, f, indent=1, ensure_ascii=False)
+    print(f"Wrote {len(pages)} pages to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
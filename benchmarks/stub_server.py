@@ -0,0 +1,66 @@
+"""
+Local stand-in for airtable.com that replays fixture pages, so benchmarks measure
+the scraper rather than the network. Every record ID gets the same recorded pages.
+"""
+import json
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+LOGIN_PAGE = '<html><script>window.initData = {"csrfToken":"bench-csrf"}</script></html>'
+HOME_PAGE = '<html><script>window.resolveLiveappDataPromise({"secretSocketId":"bench-socket"});</script></html>'
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    pages = []
+    # Record IDs listed by the table view endpoint (readData)
+    view_record_ids = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, content_type="text/html"):
+        payload = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.hits[url.path] += 1
+        if url.path == "/login":
+            return self._send(LOGIN_PAGE)
+        if url.path == "/":
+            return self._send(HOME_PAGE)
+        if url.path.endswith("/readData"):
+            view_id = json.loads(parse_qs(url.query)["stringifiedObjectParams"][0])["includeDataForViewIds"][0]
+            row_order = [{"rowId": record_id, "visibility": True} for record_id in self.view_record_ids]
+            data = {"viewDatas": [{"id": view_id, "rowOrder": row_order}]}
+            return self._send(json.dumps({"msg": "SUCCESS", "data": data}), "application/json")
+        if url.path.endswith("readRowActivitiesAndComments"):
+            params = json.loads(parse_qs(url.query)["stringifiedObjectParams"][0])
+            index = int(params.get("offsetV2") or 0)
+            page = dict(self.pages[index])
+            # Recorded offsets are opaque; replay pages by position instead
+            page["offsetV2"] = str(index + 1) if index + 1 < len(self.pages) else None
+            return self._send(json.dumps({"msg": "SUCCESS", "data": page}), "application/json")
+        self.send_response(404)
+        self.end_headers()
+
+    def do_POST(self):
+        self.server.hits[urlparse(self.path).path] += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._send(LOGIN_PAGE)
+
+
+def start_stub_server(pages, view_record_ids=()):
+    """Starts the replay server on a free local port. Returns (server, base_url); stop it with server.shutdown()."""
+    handler = type("FixtureReplayHandler", (ReplayHandler,), {"pages": pages, "view_record_ids": list(view_record_ids)})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    # Requests served per path, e.g. server.hits["/login"]
+    server.hits = Counter()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
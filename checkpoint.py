@@ -0,0 +1,90 @@
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from data_models import RevisionEntry
+
+logger = logging.getLogger(__name__)
+
+
+class PaginationJournal:
+    """
+    Append-only journal of fetched pages for one record, kept next to its output file.
+    Each line holds one parsed batch and the offsetV2 that follows it, so a restarted
+    run can rebuild what it had and continue from the last committed page. Every line
+    carries the time the journal was started; one older than `max_age` seconds is not
+    resumed, as its offsets and entries are likely stale.
+    """
+
+    def __init__(self, path, record_id, fields=None, max_age=None):
+        self.path = Path(path)
+        self.record_id = record_id
+        # Output field projection; a journal written under another projection is not resumed
+        self.fields = sorted(fields) if fields is not None else None
+        self.max_age = max_age
+        self.started_at = None
+
+    def resume(self):
+        """
+        Replays the journal. Returns (entries, next offsetV2, finished); finished is True
+        when the last committed page had no further offset.
+        """
+        if not self.path.exists():
+            return [], None, False
+
+        entries = []
+        offset_v2 = None
+        pages = 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    page = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write; everything before it is committed
+                    logger.warning(f"Ignoring incomplete journal line in {self.path}.")
+                    break
+                if page.get("record_id") != self.record_id:
+                    logger.warning(f"Journal {self.path} belongs to another record; discarding it.")
+                    self.discard()
+                    return [], None, False
+                if page.get("fields") != self.fields:
+                    logger.warning(f"Journal {self.path} was written with other output fields; discarding it.")
+                    self.discard()
+                    return [], None, False
+                started_at = page.get("started_at")
+                if started_at is None or (self.max_age and time.time() - started_at > self.max_age):
+                    logger.warning(f"Journal {self.path} was started over {self.max_age}s ago; discarding it.")
+                    self.discard()
+                    return [], None, False
+                self.started_at = started_at
+                entries.extend(RevisionEntry.from_dict(item) for item in page.get("entries", []))
+                offset_v2 = page.get("offsetV2")
+                pages += 1
+
+        if not pages:
+            return [], None, False
+        logger.info(f"Resuming {self.record_id} from journal: {pages} pages, {len(entries)} entries already fetched.")
+        return entries, offset_v2, offset_v2 is None
+
+    def append(self, entries, offset_v2):
+        """Durably commits one parsed batch and the offset of the page after it."""
+        if self.started_at is None:
+            self.started_at = time.time()
+        line = json.dumps({
+            "record_id": self.record_id,
+            "started_at": self.started_at,
+            "offsetV2": offset_v2,
+            "fields": self.fields,
+            "entries": [entry.to_dict(self.fields) for entry in entries]
+        }, ensure_ascii=False)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def discard(self):
+        """Removes the journal once its contents have been saved to the output file."""
+        self.started_at = None
+        if self.path.exists():
+            os.remove(self.path)
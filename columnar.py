@@ -0,0 +1,171 @@
+import os
+import json
+import shutil
+import logging
+from pathlib import Path
+from data_models import RevisionEntry, RevisionBatch
+from atomic_file import atomic_write
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pyarrow is optional; only the "parquet" format needs it
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+FORMAT_NAME = "airtable-revision-columns"
+FORMAT_VERSION = 1
+
+# Output columns in order; user fields are flattened so each can be read on its own
+COLUMNS = (
+    "id", "type", "timestamp", "user_id", "user_email", "user_name", "comment",
+    "columnId", "columnName", "columnType", "oldValue", "newValue"
+)
+# Low-cardinality columns stored as a dictionary of distinct values plus one code per row
+DICTIONARY_COLUMNS = ("type", "user_id", "user_email", "user_name", "columnId", "columnName", "columnType")
+
+USER_FIELDS = {"user_id": "id", "user_email": "email", "user_name": "name"}
+
+
+def _column_values(batch, column):
+    """Returns one column of a RevisionBatch as a list."""
+    if column in USER_FIELDS:
+        key = USER_FIELDS[column]
+        return [batch.users[position].get(key) for position in batch.user_index]
+    return batch.columns[column]
+
+
+def _entries_from_rows(rows):
+    for row in rows:
+        yield RevisionEntry({
+            "id": row.get("id"),
+            "type": row.get("type"),
+            "createdTime": row.get("timestamp"),
+            "user": {"id": row.get("user_id"), "email": row.get("user_email"), "name": row.get("user_name")},
+            "comment": row.get("comment"),
+            "columnId": row.get("columnId"),
+            "columnName": row.get("columnName"),
+            "columnType": row.get("columnType"),
+            "oldValue": row.get("oldValue"),
+            "newValue": row.get("newValue"),
+        })
+
+
+# --- Built-in column directory ---
+def write_columnar(entries, path):
+    """
+    Writes entries as a directory with one file per column plus a manifest.json.
+    Plain columns hold one JSON value per line; dictionary columns hold a JSON list of
+    distinct values (<column>.dict.json) and one integer code per line (<column>.codes).
+    """
+    batch = entries if isinstance(entries, RevisionBatch) else RevisionBatch(entries)
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+
+    manifest = {"format": FORMAT_NAME, "version": FORMAT_VERSION, "rows": len(batch), "columns": {}}
+    for column in COLUMNS:
+        values = _column_values(batch, column)
+        if column in DICTIONARY_COLUMNS:
+            codes = {}
+            with open(tmp_path / f"{column}.codes", 'w', encoding='utf-8') as f:
+                for value in values:
+                    f.write(f"{codes.setdefault(value, len(codes))}\n")
+            with open(tmp_path / f"{column}.dict.json", 'w', encoding='utf-8') as f:
+                json.dump(list(codes), f, ensure_ascii=False)
+            manifest["columns"][column] = {"encoding": "dictionary", "distinct": len(codes)}
+        else:
+            with open(tmp_path / f"{column}.jsonl", 'w', encoding='utf-8') as f:
+                for value in values:
+                    f.write(json.dumps(value, ensure_ascii=False) + "\n")
+            manifest["columns"][column] = {"encoding": "plain"}
+
+    with open(tmp_path / "manifest.json", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=4)
+
+    if path.exists():
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    logger.info(f"Revision history saved as columns to {path} ({len(batch)} rows).")
+
+
+class ColumnarReader:
+    """
+    Reads a directory written by write_columnar one column at a time, e.g.:
+        ColumnarReader(path).select("newValue", columnId="fldXXXX")
+    only touches the columnId and newValue files.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "manifest.json", 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != FORMAT_NAME:
+            raise ValueError(f"{path} is not a revision history column directory")
+        self.rows = self.manifest["rows"]
+
+    def dictionary(self, column):
+        with open(self.path / f"{column}.dict.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def column(self, column):
+        """Yields the values of one column in row order."""
+        if self.manifest["columns"][column]["encoding"] == "dictionary":
+            values = self.dictionary(column)
+            with open(self.path / f"{column}.codes", 'r', encoding='utf-8') as f:
+                for line in f:
+                    yield values[int(line)]
+        else:
+            with open(self.path / f"{column}.jsonl", 'r', encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def matching_rows(self, **filters):
+        """Returns the row indexes where every dictionary column equals the given value."""
+        rows = None
+        for column, wanted in filters.items():
+            if self.manifest["columns"][column]["encoding"] != "dictionary":
+                matches = {index for index, value in enumerate(self.column(column)) if value == wanted}
+            else:
+                dictionary = self.dictionary(column)
+                if wanted not in dictionary:
+                    return set()
+                wanted_code = str(dictionary.index(wanted))
+                with open(self.path / f"{column}.codes", 'r', encoding='utf-8') as f:
+                    matches = {index for index, line in enumerate(f) if line.rstrip("\n") == wanted_code}
+            rows = matches if rows is None else rows & matches
+        return rows if rows is not None else set(range(self.rows))
+
+    def select(self, column, **filters):
+        """Returns the values of `column` for rows matching `filters`, reading only those columns."""
+        rows = self.matching_rows(**filters)
+        return [value for index, value in enumerate(self.column(column)) if index in rows]
+
+    def read_entries(self):
+        """Rebuilds RevisionEntry objects (used when merging in incremental mode)."""
+        columns = {column: self.column(column) for column in COLUMNS}
+        rows = ({column: next(values) for column, values in columns.items()} for _ in range(self.rows))
+        return list(_entries_from_rows(rows))
+
+
+# --- Parquet (optional, via pyarrow) ---
+def write_parquet(entries, path):
+    """Writes entries to a Parquet file with dictionary-encoded low-cardinality columns."""
+    if pyarrow is None:
+        raise RuntimeError("The parquet output format requires pyarrow to be installed.")
+    batch = entries if isinstance(entries, RevisionBatch) else RevisionBatch(entries)
+    # Explicit string schema so all-null columns (e.g. no comments) keep a usable type
+    schema = pyarrow.schema([(column, pyarrow.string()) for column in COLUMNS])
+    table = pyarrow.table({column: _column_values(batch, column) for column in COLUMNS}, schema=schema)
+    with atomic_write(path, 'wb') as f:
+        pyarrow.parquet.write_table(table, f, use_dictionary=list(DICTIONARY_COLUMNS))
+    logger.info(f"Revision history saved as Parquet to {path} ({len(batch)} rows).")
+
+
+def read_parquet_entries(path):
+    if pyarrow is None:
+        raise RuntimeError("The parquet output format requires pyarrow to be installed.")
+    return list(_entries_from_rows(pyarrow.parquet.read_table(path).to_pylist()))
@@ -20,13 +20,128 @@ CONFIG = {
     },
     
     "RECORD_ID": os.getenv("AIRTABLE_RECORD_ID"),
+    # Comma/whitespace separated list for multi-record mode
+    "RECORD_IDS": os.getenv("AIRTABLE_RECORD_IDS"),
     "APPLICATION_ID": os.getenv("AIRTABLE_APP_ID"),
     "TABLE_VIEW_URL": os.getenv("AIRTABLE_TABLE_VIEW_URL"),
 
     "ACTIVITY_ENDPOINT_TEMPLATE": "v0.3/row/{}/readRowActivitiesAndComments",
+    # Table mode lists the records of TABLE_VIEW_URL's view from this endpoint
+    "VIEW_DATA_ENDPOINT_TEMPLATE": "v0.3/table/{}/readData",
 
-    "COOKIES_FILE": "cookies.pkl",
-    "OUTPUT_FILE": "revision_history_full.json"
+    # --- Activity pagination ---
+    # Items requested per readRowActivitiesAndComments page
+    "PAGE_SIZE": int(os.getenv("AIRTABLE_PAGE_SIZE", "10")),
+    # Adaptive mode starts at MAX_PAGE_SIZE and backs off towards MIN_PAGE_SIZE
+    "ADAPTIVE_PAGE_SIZE": os.getenv("AIRTABLE_ADAPTIVE_PAGE_SIZE", "false").lower() == "true",
+    "MIN_PAGE_SIZE": 10,
+    "MAX_PAGE_SIZE": int(os.getenv("AIRTABLE_MAX_PAGE_SIZE", "100")),
+    # Statuses whose error body is checked for a refused page size; only such a body (with one
+    # of these or a non-SUCCESS message) makes adaptive mode halve it, not network errors or 5xx
+    "PAGE_SIZE_REJECTION_STATUSES": [400, 413, 422],
+
+    # --- Diff parsing ---
+    # "auto" uses lxml when installed, otherwise BeautifulSoup ("bs4")
+    "PARSER_BACKEND": os.getenv("AIRTABLE_PARSER_BACKEND", "auto"),
+    # Processes used to parse diffRowHtml in parallel (0 parses inline on the main thread)
+    "PARSE_WORKERS": int(os.getenv("AIRTABLE_PARSE_WORKERS", "0")),
+    # diffRowHtml strings sent to a worker process per task
+    "PARSE_CHUNK_SIZE": 64,
+    # Keep diffRowHtml on each entry and parse it only when a diff field is first read
+    "LAZY_DIFFS": os.getenv("AIRTABLE_LAZY_DIFFS", "false").lower() == "true",
+    # Comma-separated fields written to the output (e.g. "id,timestamp,user,comment");
+    # unset writes all. Without any diff field, diffRowHtml is never parsed.
+    "OUTPUT_FIELDS": os.getenv("AIRTABLE_OUTPUT_FIELDS"),
+    # Fetch, parse and write pages as overlapping stages (false keeps the sequential loop)
+    "PIPELINE": os.getenv("AIRTABLE_PIPELINE", "false").lower() == "true",
+    # Pages buffered between two stages before the upstream stage blocks
+    "PIPELINE_QUEUE_SIZE": int(os.getenv("AIRTABLE_PIPELINE_QUEUE_SIZE", "4")),
+    # LRU cache of parsed diffs keyed by HTML hash (0 disables it)
+    "DIFF_CACHE_SIZE": int(os.getenv("AIRTABLE_DIFF_CACHE_SIZE", "10000")),
+    # Optional SQLite file so cached diffs survive between runs
+    "DIFF_CACHE_FILE": os.getenv("AIRTABLE_DIFF_CACHE_FILE"),
+
+    # --- Session store ---
+    # JSON file with the session cookies (and their expiry), socket ID and CSRF token
+    "SESSION_FILE": os.getenv("AIRTABLE_SESSION_FILE", "session.json"),
+    # Log in again this many seconds before the session cookies expire
+    "SESSION_REFRESH_MARGIN": int(os.getenv("AIRTABLE_SESSION_REFRESH_MARGIN", "600")),
+    # Assumed session lifetime (seconds) when its cookies carry no expiry
+    "SESSION_MAX_AGE": 12 * 3600,
+    # Cookies whose expiry bounds the session; analytics and other cookies are ignored
+    "SESSION_COOKIE_NAMES": ["__Host-airtable-session", "__Host-airtable-session.sig"],
+    # Refetch the socket ID from the home page once it is this old (seconds, 0 never)
+    "SOCKET_MAX_AGE": int(os.getenv("AIRTABLE_SOCKET_MAX_AGE", "3600")),
+
+    "OUTPUT_FILE": "revision_history_full.json",
+    # "json" (pretty, built in memory), streamed "ndjson" / "json-compact",
+    # or columnar "columnar" (one file per field) / "parquet" (needs pyarrow)
+    "OUTPUT_FORMAT": os.getenv("AIRTABLE_OUTPUT_FORMAT", "json"),
+
+    # --- Incremental mode ---
+    # Stores the newest saved entry per record so runs only fetch what changed
+    "INCREMENTAL": os.getenv("AIRTABLE_INCREMENTAL", "false").lower() == "true",
+    "STATE_FILE": "scrape_state.json",
+
+    # --- Checkpoints ---
+    # Append-only <output file>.journal of fetched pages, removed after a complete save
+    "CHECKPOINTS": os.getenv("AIRTABLE_CHECKPOINTS", "true").lower() == "true",
+
+    # --- SQLite sink ---
+    # Optional database that every fetched batch is upserted into, keyed by record and entry id
+    "SQLITE_DB": os.getenv("AIRTABLE_SQLITE_DB"),
+
+    # --- Run metrics ---
+    # Per-phase latency/byte summary written at the end of a run (empty string disables the file)
+    "METRICS_FILE": os.getenv("AIRTABLE_METRICS_FILE", "run_metrics.json"),
+    # Optional Prometheus textfile (e.g. for node_exporter's textfile collector)
+    "PROMETHEUS_TEXTFILE": os.getenv("AIRTABLE_PROMETHEUS_TEXTFILE"),
+
+    # --- Multi-record mode ---
+    "OUTPUT_DIR": os.getenv("AIRTABLE_OUTPUT_DIR", "revision_history"),
+    "WORKERS": int(os.getenv("AIRTABLE_WORKERS", "4")),
+    # "flat" puts every per-record file in OUTPUT_DIR, "sharded" spreads them over 256
+    # hash-keyed subdirectories (unset: sharded in table mode, flat otherwise)
+    "OUTPUT_LAYOUT": os.getenv("AIRTABLE_OUTPUT_LAYOUT"),
+    # Seconds between progress lines (and table mode's _progress.json updates)
+    "PROGRESS_INTERVAL": int(os.getenv("AIRTABLE_PROGRESS_INTERVAL", "30")),
+    # A table-mode pass or page journal interrupted longer ago than this (seconds) is not resumed but restarted
+    "RESUME_MAX_AGE": int(os.getenv("AIRTABLE_RESUME_MAX_AGE", str(12 * 3600))),
+    "MAX_CONCURRENT_REQUESTS": int(os.getenv("AIRTABLE_MAX_CONCURRENT_REQUESTS", "8"))
+}
+
+# --- Client-side rate limiting ---
+# Token buckets shared by every request to airtable.com: one global budget plus one per
+# endpoint. 429/Retry-After responses pause the buckets and halve their rate, which then
+# recovers gradually on success.
+RATE_LIMIT_CONFIG = {
+    "ENABLED": os.getenv("AIRTABLE_RATE_LIMIT", "true").lower() == "true",
+    "REQUESTS_PER_SECOND": float(os.getenv("AIRTABLE_RATE_LIMIT_RPS", "5")),
+    "BURST": int(os.getenv("AIRTABLE_RATE_LIMIT_BURST", "10")),
+    # Floor when adapting to throttling, and the pause used when a 429 has no Retry-After
+    "MIN_REQUESTS_PER_SECOND": 0.2,
+    "DEFAULT_RETRY_AFTER": 5.0,
+    "ENDPOINTS": {
+        "login": {"REQUESTS_PER_SECOND": 0.5, "BURST": 3},
+        "page": {"REQUESTS_PER_SECOND": 1.0, "BURST": 5},
+        "activity": {"REQUESTS_PER_SECOND": float(os.getenv("AIRTABLE_ACTIVITY_RPS", "5")), "BURST": 10}
+    }
+}
+
+# --- Retry policies ---
+# Per endpoint class, matched by the rate limiter's endpoint names ("default" covers the rest).
+# Delays use decorrelated jitter between BASE_DELAY and MAX_DELAY, never below Retry-After,
+# and a request gives up after MAX_RETRIES or TOTAL_BUDGET seconds.
+RETRY_CONFIG = {
+    "default": {"MAX_RETRIES": 5, "BASE_DELAY": 1.0, "MAX_DELAY": 30.0, "TOTAL_BUDGET": 120.0},
+    # Login is cheap to retry a little but should fail fast rather than hammer the auth endpoints
+    "login": {"MAX_RETRIES": 3, "BASE_DELAY": 2.0, "MAX_DELAY": 20.0, "TOTAL_BUDGET": 60.0},
+    "activity": {
+        "MAX_RETRIES": int(os.getenv("AIRTABLE_ACTIVITY_MAX_RETRIES", "6")),
+        "BASE_DELAY": 0.5,
+        "MAX_DELAY": 30.0,
+        "TOTAL_BUDGET": float(os.getenv("AIRTABLE_ACTIVITY_RETRY_BUDGET", "180"))
+    }
 }
 
 def build_login_url(key):
@@ -79,5 +194,7 @@ ALL_CONFIG = {
         "LOGIN_ACTION_URL": build_login_url("LOGIN_ACTION")
     },
     "HEADERS": DEFAULT_HEADERS,
-    "REV_HEADERS": REVISION_HISTORY_HEADERS
+    "REV_HEADERS": REVISION_HISTORY_HEADERS,
+    "RATE_LIMIT": RATE_LIMIT_CONFIG,
+    "RETRY": RETRY_CONFIG
 }
@@ -1,47 +1,182 @@
+import sys
+from airtable_parser import PARSE_COVERAGE
+from parse_cache import parse_diff_cached
+
+# Fields produced by parsing an activity's diffRowHtml
+DIFF_FIELDS = ("columnId", "columnName", "columnType", "oldValue", "newValue")
+# Output fields, in to_dict() order
+ENTRY_FIELDS = ("id", "type", "user", "timestamp", "comment") + DIFF_FIELDS
+# Always kept by a projection: streaming merges, incremental marks and dedup rely on them
+KEY_FIELDS = ("id", "timestamp")
+
+# Shared user dicts, keyed by (id, email, name). The same few users repeat across
+# thousands of entries, so every entry by a user points at one dict.
+_USER_CACHE = {}
+
+
+def intern_user(user):
+    """Returns the shared {"id", "email", "name"} dict for this user."""
+    key = (user.get("id"), user.get("email"), user.get("name"))
+    cached = _USER_CACHE.get(key)
+    if cached is None:
+        cached = _USER_CACHE.setdefault(key, {"id": key[0], "email": key[1], "name": key[2]})
+    return cached
+
+
+def _intern_str(value):
+    """Interns short repeated strings (types, column ids/names) so entries share them."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def parse_field_list(text):
+    """
+    Parses a comma-separated output field list (e.g. "id,timestamp,user") into a frozenset.
+    Returns None (all fields) for an empty value; raises ValueError on unknown fields.
+    """
+    if not text:
+        return None
+    fields = frozenset(field.strip() for field in text.split(",") if field.strip())
+    unknown = fields - set(ENTRY_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown output fields: {', '.join(sorted(unknown))} (choose from {', '.join(ENTRY_FIELDS)})")
+    return fields | frozenset(KEY_FIELDS)
+
+
+def needs_diff_fields(fields):
+    """True if a projection (None meaning all fields) includes any field parsed from diffRowHtml."""
+    return fields is None or any(field in fields for field in DIFF_FIELDS)
+
+
+def _diff_field(name):
+    """Property for a diff field: parses the deferred diffRowHtml on first access."""
+    slot = f"_{name}"
+
+    def get(self):
+        if self._diff_html is not None:
+            self._parse_diff()
+        return getattr(self, slot)
+
+    def set(self, value):
+        setattr(self, slot, value)
+
+    return property(get, set)
+
+
 class RevisionEntry:
     """
     Data model class to represent a single parsed entry (Activity or Comment)
     from the Airtable revision history.
+
+    An activity built with "diffRowHtml" instead of parsed column fields is lazy: the
+    HTML is parsed the first time any of DIFF_FIELDS is read, and the result kept.
     """
+    __slots__ = (
+        "id", "type", "timestamp", "user", "comment",
+        "_columnId", "_columnName", "_columnType", "_oldValue", "_newValue", "_diff_html"
+    )
+    FIELDS = ("id", "type", "timestamp", "user", "comment") + DIFF_FIELDS
+
+    columnId = _diff_field("columnId")
+    columnName = _diff_field("columnName")
+    columnType = _diff_field("columnType")
+    oldValue = _diff_field("oldValue")
+    newValue = _diff_field("newValue")
+
     def __init__(self, data):
         # Mandatory fields for all entries
         self.id = data.get("id")
-        self.type = data.get("type")
+        self.type = _intern_str(data.get("type"))
         self.timestamp = data.get("createdTime")
-        user = data.get("user", {})
-        self.user = {
-            "id": user.get("id"),
-            "email": user.get("email"),
-            "name": user.get("name")
-        }
+        self.user = intern_user(data.get("user") or {})
 
         # Comment-specific field
         self.comment = data.get("comment")
 
         # Activity-specific fields
-        self.columnId = data.get("columnId")
-        self.columnName = data.get("columnName")
-        self.columnType = data.get("columnType")
-        self.oldValue = data.get("oldValue")
-        self.newValue = data.get("newValue")
-
-    def to_dict(self):
-        """Returns a clean dictionary representation for JSON serialization."""
-        data = {
-        "id": self.id,
-        "type": self.type,
-        "user": self.user,
-        "timestamp": self.timestamp,
-        }
+        self._set_diff(data)
+        self._diff_html = data.get("diffRowHtml")
+
+    def _set_diff(self, details):
+        self._columnId = _intern_str(details.get("columnId"))
+        self._columnName = _intern_str(details.get("columnName"))
+        self._columnType = _intern_str(details.get("columnType"))
+        self._oldValue = details.get("oldValue")
+        self._newValue = details.get("newValue")
+
+    def _parse_diff(self):
+        """Parses the deferred diffRowHtml into the column fields."""
+        details = parse_diff_cached(self._diff_html)
+        PARSE_COVERAGE.record(details)
+        self._set_diff(details)
+        self._diff_html = None
+
+    @property
+    def is_parsed(self):
+        """False while the entry still holds unparsed diffRowHtml."""
+        return self._diff_html is None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuilds an entry from its to_dict() output, e.g. when merging with a saved file."""
+        return cls({**data, "createdTime": data.get("timestamp")})
+
+    def to_dict(self, fields=None):
+        """
+        Returns a clean dictionary representation for JSON serialization. With `fields`,
+        only those keys (plus KEY_FIELDS) are included, so a lazy entry whose projection
+        leaves out DIFF_FIELDS is never parsed.
+        """
         # Conditionally add fields based on type for a cleaner output
-        if self.type == "comment":
-            data["comment"] = self.comment
-        else: # Activity
-            data.update({
-                "columnId": self.columnId,
-                "columnName": self.columnName,
-                "columnType": self.columnType,
-                "oldValue": self.oldValue,
-                "newValue": self.newValue,
-        })
-        return data
\ No newline at end of file
+        keys = ("id", "type", "user", "timestamp") + (("comment",) if self.type == "comment" else DIFF_FIELDS)
+        if fields is not None:
+            keys = [key for key in keys if key in fields or key in KEY_FIELDS]
+        return {key: getattr(self, key) for key in keys}
+
+
+class RevisionBatch:
+    """
+    Columnar storage for many entries: one list per field, with users stored once
+    and referenced by index. Iterating yields RevisionEntry objects on demand.
+    """
+    FIELDS = RevisionEntry.FIELDS
+
+    def __init__(self, entries=()):
+        self.columns = {field: [] for field in self.FIELDS if field != "user"}
+        self.user_index = []
+        self.users = []
+        self._user_positions = {}
+        for entry in entries:
+            self.append(entry)
+
+    def append(self, entry):
+        for field, column in self.columns.items():
+            column.append(getattr(entry, field))
+        key = (entry.user.get("id"), entry.user.get("email"), entry.user.get("name"))
+        position = self._user_positions.get(key)
+        if position is None:
+            position = self._user_positions[key] = len(self.users)
+            self.users.append(entry.user)
+        self.user_index.append(position)
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def __len__(self):
+        return len(self.user_index)
+
+    def entry(self, index):
+        """Materializes the entry at `index`."""
+        entry = RevisionEntry.__new__(RevisionEntry)
+        entry._diff_html = None
+        for field, column in self.columns.items():
+            setattr(entry, field, column[index])
+        entry.user = self.users[self.user_index[index]]
+        return entry
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.entry(index)
+
+    def to_dicts(self):
+        return [entry.to_dict() for entry in self]
@@ -0,0 +1,137 @@
+import json
+import math
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+from atomic_file import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Phases recorded by AirtableScraper, in pipeline order
+PHASES = ("login", "socket_fetch", "view_list", "page_fetch", "http_request", "json_decode", "parse", "save")
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+class PhaseTiming:
+    """Handed out by RunMetrics.phase(); set `bytes` inside the block to count bytes moved."""
+    __slots__ = ("bytes",)
+
+    def __init__(self):
+        self.bytes = 0
+
+
+class RunMetrics:
+    """
+    Thread-safe per-phase latency samples and byte totals for one run, plus free-form
+    counters (retries, rate-limit waits, ...). summary() reduces them to counts and
+    p50/p95/p99 latencies; the summary can be written as JSON or a Prometheus textfile.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.samples = defaultdict(list)
+        self.bytes = defaultdict(int)
+        self.counters = defaultdict(float)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Times the block as one sample of `name` (recorded even if the block raises)."""
+        timing = PhaseTiming()
+        start = time.perf_counter()
+        try:
+            yield timing
+        finally:
+            self.record(name, time.perf_counter() - start, timing.bytes)
+
+    def record(self, name, seconds, nbytes=0):
+        with self._lock:
+            self.samples[name].append(seconds)
+            self.bytes[name] += nbytes
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def summary(self, counters=None):
+        """Returns the run summary as a JSON-serializable dict. `counters` adds run-level values."""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self.samples.items()}
+            byte_totals = dict(self.bytes)
+            all_counters = dict(self.counters)
+        all_counters.update(counters or {})
+
+        phases = {}
+        ordered = [name for name in PHASES if name in samples] + sorted(set(samples) - set(PHASES))
+        for name in ordered:
+            values = samples[name]
+            phases[name] = {
+                "count": len(values),
+                "total_seconds": round(sum(values), 6),
+                **{f"p{int(q * 100)}_seconds": round(percentile(values, q), 6) for q in QUANTILES},
+                "max_seconds": round(values[-1], 6),
+                "bytes": byte_totals.get(name, 0),
+            }
+        return {
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started_at)),
+            "duration_seconds": round(time.perf_counter() - self._started, 3),
+            "phases": phases,
+            "counters": {
+                name: int(value) if float(value).is_integer() else round(value, 6)
+                for name, value in sorted(all_counters.items())
+            },
+        }
+
+
+def _write_atomic(path, text):
+    with atomic_write(path) as f:
+        f.write(text)
+
+
+def write_summary_json(summary, path):
+    try:
+        _write_atomic(path, json.dumps(summary, indent=4))
+        logger.info(f"Run metrics saved to {path}")
+    except Exception as e:
+        logger.error(f"Error saving run metrics to {path}: {e}")
+
+
+def write_prometheus_textfile(summary, path, prefix="airtable_scraper"):
+    """Writes the summary in the Prometheus text format, for node_exporter's textfile collector."""
+    lines = [
+        f"# HELP {prefix}_phase_seconds Latency of each scrape phase.",
+        f"# TYPE {prefix}_phase_seconds summary",
+    ]
+    for name, stats in summary["phases"].items():
+        for q in QUANTILES:
+            lines.append(f'{prefix}_phase_seconds{{phase="{name}",quantile="{q}"}} {stats[f"p{int(q * 100)}_seconds"]}')
+        lines.append(f'{prefix}_phase_seconds_sum{{phase="{name}"}} {stats["total_seconds"]}')
+        lines.append(f'{prefix}_phase_seconds_count{{phase="{name}"}} {stats["count"]}')
+    lines += [f"# HELP {prefix}_phase_bytes_total Bytes handled by each scrape phase.", f"# TYPE {prefix}_phase_bytes_total counter"]
+    for name, stats in summary["phases"].items():
+        lines.append(f'{prefix}_phase_bytes_total{{phase="{name}"}} {stats["bytes"]}')
+    for name, value in summary["counters"].items():
+        metric = f"{prefix}_{name}"
+        lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+    lines += [
+        f"# TYPE {prefix}_run_duration_seconds gauge",
+        f"{prefix}_run_duration_seconds {summary['duration_seconds']}",
+        f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+        f"{prefix}_last_run_timestamp_seconds {int(time.time())}",
+    ]
+    try:
+        _write_atomic(path, "\n".join(lines) + "\n")
+        logger.info(f"Prometheus metrics saved to {path}")
+    except Exception as e:
+        logger.error(f"Error saving Prometheus metrics to {path}: {e}")
@@ -0,0 +1,134 @@
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from config import ALL_CONFIG
+from airtable_parser import PARSER_VERSION, create_html_parser
+
+logger = logging.getLogger(__name__)
+
+
+class DiffParseCache:
+    """
+    Size-bounded LRU cache of parse_diff() results keyed by a hash of the diffRowHtml.
+    Identical diffs (a checkbox toggle, the same select option) are only parsed once.
+
+    With `disk_path`, misses fall through to a SQLite table that keeps results between
+    runs. Keys include PARSER_VERSION so a parser change never serves stale results.
+    """
+
+    def __init__(self, max_entries=10000, disk_path=None, flush_every=500):
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pending_writes = []
+
+        self.disk = None
+        if disk_path:
+            try:
+                self.disk = sqlite3.connect(disk_path, check_same_thread=False)
+                self.disk.execute("CREATE TABLE IF NOT EXISTS diff_cache (key TEXT PRIMARY KEY, details TEXT NOT NULL)")
+                self.disk.commit()
+            except Exception as e:
+                logger.error(f"Error opening diff cache at {disk_path}: {e}. Using memory only.")
+                self.disk = None
+
+    @staticmethod
+    def key(html):
+        digest = hashlib.blake2b(html.encode('utf-8'), digest_size=16).hexdigest()
+        return f"{PARSER_VERSION}:{digest}"
+
+    def get(self, html):
+        """Returns a copy of the cached result for this HTML, or None."""
+        key = self.key(html)
+        with self._lock:
+            details = self.entries.get(key)
+            if details is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return dict(details)
+            if self.disk is not None:
+                row = self.disk.execute("SELECT details FROM diff_cache WHERE key = ?", (key,)).fetchone()
+                if row:
+                    details = json.loads(row[0])
+                    self._remember(key, details)
+                    self.disk_hits += 1
+                    return dict(details)
+            self.misses += 1
+            return None
+
+    def put(self, html, details):
+        key = self.key(html)
+        with self._lock:
+            self._remember(key, dict(details))
+            if self.disk is not None:
+                self._pending_writes.append((key, json.dumps(details, ensure_ascii=False)))
+                if len(self._pending_writes) >= self.flush_every:
+                    self._flush()
+
+    def _remember(self, key, details):
+        self.entries[key] = details
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def parse(self, html):
+        """Returns the parse_diff() result for this HTML, parsing only on a cache miss."""
+        details = self.get(html)
+        if details is None:
+            details = create_html_parser(html).parse_diff()
+            self.put(html, details)
+        return details
+
+    def _flush(self):
+        if self.disk is None or not self._pending_writes:
+            return
+        try:
+            self.disk.executemany("INSERT OR REPLACE INTO diff_cache (key, details) VALUES (?, ?)", self._pending_writes)
+            self.disk.commit()
+        except Exception as e:
+            logger.error(f"Error writing diff cache: {e}")
+        self._pending_writes = []
+
+    def flush(self):
+        """Writes pending results to the on-disk tier."""
+        with self._lock:
+            self._flush()
+
+    def log_stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        if lookups:
+            logger.info(
+                f"Diff parse cache: {self.hits} memory hits, {self.disk_hits} disk hits, {self.misses} misses "
+                f"({(self.hits + self.disk_hits) / lookups:.1%} hit rate, {len(self.entries)} cached)."
+            )
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_diff_cache():
+    """Returns the process-wide cache configured by DIFF_CACHE_SIZE/DIFF_CACHE_FILE, or None if disabled."""
+    global _default_cache
+    config = ALL_CONFIG.get('CORE', {})
+    if config.get('DIFF_CACHE_SIZE', 0) <= 0:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DiffParseCache(config['DIFF_CACHE_SIZE'], config.get('DIFF_CACHE_FILE'))
+        return _default_cache
+
+
+def parse_diff_cached(html):
+    """parse_diff() through the default cache when it is enabled."""
+    cache = get_diff_cache()
+    if cache is None:
+        return create_html_parser(html).parse_diff()
+    return cache.parse(html)
@@ -0,0 +1,85 @@
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from airtable_parser import create_html_parser
+from parse_cache import get_diff_cache
+from utils import activity_diff_html, parse_revision_history
+
+logger = logging.getLogger(__name__)
+
+
+def parse_diff_chunk(html_chunk):
+    """Worker entry point: parses a chunk of diffRowHtml strings, preserving their order."""
+    return [create_html_parser(html).parse_diff() for html in html_chunk]
+
+
+class PendingPage:
+    """A page whose diffs are being parsed in the pool; result() assembles the RevisionEntry batch."""
+
+    def __init__(self, page, cached_details, missed, chunk_futures, cache=None):
+        self.page = page
+        self.cached_details = cached_details
+        self.missed = missed
+        self.chunk_futures = chunk_futures
+        self.cache = cache
+
+    def result(self):
+        details = dict(self.cached_details)
+        parsed = []
+        for future in self.chunk_futures:
+            parsed.extend(future.result())
+        for (entry_id, html), result in zip(self.missed, parsed):
+            details[entry_id] = result
+            if self.cache is not None:
+                self.cache.put(html, result)
+        return parse_revision_history(self.page, details)
+
+
+class ParallelDiffParser:
+    """
+    Fans the diffRowHtml of each page out to a ProcessPoolExecutor in chunks.
+    submit_page() returns immediately, so the caller can fetch the next page while
+    this one is parsed; result order always follows orderedActivityAndCommentIds.
+    """
+
+    def __init__(self, workers, chunk_size=64):
+        self.workers = workers
+        self.chunk_size = max(1, chunk_size)
+        self.executor = None
+        # Worker threads sharing this parser submit their first pages concurrently
+        self._executor_lock = threading.Lock()
+
+    def submit_page(self, page):
+        with self._executor_lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers)
+                logger.info(f"Started diff parser pool with {self.workers} processes.")
+            executor = self.executor
+
+        # Cache hits are resolved here; only the misses are shipped to the worker processes
+        cache = get_diff_cache()
+        cached_details = {}
+        missed = []
+        for entry_id, html in activity_diff_html(page):
+            details = cache.get(html) if cache is not None else None
+            if details is not None:
+                cached_details[entry_id] = details
+            else:
+                missed.append((entry_id, html))
+
+        htmls = [html for _, html in missed]
+        chunk_futures = [
+            executor.submit(parse_diff_chunk, htmls[start:start + self.chunk_size])
+            for start in range(0, len(htmls), self.chunk_size)
+        ]
+        return PendingPage(page, cached_details, missed, chunk_futures, cache)
+
+    def parse_page(self, page):
+        """Blocking convenience wrapper around submit_page()."""
+        return self.submit_page(page).result()
+
+    def shutdown(self):
+        with self._executor_lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown()
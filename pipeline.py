@@ -0,0 +1,117 @@
+import time
+import queue
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's output
+_DONE = object()
+
+
+class RevisionPipeline:
+    """
+    Fetch -> parse -> write stages for one record, connected by bounded queues.
+
+    A fetcher thread follows offsetV2, a parser thread turns each page into a RevisionEntry
+    batch (in the scraper's diff pool when PARSE_WORKERS > 0, otherwise inline), and the
+    calling thread writes batches in page order. A full queue blocks the stage feeding it,
+    so at most `queue_size` pages wait between any two stages.
+
+    Time each stage spends blocked on a full queue or idle on an empty one is added to the
+    scraper's run counters (pipeline_*_blocked_seconds / pipeline_*_idle_seconds), which
+    shows the bottleneck stage.
+    """
+
+    def __init__(self, scraper, queue_size=4):
+        self.scraper = scraper
+        self.queue_size = max(1, queue_size)
+        self.stop = threading.Event()
+        self.failed = threading.Event()
+
+    def run(self, record_id, offset_v2, since, write):
+        """
+        Runs until the last page is written, starting at `offset_v2` and stopping at the
+        high-water mark `since`. `write` receives (future of entries, next offset) per page.
+        Returns False if a page could not be fetched or parsed.
+        """
+        pages = queue.Queue(self.queue_size)
+        batches = queue.Queue(self.queue_size)
+        stages = [
+            threading.Thread(target=self._fetch, args=(record_id, offset_v2, since, pages), name=f"fetch-{record_id}", daemon=True),
+            threading.Thread(target=self._parse, args=(pages, batches), name=f"parse-{record_id}", daemon=True),
+        ]
+        for stage in stages:
+            stage.start()
+
+        try:
+            while True:
+                item = self._get(batches, "pipeline_write_idle_seconds")
+                if item is _DONE or item is None:
+                    break
+                write(item)
+        finally:
+            # Unblocks the upstream stages if the writer stopped early
+            self.stop.set()
+            for stage in stages:
+                stage.join()
+        return not self.failed.is_set()
+
+    def _fetch(self, record_id, offset_v2, since, pages):
+        try:
+            while not self.stop.is_set():
+                page = self.scraper.fetch_revision_page(offset_v2, record_id)
+                if page is None:
+                    self.failed.set()
+                    break
+                page, offset_v2 = self.scraper.cut_page_at_mark(page, since)
+                if not self._put(pages, (page, offset_v2), "pipeline_fetch_blocked_seconds") or not offset_v2:
+                    break
+        except Exception as e:
+            logger.error(f"Pipeline fetch stage failed for {record_id}: {e}")
+            self.failed.set()
+        finally:
+            self._put(pages, _DONE)
+
+    def _parse(self, pages, batches):
+        try:
+            while True:
+                item = self._get(pages, "pipeline_parse_idle_seconds")
+                if item is _DONE or item is None:
+                    break
+                page, offset_v2 = item
+                if not self._put(batches, (self.scraper.start_page_parse(page), offset_v2), "pipeline_parse_blocked_seconds"):
+                    break
+        except Exception as e:
+            logger.error(f"Pipeline parse stage failed: {e}")
+            self.failed.set()
+        finally:
+            self._put(batches, _DONE)
+
+    def _put(self, stage_queue, item, wait_counter=None):
+        """Blocks while `stage_queue` is full. Returns False if the pipeline was stopped first."""
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    stage_queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    if self.stop.is_set():
+                        return False
+        finally:
+            if wait_counter:
+                self.scraper.metrics.count(wait_counter, time.perf_counter() - start)
+
+    def _get(self, stage_queue, wait_counter):
+        """Blocks until `stage_queue` has an item. Returns None if the pipeline was stopped first."""
+        start = time.perf_counter()
+        try:
+            while True:
+                try:
+                    return stage_queue.get(timeout=0.1)
+                except queue.Empty:
+                    if self.stop.is_set():
+                        return None
+        finally:
+            self.scraper.metrics.count(wait_counter, time.perf_counter() - start)
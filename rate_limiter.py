@@ -0,0 +1,146 @@
+import time
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value, default=None):
+    """Parses a Retry-After header (seconds or HTTP date) into seconds to wait."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return default
+
+
+def endpoint_for(url):
+    """Classifies an airtable.com URL into a rate-limit budget name."""
+    if "readRowActivitiesAndComments" in url:
+        return "activity"
+    if "/auth/" in url or url.rstrip('/').endswith("/login"):
+        return "login"
+    return "page"
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens/second up to `burst`. reserve() takes a token
+    immediately and returns how long the caller must wait before using it, so the same
+    bucket serves blocking (time.sleep) and asyncio (asyncio.sleep) callers.
+    """
+
+    def __init__(self, rate, burst):
+        self.configured_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self.last)
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.last = max(self.last, now)
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            # Negative tokens are debt: the caller waits until the refill covers it
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(delay, self.paused_until - now)
+
+    def throttle(self, retry_after, min_rate):
+        """Server said slow down: pause for `retry_after` and halve the refill rate."""
+        with self._lock:
+            now = time.monotonic()
+            self.paused_until = max(self.paused_until, now + retry_after)
+            self.tokens = min(self.tokens, 0.0)
+            # No refill while paused
+            self.last = max(self.last, self.paused_until)
+            self.rate = max(min_rate, self.rate / 2)
+
+    def recover(self, step):
+        """Additive increase back towards the configured rate after successful requests."""
+        with self._lock:
+            if self.rate < self.configured_rate:
+                self.rate = min(self.configured_rate, self.rate + step)
+
+
+class RateLimiter:
+    """
+    Client-side limiter for every request to airtable.com: one global bucket plus one
+    bucket per endpoint budget (login, page, activity). Rates adapt to 429/Retry-After
+    responses and recover gradually on success. Per-endpoint wait totals are kept in `stats`.
+    """
+
+    def __init__(self, config):
+        self.enabled = config.get('ENABLED', True)
+        self.min_rate = config.get('MIN_REQUESTS_PER_SECOND', 0.2)
+        self.default_retry_after = config.get('DEFAULT_RETRY_AFTER', 5.0)
+        self.global_bucket = TokenBucket(config.get('REQUESTS_PER_SECOND', 5.0), config.get('BURST', 10))
+        self.endpoint_buckets = {
+            name: TokenBucket(budget.get('REQUESTS_PER_SECOND', 5.0), budget.get('BURST', 10))
+            for name, budget in config.get('ENDPOINTS', {}).items()
+        }
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+
+    def _buckets(self, endpoint):
+        bucket = self.endpoint_buckets.get(endpoint)
+        return [self.global_bucket, bucket] if bucket else [self.global_bucket]
+
+    def reserve(self, url):
+        """Reserves a slot for a request to `url`. Returns (endpoint, seconds to wait)."""
+        endpoint = endpoint_for(url)
+        if not self.enabled:
+            return endpoint, 0.0
+        delay = max(bucket.reserve() for bucket in self._buckets(endpoint))
+        with self._stats_lock:
+            stats = self.stats.setdefault(endpoint, {"requests": 0, "waited": 0.0, "max_wait": 0.0, "throttled": 0})
+            stats["requests"] += 1
+            stats["waited"] += delay
+            stats["max_wait"] = max(stats["max_wait"], delay)
+        return endpoint, delay
+
+    def acquire(self, url):
+        """Blocking reserve(): sleeps until the request may go out. Returns (endpoint, waited)."""
+        endpoint, delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+        return endpoint, delay
+
+    def observe(self, endpoint, status_code, retry_after_header=None):
+        """Adapts to a response: 429/503 with Retry-After pauses and slows the buckets, success recovers them."""
+        if not self.enabled:
+            return None
+        if status_code == 429 or (status_code == 503 and retry_after_header):
+            retry_after = parse_retry_after(retry_after_header, self.default_retry_after)
+            for bucket in self._buckets(endpoint):
+                bucket.throttle(retry_after, self.min_rate)
+            with self._stats_lock:
+                self.stats.setdefault(endpoint, {"requests": 0, "waited": 0.0, "max_wait": 0.0, "throttled": 0})["throttled"] += 1
+            logger.warning(f"Throttled on {endpoint} (HTTP {status_code}); pausing {retry_after:.1f}s and lowering the request rate.")
+            return retry_after
+        if status_code < 400:
+            for bucket in self._buckets(endpoint):
+                bucket.recover(bucket.configured_rate * 0.05)
+        return None
+
+    def log_stats(self):
+        for endpoint, stats in sorted(self.stats.items()):
+            if stats["requests"]:
+                logger.info(
+                    f"Rate limiter [{endpoint}]: {stats['requests']} requests, waited {stats['waited']:.1f}s total "
+                    f"(max {stats['max_wait']:.2f}s), throttled {stats['throttled']} time(s)."
+                )
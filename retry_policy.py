@@ -0,0 +1,96 @@
+import time
+import random
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class RetryPolicy:
+    """
+    Retry schedule for one class of endpoint (login, page, activity). Delays use
+    decorrelated jitter, sleep = min(max_delay, uniform(base_delay, previous * 3)),
+    so concurrent workers spread out instead of retrying in lockstep. A Retry-After
+    value is used as a floor. A request stops retrying after max_retries attempts
+    or once total_budget seconds have passed since it was first sent.
+    """
+
+    def __init__(self, name, max_retries=5, base_delay=1.0, max_delay=30.0, total_budget=120.0, statuses=RETRY_STATUSES):
+        self.name = name
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.total_budget = total_budget
+        self.statuses = frozenset(statuses)
+        # Run metrics
+        self.retries = 0
+        self.gave_up = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, name, config):
+        return cls(
+            name,
+            max_retries=config.get('MAX_RETRIES', 5),
+            base_delay=config.get('BASE_DELAY', 1.0),
+            max_delay=config.get('MAX_DELAY', 30.0),
+            total_budget=config.get('TOTAL_BUDGET', 120.0),
+            statuses=config.get('STATUSES', RETRY_STATUSES)
+        )
+
+    def start(self):
+        """Returns the retry state for one request."""
+        return RetryAttempt(self)
+
+    def _record(self, gave_up):
+        with self._lock:
+            if gave_up:
+                self.gave_up += 1
+            else:
+                self.retries += 1
+
+    def stats(self):
+        return {"retries": self.retries, "gave_up": self.gave_up}
+
+
+class RetryAttempt:
+    """Tracks one request's retries against its policy."""
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.started = time.monotonic()
+        self.retries = 0
+        self.previous_delay = policy.base_delay
+
+    def retryable(self, status_code):
+        return status_code in self.policy.statuses
+
+    def backoff(self, retry_after=None):
+        """Returns the seconds to sleep before the next try, or None when retries are used up."""
+        policy = self.policy
+        delay = min(policy.max_delay, random.uniform(policy.base_delay, self.previous_delay * 3))
+        if retry_after:
+            delay = max(delay, retry_after)
+        elapsed = time.monotonic() - self.started
+        if self.retries >= policy.max_retries or elapsed + delay > policy.total_budget:
+            policy._record(gave_up=True)
+            return None
+        self.previous_delay = delay
+        self.retries += 1
+        policy._record(gave_up=False)
+        return delay
+
+
+def build_retry_policies(config):
+    """Builds {name: RetryPolicy} from the RETRY config; "default" covers unlisted endpoints."""
+    policies = {name: RetryPolicy.from_config(name, settings) for name, settings in config.items()}
+    policies.setdefault("default", RetryPolicy("default"))
+    return policies
+
+
+def log_retry_stats(policies):
+    for name, policy in sorted(policies.items()):
+        if policy.retries or policy.gave_up:
+            logger.info(f"Retries [{name}]: {policy.retries} retried, {policy.gave_up} gave up.")
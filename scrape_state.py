@@ -0,0 +1,53 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from atomic_file import atomic_write
+
+logger = logging.getLogger(__name__)
+
+
+class HighWaterMarkStore:
+    """
+    Persists, per record, the newest activity/comment id and createdTime already saved.
+    Incremental runs stop paginating once they reach that entry.
+    """
+
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self.marks = self._load()
+
+    def _load(self):
+        if not Path(self.state_file).exists():
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading scrape state from {self.state_file}: {e}. Starting fresh.")
+            return {}
+
+    def get(self, record_id):
+        with self._lock:
+            return self.marks.get(record_id)
+
+    def update(self, record_id, newest_entry):
+        """Records the newest saved entry for a record and writes the state file."""
+        if newest_entry is None:
+            return
+        with self._lock:
+            self.marks[record_id] = {"id": newest_entry.id, "createdTime": newest_entry.timestamp}
+            self._save()
+
+    def clear(self, record_id):
+        with self._lock:
+            if self.marks.pop(record_id, None) is not None:
+                self._save()
+
+    def _save(self):
+        try:
+            with atomic_write(self.state_file) as f:
+                json.dump(self.marks, f, indent=4)
+        except Exception as e:
+            logger.error(f"Error saving scrape state to {self.state_file}: {e}")
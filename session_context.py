@@ -0,0 +1,130 @@
+import time
+import logging
+from session_store import SessionStore, format_timestamp
+from auth_broker import AuthBroker
+
+logger = logging.getLogger(__name__)
+
+
+class SessionContextMixin:
+    """
+    Session and socket bookkeeping shared by AirtableScraper and AsyncAirtableScraper:
+    the stored session's cookies, expiry and generation, and the cached socket ID and
+    CSRF token with their ages.
+
+    The client supplies its cookie jar through three hooks: _cookies_to_save(),
+    _replace_cookies(state) and _drop_cookies(). Fetching the socket ID and logging in
+    stay in the client, as they differ between requests and aiohttp.
+    """
+
+    def init_session_context(self, config):
+        # Cookies, socket ID and CSRF token shared across runs (and processes) with their ages
+        self.session_store = SessionStore.from_config(config)
+        # Performs logins once for every scraper (sync or async) sharing the session file
+        self.auth_broker = AuthBroker(self.session_store)
+
+        # Session-scoped socket/CSRF context, refreshed on invalidation or once SOCKET_MAX_AGE old
+        self.socket_id = None
+        self.socket_obtained_at = None
+        self.rejected_socket_id = None
+        self.csrf_token = None
+        self.socket_refresh_count = 0
+        # When the session cookies expire; refreshed by a new login shortly before
+        self.session_expires_at = None
+        # Stored session generation in use, so auth failures and logins refer to the right one
+        self.session_generation = None
+        # Set by an auth failure; the next request first gets a session from the auth broker
+        self.session_rejected = False
+
+    # --- Cookies ---
+    def save_cookies(self):
+        """Stores the session cookies and CSRF token after a login, as a new session generation."""
+        state = self.session_store.save_login(self._cookies_to_save(), self.csrf_token)
+        self.session_expires_at = self.session_store.session_expires_at(state)
+        self.session_generation = state["generation"]
+        self.session_rejected = False
+        logger.info(f"Session saved to {self.session_store.path} (expires {format_timestamp(self.session_expires_at)}).")
+
+    def load_cookies(self):
+        """
+        Loads the stored session unless it is missing, rejected or about to expire, along
+        with the socket ID and CSRF token while they are still fresh. Returns False if a
+        login is needed.
+        """
+        state = self.session_store.load()
+        if state is None:
+            logger.info("No saved session, login required.")
+            return False
+        if not self.auth_broker.usable(state):
+            logger.info("Saved session was rejected or expires soon; logging in again.")
+            return False
+        self.adopt_session(state)
+        logger.info(f"Session loaded from {self.session_store.path} (expires {format_timestamp(self.session_expires_at)}).")
+        return True
+
+    def adopt_session(self, state):
+        """Switches to a stored session: its cookies and expiry, plus its socket ID and CSRF token while fresh."""
+        self._replace_cookies(state)
+        self.session_expires_at = self.session_store.session_expires_at(state)
+        self.session_generation = state.get("generation")
+        self.session_rejected = False
+        # A fresh saved socket ID spares the home page fetch
+        self.socket_id, self.socket_obtained_at = self.session_store.context_value(
+            state, "socket_id", self.session_store.socket_max_age
+        )
+        self.csrf_token, _ = self.session_store.context_value(state, "csrf_token")
+
+    def clear_cookies(self):
+        """
+        Drops the session cookies and reports the session as rejected. The stored session
+        stays in place for the auth broker, which replaces it with exactly one new login.
+        """
+        self.auth_broker.report_rejected(self.session_generation)
+        self._drop_cookies()
+        self.session_expires_at = None
+        self.session_rejected = True
+
+    def session_needs_refresh(self):
+        """True once the session was rejected or is about to expire."""
+        return self.session_rejected or self.session_store.is_expiring(self.session_expires_at)
+
+    # --- Socket Context ---
+    def _socket_expired(self):
+        max_age = self.session_store.socket_max_age
+        return bool(max_age and self.socket_obtained_at and time.time() - self.socket_obtained_at > max_age)
+
+    def _has_fresh_socket(self):
+        return bool(self.socket_id) and not self._socket_expired()
+
+    def _adopt_shared_socket_id(self):
+        """
+        Takes the socket ID another worker stored for this session, unless it is the one
+        this scraper saw rejected. Returns True if it is fresh enough to use.
+        """
+        self.socket_id, self.socket_obtained_at = self.auth_broker.shared_socket_id(
+            self.session_generation, rejected=self.rejected_socket_id
+        )
+        if self._has_fresh_socket():
+            logger.info("Using the socket ID another worker stored for this session.")
+            return True
+        return False
+
+    def _record_socket_id(self, socket_id):
+        """Caches a socket ID fetched from the home page and shares it through the session file."""
+        self.socket_id = socket_id
+        if socket_id:
+            self.socket_obtained_at = time.time()
+            self.socket_refresh_count += 1
+            self.session_store.save_context(socket_id=socket_id, generation=self.session_generation)
+            logger.info(f"Socket context refreshed (refresh #{self.socket_refresh_count}).")
+
+    def invalidate_socket_context(self, reason):
+        """Drops the cached socket ID and CSRF token so the next request refetches them."""
+        if self.socket_id or self.csrf_token:
+            logger.warning(f"Invalidating socket context: {reason}.")
+        if self.socket_id:
+            # Keeps a stale ID from coming back through the shared session file
+            self.rejected_socket_id = self.socket_id
+        self.socket_id = None
+        self.socket_obtained_at = None
+        self.csrf_token = None
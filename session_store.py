@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from requests.cookies import create_cookie
+from atomic_file import atomic_write
+
+try:
+    import fcntl
+except ImportError:  # Windows: lock a byte of the lock file with msvcrt instead
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+def format_timestamp(timestamp):
+    if timestamp is None:
+        return "never"
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SessionStore:
+    """
+    JSON file holding the logged-in session: its cookies (with their expiry), the
+    secretSocketId and the CSRF token, each stamped with the time it was obtained.
+
+    Callers check validity before use, so an expiring session is replaced ahead of time
+    rather than after a failed request. Every read and write holds a lock on a sidecar
+    .lock file, so concurrent worker processes can share one session file.
+    """
+
+    def __init__(self, path, refresh_margin=600, max_age=12 * 3600, socket_max_age=3600, cookie_names=()):
+        self.path = Path(path)
+        self.lock_path = Path(f"{path}.lock")
+        self.refresh_margin = refresh_margin
+        self.max_age = max_age
+        self.socket_max_age = socket_max_age
+        self.cookie_names = set(cookie_names)
+        # flock is per open file, so nested locked() blocks in one thread reuse the held lock
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.get('SESSION_FILE', 'session.json'),
+            refresh_margin=config.get('SESSION_REFRESH_MARGIN', 600),
+            max_age=config.get('SESSION_MAX_AGE', 12 * 3600),
+            socket_max_age=config.get('SOCKET_MAX_AGE', 3600),
+            cookie_names=config.get('SESSION_COOKIE_NAMES', ()),
+        )
+
+    @contextmanager
+    def locked(self, exclusive=True):
+        """
+        Holds the cross-process lock on the session file (shared for reads where supported).
+        Re-entrant within a thread; an outer block's lock mode applies to nested ones.
+        """
+        with self._thread_lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, 'a+') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                self._depth = 1
+                try:
+                    yield
+                finally:
+                    self._depth = 0
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                    else:
+                        lock_file.seek(0)
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    # --- Reading ---
+    def load(self):
+        """Returns the saved session state, or None if there is none or it is unreadable."""
+        with self.locked(exclusive=False):
+            return self._read()
+
+    def _read(self):
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading session file {self.path}: {e}. Login required.")
+            return None
+        if state.get("version") != FORMAT_VERSION:
+            logger.warning(f"Session file {self.path} has an unknown format; login required.")
+            return None
+        return state
+
+    def session_expires_at(self, state):
+        """
+        When the session stops being usable: the earliest expiry among SESSION_COOKIE_NAMES
+        (or all cookies if none of them are present), else login time + SESSION_MAX_AGE.
+        """
+        cookies = state.get("cookies", [])
+        named = [cookie for cookie in cookies if cookie["name"] in self.cookie_names] or cookies
+        expiries = [cookie["expires"] for cookie in named if cookie.get("expires")]
+        if expiries:
+            return min(expiries)
+        return (state.get("login_at") or 0) + self.max_age
+
+    def is_expiring(self, expires_at, now=None):
+        """True once `expires_at` is within the refresh margin (False when unknown)."""
+        if expires_at is None:
+            return False
+        return (now or time.time()) + self.refresh_margin >= expires_at
+
+    def context_value(self, state, key, max_age=None):
+        """Returns (value, obtained_at) for "socket_id" or "csrf_token", or (None, None) if missing or older than `max_age`."""
+        entry = state.get(key) or {}
+        value, obtained_at = entry.get("value"), entry.get("obtained_at")
+        if not value or (max_age is not None and time.time() - (obtained_at or 0) > max_age):
+            return None, None
+        return value, obtained_at
+
+    @staticmethod
+    def apply_cookies(state, cookie_jar):
+        for cookie in state.get("cookies", []):
+            cookie_jar.set_cookie(create_cookie(
+                cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"),
+                expires=cookie.get("expires"), secure=cookie.get("secure", False)
+            ))
+
+    # --- Writing ---
+    def save_login(self, cookie_jar, csrf_token=None):
+        """Replaces the stored session after a login, as the next generation. Returns the new state."""
+        now = time.time()
+        state = {
+            "version": FORMAT_VERSION,
+            "generation": None,
+            "login_at": now,
+            "cookies": [
+                {
+                    "name": cookie.name, "value": cookie.value, "domain": cookie.domain,
+                    "path": cookie.path, "expires": cookie.expires, "secure": bool(cookie.secure)
+                }
+                for cookie in cookie_jar
+            ],
+            "csrf_token": {"value": csrf_token, "obtained_at": now} if csrf_token else None,
+            "socket_id": None,
+        }
+        with self.locked():
+            previous = self._read() or {}
+            state["generation"] = (previous.get("generation") or 0) + 1
+            self._write(state)
+        return state
+
+    def save_context(self, socket_id=None, csrf_token=None, generation=None):
+        """
+        Stamps a freshly obtained socket ID and/or CSRF token into the stored session.
+        With `generation`, nothing is written if the stored session has since been replaced.
+        """
+        now = time.time()
+        with self.locked():
+            state = self._read()
+            if state is None or (generation is not None and state.get("generation") != generation):
+                return
+            if socket_id:
+                state["socket_id"] = {"value": socket_id, "obtained_at": now}
+            if csrf_token:
+                state["csrf_token"] = {"value": csrf_token, "obtained_at": now}
+            self._write(state)
+
+    def mark_rejected(self, generation):
+        """
+        Flags the stored session as rejected by the server, if it is still `generation`.
+        Returns True for the first report; later reports of the same session return False.
+        """
+        with self.locked():
+            state = self._read()
+            if state is None or state.get("generation") != generation or state.get("rejected_at"):
+                return False
+            state["rejected_at"] = time.time()
+            self._write(state)
+            return True
+
+    def clear(self):
+        with self.locked():
+            if self.path.exists():
+                os.remove(self.path)
+                logger.warning(f"Session file {self.path} removed. Forced re-login.")
+
+    def _write(self, state):
+        # Holds live session cookies, so readable by the owner only
+        try:
+            with atomic_write(self.path, permissions=0o600) as f:
+                json.dump(state, f, indent=4)
+        except Exception as e:
+            logger.error(f"Error saving session to {self.path}: {e}")
@@ -0,0 +1,127 @@
+import sqlite3
+import logging
+import threading
+from data_models import RevisionEntry
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisions (
+    record_id   TEXT NOT NULL,
+    entry_id    TEXT NOT NULL,
+    type        TEXT,
+    timestamp   TEXT,
+    user_id     TEXT,
+    user_email  TEXT,
+    user_name   TEXT,
+    comment     TEXT,
+    column_id   TEXT,
+    column_name TEXT,
+    column_type TEXT,
+    old_value   TEXT,
+    new_value   TEXT,
+    PRIMARY KEY (record_id, entry_id)
+);
+CREATE INDEX IF NOT EXISTS idx_revisions_record_time ON revisions (record_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_revisions_column ON revisions (column_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_revisions_user ON revisions (user_id, timestamp);
+"""
+
+UPSERT = """
+INSERT INTO revisions (
+    record_id, entry_id, type, timestamp, user_id, user_email, user_name, comment,
+    column_id, column_name, column_type, old_value, new_value
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (record_id, entry_id) DO UPDATE SET
+    type = excluded.type,
+    timestamp = excluded.timestamp,
+    user_id = excluded.user_id,
+    user_email = excluded.user_email,
+    user_name = excluded.user_name,
+    comment = excluded.comment,
+    column_id = excluded.column_id,
+    column_name = excluded.column_name,
+    column_type = excluded.column_type,
+    old_value = excluded.old_value,
+    new_value = excluded.new_value
+"""
+
+SELECT_COLUMNS = (
+    "entry_id, type, timestamp, user_id, user_email, user_name, comment, "
+    "column_id, column_name, column_type, old_value, new_value"
+)
+
+
+class SQLiteRevisionStore:
+    """
+    Indexed SQLite sink for scraped history, keyed by (record_id, entry_id).
+    Batches are upserted in one transaction each, so re-runs are idempotent.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def write_batch(self, record_id, entries):
+        """Upserts a batch of entries for one record in a single transaction."""
+        rows = [
+            (
+                record_id, entry.id, entry.type, entry.timestamp,
+                entry.user.get("id"), entry.user.get("email"), entry.user.get("name"),
+                entry.comment, entry.columnId, entry.columnName, entry.columnType,
+                entry.oldValue, entry.newValue
+            )
+            for entry in entries
+        ]
+        if not rows:
+            return 0
+        with self._lock:
+            try:
+                with self.connection:
+                    self.connection.executemany(UPSERT, rows)
+            except Exception as e:
+                logger.error(f"Error writing {len(rows)} entries for {record_id} to {self.db_path}: {e}")
+                return 0
+        return len(rows)
+
+    def _query(self, sql, params):
+        with self._lock:
+            rows = self.connection.execute(sql, params).fetchall()
+        return [
+            RevisionEntry({
+                "id": row[0], "type": row[1], "createdTime": row[2],
+                "user": {"id": row[3], "email": row[4], "name": row[5]},
+                "comment": row[6], "columnId": row[7], "columnName": row[8],
+                "columnType": row[9], "oldValue": row[10], "newValue": row[11]
+            })
+            for row in rows
+        ]
+
+    def record_history(self, record_id, since=None):
+        """Entries for one record, newest first, optionally only those at or after `since`."""
+        return self._query(
+            f"SELECT {SELECT_COLUMNS} FROM revisions WHERE record_id = ? AND timestamp >= ? ORDER BY timestamp DESC",
+            (record_id, since or "")
+        )
+
+    def column_changes(self, column_id, since=None):
+        """All changes to one column across records, newest first (e.g. since a week ago)."""
+        return self._query(
+            f"SELECT {SELECT_COLUMNS} FROM revisions WHERE column_id = ? AND timestamp >= ? ORDER BY timestamp DESC",
+            (column_id, since or "")
+        )
+
+    def user_changes(self, user_id, since=None):
+        """All entries by one user, newest first."""
+        return self._query(
+            f"SELECT {SELECT_COLUMNS} FROM revisions WHERE user_id = ? AND timestamp >= ? ORDER BY timestamp DESC",
+            (user_id, since or "")
+        )
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
@@ -0,0 +1,49 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import config
+from fixtures import load_pages
+from stub_server import start_stub_server
+
+
+@pytest.fixture
+def fixture_pages():
+    return load_pages()
+
+
+@pytest.fixture
+def stub_airtable(tmp_path, monkeypatch, fixture_pages):
+    """
+    Points the scrapers at the benchmark stub server, which serves the fixture pages for
+    every record, and keeps the session file and outputs in tmp_path. Yields the server.
+    """
+    server, base_url = start_stub_server(fixture_pages)
+    settings = {
+        "BASE_URL": base_url,
+        "TABLE_VIEW_URL": f"{base_url}/appTEST0000000000/tblTEST0000000000/viwTEST0000000000",
+        "APPLICATION_ID": "appTEST",
+        "SESSION_FILE": str(tmp_path / "session.json"),
+        "OUTPUT_DIR": str(tmp_path / "records"),
+        "OUTPUT_FORMAT": "json",
+        "OUTPUT_FIELDS": None,
+        "LAZY_DIFFS": False,
+        "INCREMENTAL": False,
+        "METRICS_FILE": "",
+        "DIFF_CACHE_SIZE": 0,
+    }
+    for key, value in settings.items():
+        monkeypatch.setitem(config.CONFIG, key, value)
+    monkeypatch.setitem(config.ALL_CONFIG, "LOGIN_URLS", {
+        "INITIAL_PAGE_URL": f"{base_url}/login",
+        "EMAIL_SUBMIT_URL": f"{base_url}/auth/getLoginTypeForEmail",
+        "LOGIN_ACTION_URL": f"{base_url}/auth/login/",
+    })
+    monkeypatch.setitem(config.ALL_CONFIG["RATE_LIMIT"], "ENABLED", False)
+    yield server
+    server.shutdown()
+    server.server_close()
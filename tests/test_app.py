@@ -0,0 +1,22 @@
+import sys
+import pytest
+import app
+
+
+@pytest.mark.parametrize("flags", [
+    ["--table"],
+    ["--output-format", "ndjson"],
+    ["--incremental"],
+    ["--sqlite-db", "history.db"],
+    ["--pipeline"],
+    ["--prometheus-textfile", "scraper.prom"],
+])
+def test_async_rejects_unsupported_options(monkeypatch, flags):
+    monkeypatch.setattr(sys, "argv", ["app.py", "--async", "--records-file", "ids.txt", *flags])
+    with pytest.raises(SystemExit):
+        app.parse_args()
+
+
+def test_async_accepts_json_output(monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["app.py", "--async", "--records-file", "ids.txt", "--output-format", "json", "--fields", "id,timestamp"])
+    assert app.parse_args().use_async
@@ -0,0 +1,96 @@
+import json
+import asyncio
+import config
+from async_scraper import AsyncAirtableScraper, run_async
+from session_store import SessionStore
+
+RECORD_IDS = ["recTEST000000001", "recTEST000000002", "recTEST000000003"]
+
+
+def test_run_async_logs_in_and_paginates(stub_airtable, fixture_pages, tmp_path):
+    results = asyncio.run(run_async("test@example.com", "secret", RECORD_IDS, output_dir=tmp_path / "records"))
+
+    entries_per_record = sum(len(page["orderedActivityAndCommentIds"]) for page in fixture_pages)
+    assert results == {record_id: entries_per_record for record_id in RECORD_IDS}
+
+    # One login and one socket fetch shared by every record
+    hits = stub_airtable.hits
+    assert hits["/login"] == 1
+    assert hits["/auth/getLoginTypeForEmail"] == 1
+    assert hits["/auth/login/"] == 1
+    assert hits["/"] == 1
+    activity_requests = sum(count for path, count in hits.items() if path.endswith("readRowActivitiesAndComments"))
+    assert activity_requests == len(fixture_pages) * len(RECORD_IDS)
+
+    for record_id in RECORD_IDS:
+        saved = json.loads((tmp_path / "records" / f"{record_id}.json").read_text(encoding="utf-8"))
+        assert len(saved) == entries_per_record
+        assert len({entry["id"] for entry in saved}) == entries_per_record
+        timestamps = [entry["timestamp"] for entry in saved]
+        assert timestamps == sorted(timestamps, reverse=True)
+
+
+
+def test_run_async_reuses_saved_session(stub_airtable, tmp_path):
+    asyncio.run(run_async("test@example.com", "secret", RECORD_IDS[:1], output_dir=tmp_path / "first"))
+    stub_airtable.hits.clear()
+
+    results = asyncio.run(run_async("test@example.com", "secret", RECORD_IDS[:1], output_dir=tmp_path / "second"))
+
+    assert results[RECORD_IDS[0]]
+    assert stub_airtable.hits["/auth/login/"] == 0
+    # The socket ID was stored with the session too
+    assert stub_airtable.hits["/"] == 0
+
+
+def test_run_async_replaces_rejected_session_through_broker(stub_airtable, tmp_path):
+    asyncio.run(run_async("test@example.com", "secret", RECORD_IDS[:1], output_dir=tmp_path / "first"))
+    store = SessionStore(config.CONFIG["SESSION_FILE"])
+    generation = store.load()["generation"]
+    # Another worker's request was refused with this session
+    assert store.mark_rejected(generation)
+    stub_airtable.hits.clear()
+
+    results = asyncio.run(run_async("test@example.com", "secret", RECORD_IDS, output_dir=tmp_path / "second"))
+
+    assert all(results.values())
+    assert stub_airtable.hits["/auth/login/"] == 1
+    state = store.load()
+    assert state["generation"] == generation + 1
+    assert not state.get("rejected_at")
+
+
+def test_run_async_bounds_records_in_flight(stub_airtable, tmp_path, monkeypatch):
+    active, peak = 0, 0
+    original = AsyncAirtableScraper.scrape_record
+
+    async def tracked(self, record_id):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            return await original(self, record_id)
+        finally:
+            active -= 1
+    monkeypatch.setattr(AsyncAirtableScraper, "scrape_record", tracked)
+    record_ids = [f"recTEST00000{index:04d}" for index in range(6)]
+
+    results = asyncio.run(run_async("test@example.com", "secret", record_ids, output_dir=tmp_path / "records", workers=2))
+
+    assert all(results.values())
+    assert peak == 2
+
+
+def test_run_async_does_not_save_partial_history(stub_airtable, tmp_path, monkeypatch):
+    original = AsyncAirtableScraper.fetch_activity_page
+
+    async def fail_third_page(self, record_id, offset_v2=None):
+        if offset_v2 == "2":
+            return None
+        return await original(self, record_id, offset_v2)
+    monkeypatch.setattr(AsyncAirtableScraper, "fetch_activity_page", fail_third_page)
+
+    results = asyncio.run(run_async("test@example.com", "secret", RECORD_IDS[:1], output_dir=tmp_path / "records"))
+
+    assert results == {RECORD_IDS[0]: None}
+    assert not (tmp_path / "records" / f"{RECORD_IDS[0]}.json").exists()
@@ -0,0 +1,26 @@
+import pytest
+from atomic_file import atomic_write
+
+
+def test_replaces_file_on_success(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("old")
+
+    with atomic_write(path) as f:
+        f.write("new")
+
+    assert path.read_text() == "new"
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
+
+
+def test_keeps_file_on_error(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("old")
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as f:
+            f.write("partial")
+            raise RuntimeError("interrupted")
+
+    assert path.read_text() == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
@@ -0,0 +1,70 @@
+import json
+import time
+import pytest
+from airtable_scraper import AirtableScraper
+from batch_scraper import BatchScraper
+
+RECORD_IDS = [f"recTEST{i:09d}" for i in range(6)]
+FAILING = RECORD_IDS[2]
+
+
+@pytest.fixture
+def batch(stub_airtable, tmp_path, monkeypatch):
+    """A resumable BatchScraper over the stub server; FAILING never saves, and scraped IDs are recorded."""
+    scraper = AirtableScraper("test@example.com", "secret")
+    scrape_to_file = scraper.scrape_to_file
+    scraped = []
+
+    def scrape(record_id, output_file):
+        scraped.append(record_id)
+        return None if record_id == FAILING else scrape_to_file(record_id, output_file)
+
+    monkeypatch.setattr(scraper, "scrape_to_file", scrape)
+    batch = BatchScraper(scraper, workers=2, output_dir=tmp_path / "records", layout="sharded", resume=True)
+    batch.scraped = scraped
+    return batch
+
+
+def write_ledger(batch, started_at, record_ids):
+    batch.output_dir.mkdir(parents=True, exist_ok=True)
+    lines = [{"run_started_at": started_at}] + [{"id": record_id, "entries": 1} for record_id in record_ids]
+    (batch.output_dir / BatchScraper.COMPLETED_FILE).write_text("".join(json.dumps(line) + "\n" for line in lines))
+
+
+def test_finished_pass_removes_ledger_despite_failures(batch):
+    results = batch.run(RECORD_IDS)
+
+    assert results[FAILING] is None
+    assert not (batch.output_dir / BatchScraper.COMPLETED_FILE).exists()
+    assert (batch.output_dir / BatchScraper.FAILED_FILE).read_text().split() == [FAILING]
+
+    # The next pass scrapes every record again, not only the one that failed
+    batch.scraped.clear()
+    batch.run(RECORD_IDS)
+    assert sorted(batch.scraped) == sorted(RECORD_IDS)
+
+
+def test_interrupted_pass_resumes(batch):
+    write_ledger(batch, time.time() - 60, RECORD_IDS[:4])
+
+    results = batch.run(RECORD_IDS)
+
+    assert sorted(batch.scraped) == sorted(RECORD_IDS[4:])
+    assert set(results) == set(RECORD_IDS)
+
+
+def test_stale_ledger_is_ignored(batch):
+    write_ledger(batch, time.time() - batch.resume_max_age - 60, RECORD_IDS[:4])
+
+    batch.run(RECORD_IDS)
+
+    assert sorted(batch.scraped) == sorted(RECORD_IDS)
+
+
+def test_undated_ledger_is_ignored(batch):
+    batch.output_dir.mkdir(parents=True, exist_ok=True)
+    (batch.output_dir / BatchScraper.COMPLETED_FILE).write_text(json.dumps({"id": RECORD_IDS[0], "entries": 1}) + "\n")
+
+    batch.run(RECORD_IDS)
+
+    assert sorted(batch.scraped) == sorted(RECORD_IDS)
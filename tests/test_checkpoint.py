@@ -0,0 +1,40 @@
+import json
+import time
+from airtable_scraper import AirtableScraper
+from checkpoint import PaginationJournal
+from data_models import RevisionEntry
+
+ENTRY = {"id": "act1", "timestamp": "2024-01-01T00:00:00.000Z"}
+
+
+def test_journal_resumes_within_max_age(tmp_path):
+    journal = PaginationJournal(tmp_path / "history.json.journal", "recTEST", max_age=3600)
+    journal.append([RevisionEntry.from_dict(ENTRY)], "2")
+
+    entries, offset_v2, finished = PaginationJournal(tmp_path / "history.json.journal", "recTEST", max_age=3600).resume()
+
+    assert [entry.id for entry in entries] == ["act1"]
+    assert (offset_v2, finished) == ("2", False)
+
+
+def test_stale_or_unstamped_journal_is_discarded(tmp_path):
+    path = tmp_path / "history.json.journal"
+    stale = {"record_id": "recTEST", "started_at": time.time() - 7200, "offsetV2": "2", "fields": None, "entries": [ENTRY]}
+    unstamped = dict(stale, started_at=None)
+    for line in (stale, unstamped):
+        path.write_text(json.dumps(line) + "\n", encoding="utf-8")
+        assert PaginationJournal(path, "recTEST", max_age=3600).resume() == ([], None, False)
+        assert not path.exists()
+
+
+def test_journal_discarded_when_resumed_fetch_fails_at_first_page(stub_airtable, tmp_path, monkeypatch):
+    scraper = AirtableScraper("test@example.com", "secret")
+    journal = PaginationJournal(tmp_path / "history.json.journal", "recTEST000000001", scraper.fields, scraper.resume_max_age)
+    journal.append([RevisionEntry.from_dict(ENTRY)], "expired-offset")
+    monkeypatch.setattr(scraper, "fetch_revision_page", lambda offset_v2, record_id: None)
+
+    entries, complete = scraper.collect_revision_history("recTEST000000001", journal=journal)
+
+    assert not complete
+    assert [entry.id for entry in entries] == ["act1"]
+    assert not journal.path.exists()
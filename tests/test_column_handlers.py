@@ -0,0 +1,71 @@
+"""
+Expected values for the column types handled beyond the original parser (url, email,
+barcode, duration, autoNumber, formula, collaborator, multipleCollaborators, lookup),
+on every installed backend, plus the fallback counter for types without a handler.
+"""
+import pytest
+import config
+from airtable_parser import PARSER_BACKENDS, PARSE_COVERAGE, get_parser_class
+from fixtures import diff_html
+from utils import parse_revision_history
+
+
+def cell(column_type, inner):
+    return (
+        '<div class="historicalCellContainer"><div class="micro strong caps mb1" columnid="fldTEST">Field</div>'
+        f'<div class="historicalCellValue" data-columntype="{column_type}">{inner}</div></div>'
+    )
+
+
+CASES = [
+    ("url", diff_html("url", 1), "https://example.com/item/1", "https://example.com/item/2"),
+    ("url", cell("url", '<div><div class="flex-auto">https://example.com/new</div></div>'), None, "https://example.com/new"),
+    ("email", diff_html("email", 1), "person1@example.com", "person2@example.com"),
+    ("barcode", diff_html("barcode", 1), "4006381000001", "4006381000002"),
+    ("duration", diff_html("duration", 1), "1:30", "2:45"),
+    ("autoNumber", diff_html("autoNumber", 1), "7", "10"),
+    ("formula", diff_html("formula", 2), "14", "17"),
+    ("collaborator", diff_html("collaborator", 1), "User 1", "User 2"),
+    ("multipleCollaborators", cell("multipleCollaborators", (
+        '<div class="collaboratorToken" style="text-decoration: line-through" title="User 0"></div>'
+        '<div class="collaboratorToken" title="User 3"><span class="truncate">User 3</span></div>'
+        '<div class="collaboratorToken" title="User 2"><span class="truncate">User 2</span></div>'
+    )), "User 0", "User 2 | User 3"),
+    ("lookup", diff_html("lookup", 1), "Region 1", "Region 2"),
+    ("lookup", cell("lookup", (
+        '<div class="foreignRecord removed" title="Acme"></div>'
+        '<div class="choiceToken" title="Region 2"></div>'
+        '<div class="choiceToken" title="Region 1"></div>'
+    )), "Acme", "Region 1 | Region 2"),
+]
+
+
+@pytest.fixture(params=sorted(PARSER_BACKENDS))
+def parser_class(request):
+    parser_class = get_parser_class(request.param)
+    if parser_class is not PARSER_BACKENDS[request.param]:
+        pytest.skip(f"{request.param} is not installed")
+    return parser_class
+
+
+@pytest.mark.parametrize("column_type, html, old_value, new_value", CASES)
+def test_column_handler_values(parser_class, column_type, html, old_value, new_value):
+    result = parser_class(html).parse_diff()
+
+    assert result["columnType"] == column_type
+    assert (result["oldValue"], result["newValue"]) == (old_value, new_value)
+    assert not result["usedFallback"]
+
+
+def test_unknown_type_counts_as_fallback(monkeypatch):
+    monkeypatch.setitem(config.CONFIG, "DIFF_CACHE_SIZE", 0)
+    html = cell("button", '<span class="colors-background-success">Open</span>')
+    page = {
+        "orderedActivityAndCommentIds": ["actTEST"],
+        "rowActivityInfoById": {"actTEST": {"groupType": "cellValuesChanged", "createdTime": "2024-01-01T00:00:00.000Z", "diffRowHtml": html}},
+    }
+    before = PARSE_COVERAGE.fallback["button"]
+
+    parse_revision_history(page)
+
+    assert PARSE_COVERAGE.fallback["button"] == before + 1
@@ -0,0 +1,20 @@
+import pytest
+from metrics import percentile
+
+
+@pytest.mark.parametrize("values, q, expected", [
+    (list(range(1, 101)), 0.5, 50),
+    (list(range(1, 101)), 0.95, 95),
+    (list(range(1, 101)), 0.99, 99),
+    (list(range(1, 11)), 0.5, 5),
+    ([1, 2], 0.5, 1),
+    ([7], 0.99, 7),
+    ([1, 2, 3], 0.0, 1),
+    ([1, 2, 3], 1.0, 3),
+])
+def test_nearest_rank_percentile(values, q, expected):
+    assert percentile(values, q) == expected
+
+
+def test_percentile_of_no_samples():
+    assert percentile([], 0.95) == 0.0
@@ -0,0 +1,89 @@
+import json
+import pytest
+import requests
+import config
+from airtable_scraper import AirtableScraper
+
+PAGE = {"orderedActivityAndCommentIds": ["act1"] * 25, "offsetV2": None}
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    monkeypatch.setitem(config.CONFIG, "SESSION_FILE", str(tmp_path / "session.json"))
+    scraper = AirtableScraper("test@example.com", "secret", page_size=100)
+    scraper.adaptive_page_size = True
+    scraper.min_page_size = 10
+    return scraper
+
+
+def replay(scraper, monkeypatch, outcomes):
+    """Makes _fetch_activity_page return `outcomes` in turn; returns the limits it was asked for."""
+    limits = []
+
+    def fetch(offset_v2=None, record_id=None, limit=None):
+        limits.append(limit)
+        return outcomes.pop(0)
+
+    monkeypatch.setattr(scraper, "_fetch_activity_page", fetch)
+    return limits
+
+
+def test_rejected_page_is_retried_at_half_size(scraper, monkeypatch):
+    limits = replay(scraper, monkeypatch, [(None, True), (None, True), (PAGE, False)])
+
+    assert scraper.fetch_revision_page(None, "recTEST") is PAGE
+    assert limits == [100, 50, 25]
+    assert scraper.page_size == 25
+
+
+def test_failed_page_keeps_page_size(scraper, monkeypatch):
+    limits = replay(scraper, monkeypatch, [(None, False)])
+
+    assert scraper.fetch_revision_page(None, "recTEST") is None
+    assert limits == [100]
+    assert scraper.page_size == 100
+
+
+def test_page_size_rejection_detection():
+    from utils import is_page_size_rejection
+
+    assert is_page_size_rejection('{"msg": "FAILURE", "error": "limit exceeds maximum page size"}')
+    assert not is_page_size_rejection('{"msg": "FAILURE", "error": "rate limit exceeded"}')
+    assert not is_page_size_rejection('{"msg": "FAILURE", "error": "internal error"}')
+
+
+def test_stale_socket_422_refreshes_socket_instead_of_shrinking(scraper, monkeypatch):
+    scraper.socket_id = "sockOLD"
+    sockets = []
+
+    def require_socket_context():
+        scraper.socket_id = scraper.socket_id or "sockNEW"
+        sockets.append(scraper.socket_id)
+        return scraper.socket_id
+
+    def reply(status_code, body):
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps(body).encode()
+        return response
+
+    replies = [
+        reply(422, {"msg": "FAILURE", "error": "secretSocketId is invalid or expired"}),
+        reply(200, {"msg": "SUCCESS", "data": PAGE}),
+    ]
+    monkeypatch.setattr(scraper, "require_socket_context", require_socket_context)
+    monkeypatch.setattr(scraper, "_send", lambda method, url, **kwargs: replies.pop(0))
+
+    assert scraper.fetch_revision_page(None, "recTEST") == PAGE
+    assert sockets == ["sockOLD", "sockNEW"]
+    assert scraper.page_size == 100
+
+
+def test_422_without_limit_message_is_not_a_rejection(scraper, monkeypatch):
+    response = requests.Response()
+    response.status_code = 422
+    response._content = b'{"msg": "FAILURE", "error": "unprocessable"}'
+    monkeypatch.setattr(scraper, "require_socket_context", lambda: "sock")
+    monkeypatch.setattr(scraper, "_send", lambda method, url, **kwargs: response)
+
+    assert scraper._fetch_activity_page(None, "recTEST", 100) == (None, False)
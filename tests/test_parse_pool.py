@@ -0,0 +1,34 @@
+import threading
+import parse_pool
+from parse_pool import ParallelDiffParser
+from utils import parse_revision_history
+
+
+def test_concurrent_first_pages_share_one_pool(monkeypatch, fixture_pages):
+    created = []
+
+    class CountingExecutor(parse_pool.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            created.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(parse_pool, "ProcessPoolExecutor", CountingExecutor)
+    parser = ParallelDiffParser(2)
+    start = threading.Barrier(4)
+    results = []
+
+    def parse(page):
+        start.wait()
+        results.append(parser.parse_page(page))
+
+    threads = [threading.Thread(target=parse, args=(page,)) for page in fixture_pages[:4]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    parser.shutdown()
+
+    assert len(created) == 1
+    assert sorted(len(batch) for batch in results) == sorted(
+        len(parse_revision_history(page)) for page in fixture_pages[:4]
+    )
@@ -0,0 +1,30 @@
+"""
+Parser backends against the parity corpus: the fixture pages' diffs plus edge cases
+(script/style/template content, comments, entities, malformed and empty HTML). Each
+expected value is what the original BeautifulSoup parser returned for that HTML.
+"""
+import os
+import json
+import pytest
+from airtable_parser import PARSER_BACKENDS, get_parser_class
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "parser_corpus.json")
+
+with open(CORPUS_FILE, 'r', encoding='utf-8') as f:
+    CORPUS = json.load(f)
+
+
+@pytest.mark.parametrize("backend", sorted(PARSER_BACKENDS))
+def test_backend_matches_baseline_output(backend):
+    parser_class = get_parser_class(backend)
+    if parser_class is not PARSER_BACKENDS[backend]:
+        pytest.skip(f"{backend} is not installed")
+
+    mismatches = []
+    for sample in CORPUS:
+        result = parser_class(sample["html"]).parse_diff()
+        # Diagnostic flag added after the baseline; not part of the parsed value
+        result.pop("usedFallback", None)
+        if result != sample["expected"]:
+            mismatches.append((sample["html"], result, sample["expected"]))
+    assert not mismatches, f"{len(mismatches)} of {len(CORPUS)} samples differ, first: {mismatches[0]}"
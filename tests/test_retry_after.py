@@ -0,0 +1,34 @@
+import io
+import requests
+import pytest
+import config
+from airtable_scraper import AirtableScraper
+
+
+def response(status_code, headers=None):
+    reply = requests.Response()
+    reply.status_code = status_code
+    reply.headers.update(headers or {})
+    reply._content = b""
+    reply.raw = io.BytesIO()
+    return reply
+
+
+@pytest.mark.parametrize("rate_limit_enabled", [True, False])
+def test_retry_waits_for_retry_after(tmp_path, monkeypatch, rate_limit_enabled):
+    monkeypatch.setitem(config.CONFIG, "SESSION_FILE", str(tmp_path / "session.json"))
+    monkeypatch.setitem(config.ALL_CONFIG["RATE_LIMIT"], "ENABLED", rate_limit_enabled)
+    scraper = AirtableScraper("test@example.com", "secret")
+
+    replies = [response(429, {"Retry-After": "120"}), response(200)]
+    monkeypatch.setattr(scraper.session, "request", lambda method, url, **kwargs: replies.pop(0))
+    sleeps = []
+    monkeypatch.setattr("airtable_scraper.time.sleep", sleeps.append)
+    # The limiter's own pause after the 429 is not under test here
+    monkeypatch.setattr(scraper.rate_limiter, "acquire", lambda url: ("default", 0.0))
+
+    reply = scraper._send('GET', "https://airtable.com/v0.3/row/recTEST/readRowActivitiesAndComments")
+
+    assert reply.status_code == 200
+    assert reply.retries == 1
+    assert sleeps and sleeps[0] >= 120
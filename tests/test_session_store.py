@@ -0,0 +1,18 @@
+import os
+import stat
+import pytest
+from requests.cookies import RequestsCookieJar
+from session_store import SessionStore
+
+
+@pytest.mark.skipif(os.name != "posix", reason="POSIX file modes")
+def test_session_file_is_private(tmp_path):
+    store = SessionStore(tmp_path / "session.json")
+    cookies = RequestsCookieJar()
+    cookies.set("__Host-airtable-session", "secret", domain="airtable.com")
+
+    store.save_login(cookies, "csrf")
+    store.save_context(socket_id="socket")
+
+    assert stat.S_IMODE(os.stat(store.path).st_mode) == 0o600
+    assert store.load()["socket_id"]["value"] == "socket"
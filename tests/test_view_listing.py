@@ -0,0 +1,25 @@
+from airtable_scraper import AirtableScraper
+from utils import extract_view_row_ids
+
+VIEW_RECORD_IDS = ["recTEST000000003", "recTEST000000001", "recTEST000000002"]
+
+
+def test_list_view_record_ids_follows_view_order(stub_airtable):
+    stub_airtable.RequestHandlerClass.view_record_ids = VIEW_RECORD_IDS
+    scraper = AirtableScraper("test@example.com", "secret")
+    assert scraper.ensure_session()
+
+    assert scraper.list_view_record_ids() == VIEW_RECORD_IDS
+    assert stub_airtable.hits["/v0.3/table/tblTEST0000000000/readData"] == 1
+
+
+def test_view_row_ids_skip_hidden_rows():
+    data = {"viewDatas": [{"id": "viwTEST", "rowOrder": [
+        {"rowId": "rec1", "visibility": True}, {"rowId": "rec2", "visibility": False}, {"rowId": "rec3"},
+    ]}]}
+    assert extract_view_row_ids(data, "viwTEST") == ["rec1", "rec3"]
+
+
+def test_view_row_ids_missing_row_order_is_not_the_whole_table():
+    data = {"rows": [{"id": "rec1"}, {"id": "rec2"}], "viewDatas": [{"id": "viwOTHER", "rowOrder": []}]}
+    assert extract_view_row_ids(data, "viwTEST") is None
@@ -0,0 +1,35 @@
+import os
+import config
+from airtable_scraper import AirtableScraper
+from writers import StreamingRevisionWriter
+
+
+def spool_dirs(directory):
+    return [name for name in os.listdir(directory) if name.startswith("airtable_runs_")]
+
+
+def test_empty_close_keeps_previous_output(tmp_path):
+    output = tmp_path / "history.ndjson"
+    output.write_text('{"id":"act1","timestamp":"2024-01-01T00:00:00.000Z"}\n', encoding="utf-8")
+
+    writer = StreamingRevisionWriter(output, "ndjson")
+    assert writer.close() == 0
+
+    assert output.read_text(encoding="utf-8") == '{"id":"act1","timestamp":"2024-01-01T00:00:00.000Z"}\n'
+    assert os.listdir(tmp_path) == ["history.ndjson"]
+
+
+def test_failed_stream_keeps_output_and_removes_spool(stub_airtable, tmp_path, monkeypatch):
+    monkeypatch.setitem(config.CONFIG, "OUTPUT_FORMAT", "ndjson")
+    output = tmp_path / "history.ndjson"
+    output.write_text('{"id":"act1","timestamp":"2024-01-01T00:00:00.000Z"}\n', encoding="utf-8")
+    scraper = AirtableScraper("test@example.com", "secret")
+    assert scraper.ensure_session()
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("connection dropped")
+    monkeypatch.setattr(scraper, "collect_revision_history", fail)
+
+    assert scraper.stream_to_file("recTEST000000001", output) is None
+    assert output.read_text(encoding="utf-8") == '{"id":"act1","timestamp":"2024-01-01T00:00:00.000Z"}\n'
+    assert spool_dirs(tmp_path) == []
@@ -4,14 +4,15 @@ import string
 import random
 import logging
 from data_models import RevisionEntry
-from airtable_parser import AirtableHtmlParser 
+from parse_cache import parse_diff_cached
+from airtable_parser import PARSE_COVERAGE
 
 logger = logging.getLogger(__name__)
 
-def get_csrf_token(response):
-    """Extracts the CSRF token from the HTML response."""
+def extract_csrf_token(html):
+    """Extracts the CSRF token from an HTML page's window.initData block."""
     try:
-        match = re.search(r'window\.initData\s*=\s*(\{.*?})\s*</script>', response.text, re.DOTALL)
+        match = re.search(r'window\.initData\s*=\s*(\{.*?})\s*</script>', html, re.DOTALL)
         if match:
             json_string = match.group(1)
             init_data = json.loads(json_string)
@@ -25,10 +26,10 @@ def get_csrf_token(response):
         logger.error(f"Error extracting CSRF token: {e}")
         return None
 
-def get_socket_id(response):
-    """Extracts the secretSocketId from the HTML response."""
+def extract_socket_id(html):
+    """Extracts the secretSocketId from an HTML page's resolveLiveappDataPromise call."""
     try:
-        match = re.search(r'window\.resolveLiveappDataPromise\((.*?)\);', response.text, re.DOTALL)
+        match = re.search(r'window\.resolveLiveappDataPromise\((.*?)\);', html, re.DOTALL)
         if match:
             json_data_string = match.group(1).strip()
             data = json.loads(json_data_string)
@@ -40,7 +41,86 @@ def get_socket_id(response):
     except Exception as e:
         logger.error(f"Error extracting socket ID: {e}")
         return None
+
+# --- Streaming token extraction ---
+STREAM_CHUNK_SIZE = 64 * 1024
+_JSON_STRING_VALUE = re.compile(rb'\s*:\s*("(?:[^"\\]|\\.)*")')
+
+def scan_json_string(chunks, marker, key):
+    """
+    Reads byte chunks until `marker` and then the JSON property `"key": "<string>"` after
+    it have been seen, and returns (value, bytes read). Stops consuming `chunks` as soon
+    as the value is complete, so the rest of a large page is never read or decoded.
+    Returns (None, bytes read) if the body ends first.
+    """
+    quoted_key = b'"' + key + b'"'
+    buffer = bytearray()
+    marker_at = -1
+    marker_from = key_from = 0
+    for chunk in chunks:
+        buffer += chunk
+        if marker_at < 0:
+            marker_at = buffer.find(marker, marker_from)
+            if marker_at < 0:
+                # Keep a marker-sized overlap in case it straddles two chunks
+                marker_from = max(0, len(buffer) - len(marker) + 1)
+                continue
+            key_from = marker_at + len(marker)
+        key_at = buffer.find(quoted_key, key_from)
+        if key_at < 0:
+            key_from = max(key_from, len(buffer) - len(quoted_key) + 1)
+            continue
+        match = _JSON_STRING_VALUE.match(buffer, key_at + len(quoted_key))
+        if match is None:
+            # The value is not complete yet; look again once more bytes arrive
+            key_from = key_at
+            continue
+        try:
+            return json.loads(match.group(1)), bytes(buffer)
+        except ValueError:
+            return None, bytes(buffer)
+    return None, bytes(buffer)
+
+def _stream_extract(response, marker, key, fallback):
+    """
+    Streams `key` out of the response body, falling back to the regex extractor on the
+    bytes read. Sets `response.bytes_read` to the number of body bytes consumed.
+    """
+    try:
+        value, body = scan_json_string(response.iter_content(STREAM_CHUNK_SIZE), marker, key)
+    finally:
+        # Releases the connection even if the body was only partly read
+        response.close()
+    response.bytes_read = len(body)
+    if value:
+        logger.debug(f"{key.decode()} found after reading {len(body)} bytes.")
+        return value
+    return fallback(body.decode(response.encoding or 'utf-8', errors='replace'))
+
+def get_csrf_token(response):
+    """Extracts the CSRF token from the HTML response, reading only as much of the body as needed."""
+    return _stream_extract(response, b'window.initData', b'csrfToken', extract_csrf_token)
+
+def get_socket_id(response):
+    """Extracts the secretSocketId from the HTML response, reading only as much of the body as needed."""
+    return _stream_extract(response, b'window.resolveLiveappDataPromise(', b'secretSocketId', extract_socket_id)
     
+def is_invalid_socket_response(text):
+    """Checks whether an API error body points at a stale or unknown secretSocketId."""
+    if not text:
+        return False
+    lowered = text[:2000].lower()
+    return "socket" in lowered and ("invalid" in lowered or "expired" in lowered or "not found" in lowered)
+
+def is_page_size_rejection(text):
+    """Checks whether an API error body refuses the requested page size (rather than rate limiting)."""
+    if not text:
+        return False
+    lowered = text[:2000].lower()
+    if "rate limit" in lowered or "limit" not in lowered:
+        return False
+    return "invalid" in lowered or "exceed" in lowered or "too large" in lowered or "maximum" in lowered
+
 def generate_request_id(length=15):
     """Generates a random request ID for the private API."""
     prefix = "req"
@@ -48,10 +128,63 @@ def generate_request_id(length=15):
     random_part = ''.join(random.choices(chars, k=length))
     return prefix + random_part
 
-def parse_revision_history(data):
+def build_activity_params(socket_id, offset_v2=None, limit=10):
+    """Builds the query parameters for one readRowActivitiesAndComments page."""
+    return {
+        "stringifiedObjectParams": json.dumps({
+            "limit": limit, "offsetV2": offset_v2,
+            "shouldReturnDeserializedActivityItems": True,
+            "shouldIncludeRowActivityOrCommentUserObjById": True
+        }),
+        "requestId": generate_request_id(),
+        "secretSocketId": socket_id
+    }
+
+def parse_view_url(url):
+    """Returns (application id, table id, view id) from a table view URL such as https://airtable.com/appX/tblY/viwZ."""
+    ids = {prefix: match for prefix, match in re.findall(r'\b(app|tbl|viw)([A-Za-z0-9]{14})\b', url or "")}
+    return tuple(f"{prefix}{ids[prefix]}" if prefix in ids else None for prefix in ("app", "tbl", "viw"))
+
+def build_view_data_params(socket_id, view_id):
+    """Builds the query parameters for a table readData request limited to one view's rows."""
+    return {
+        "stringifiedObjectParams": json.dumps({
+            "includeDataForViewIds": [view_id],
+            "shouldIncludeSchemaChecksum": False,
+            "mayOnlyIncludeRowAndCellDataForIncludedViews": True,
+            "mayExcludeCellDataForLargeViews": True
+        }),
+        "requestId": generate_request_id(),
+        "secretSocketId": socket_id
+    }
+
+def extract_view_row_ids(data, view_id):
+    """
+    Returns the record IDs of a readData payload in the view's row order, skipping rows
+    hidden by the view's filters. Returns None when the payload has no row order for the
+    view; the table's full row list would ignore the view's filters.
+    """
+    for payload in (data, data.get("table") or {}):
+        for view in payload.get("viewDatas") or []:
+            if view.get("id") == view_id and view.get("rowOrder") is not None:
+                return [row["rowId"] for row in view["rowOrder"] if row.get("visibility", True)]
+    return None
+
+def activity_diff_html(data):
+    """Returns [(activity_id, diffRowHtml)] for the activities on a page, in page order."""
+    activities = data.get("rowActivityInfoById", {})
+    return [
+        (entry_id, activities.get(entry_id, {}).get("diffRowHtml", ""))
+        for entry_id in data.get("orderedActivityAndCommentIds", [])
+        if not entry_id.startswith("com")
+    ]
+
+def parse_revision_history(data, diff_details=None, lazy=False):
     """
     Parses the raw JSON API response into a structured list of activities/comments
-    and uses AirtableHtmlParser for field-level diffs.
+    and uses AirtableHtmlParser for field-level diffs. `diff_details` may supply
+    already-parsed diffs by activity id (e.g. from a ParallelDiffParser). With `lazy`,
+    activities keep their diffRowHtml and parse it only when a diff field is read.
     """
     users = data.get("rowActivityOrCommentUserObjById", {})
     activities = data.get("rowActivityInfoById", {})
@@ -76,9 +209,16 @@ def parse_revision_history(data):
             activity = activities.get(entry_id, {})
             user = users.get(activity.get("originatingUserId"), {})
             
-            # Use the parser class
-            parser = AirtableHtmlParser(activity.get("diffRowHtml", ""))
-            details = parser.parse_diff()
+            if diff_details is not None:
+                details = diff_details[entry_id]
+                PARSE_COVERAGE.record(details)
+            elif lazy:
+                # Parsed (and counted in PARSE_COVERAGE) on first access to a diff field
+                details = {"diffRowHtml": activity.get("diffRowHtml", "")}
+            else:
+                # Use the parser class, memoized by content hash when the diff cache is enabled
+                details = parse_diff_cached(activity.get("diffRowHtml", ""))
+                PARSE_COVERAGE.record(details)
             
             entry_data = {
                 "id": entry_id,
@@ -88,4 +228,28 @@ def parse_revision_history(data):
                 **details # Unpack the results from the HTML parser
             }
             parsed.append(RevisionEntry(entry_data))
-    return parsed
\ No newline at end of file
+    return parsed
+
+def trim_page_to_mark(data, mark):
+    """
+    Cuts a raw activity page at the first entry already covered by a high-water mark
+    ({"id": ..., "createdTime": ...}). Returns (trimmed_data, reached_mark).
+    """
+    if not mark:
+        return data, False
+    activities = data.get("rowActivityInfoById", {})
+    comments = data.get("commentsById", {})
+    ordered_ids = data.get("orderedActivityAndCommentIds", [])
+
+    for index, entry_id in enumerate(ordered_ids):
+        source = comments if entry_id.startswith("com") else activities
+        created_time = source.get(entry_id, {}).get("createdTime")
+        if entry_id == mark.get("id") or (created_time and mark.get("createdTime") and created_time < mark["createdTime"]):
+            return {**data, "orderedActivityAndCommentIds": ordered_ids[:index]}, True
+    return data, False
+
+def merge_revision_entries(existing, new):
+    """Merges new entries into existing ones by id (new wins), newest first."""
+    merged = {entry.id: entry for entry in existing}
+    merged.update((entry.id, entry) for entry in new)
+    return sorted(merged.values(), key=lambda entry: entry.timestamp or "", reverse=True)
@@ -0,0 +1,149 @@
+import os
+import json
+import heapq
+import itertools
+import logging
+import tempfile
+from pathlib import Path
+from atomic_file import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Formats written incrementally by StreamingRevisionWriter; "json" stays the in-memory pretty dump
+STREAMING_FORMATS = ("ndjson", "json-compact")
+# Columnar formats, written from a RevisionBatch by columnar.py
+COLUMNAR_FORMATS = ("columnar", "parquet")
+# File extension per output format, used for per-record files and the OUTPUT_FILE suffix
+OUTPUT_EXTENSIONS = {
+    "json": ".json",
+    "json-compact": ".json",
+    "ndjson": ".ndjson",
+    "columnar": ".columns",
+    "parquet": ".parquet",
+}
+
+
+def iter_saved_entries(output_file):
+    """
+    Yields entry dicts from a file written by StreamingRevisionWriter, one line at a time.
+    Both streaming formats put exactly one entry on each line.
+    """
+    with open(output_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip().rstrip(',')
+            if line in ('', '[', ']'):
+                continue
+            yield json.loads(line)
+
+
+class StreamingRevisionWriter:
+    """
+    Writes revision entries to disk as batches arrive, keeping memory bounded by `run_size`.
+
+    Batches are buffered into sorted runs that are spilled to temporary NDJSON files.
+    close() k-way merges the runs newest-first (the order get_all_revision_history
+    produces), drops duplicate ids and writes the final file in the requested format:
+      - "ndjson":       one JSON object per line
+      - "json-compact": a JSON array without indentation, one element per line
+    """
+
+    def __init__(self, output_file, fmt="ndjson", run_size=10000, fields=None):
+        if fmt not in STREAMING_FORMATS:
+            raise ValueError(f"Unsupported streaming format: {fmt}")
+        self.output_file = Path(output_file)
+        self.fmt = fmt
+        self.run_size = run_size
+        # Optional projection passed to RevisionEntry.to_dict()
+        self.fields = fields
+        self.spool_dir = tempfile.mkdtemp(prefix="airtable_runs_", dir=self.output_file.parent or ".")
+        self.runs = []
+        self.buffer = []
+        self.extra_sources = []
+        self.newest = None
+        self.count = 0
+
+    def add_existing(self):
+        """Merges the current contents of the output file into the result (incremental mode)."""
+        if not self.output_file.exists():
+            return False
+        try:
+            next(iter_saved_entries(self.output_file), None)
+        except ValueError as e:
+            logger.error(f"Existing output {self.output_file} is not in a streaming format: {e}")
+            return False
+        # A previous streaming output is already sorted newest first, so it is a ready-made run.
+        # It is only read here; close() replaces it atomically once the merge is written.
+        self.extra_sources.append(self.output_file)
+        return True
+
+    def write_batch(self, entries):
+        """Buffers a parsed batch, spilling a sorted run to disk whenever the buffer fills."""
+        self.buffer.extend(entry.to_dict(self.fields) for entry in entries)
+        if len(self.buffer) >= self.run_size:
+            self._spill()
+
+    def _spill(self):
+        if not self.buffer:
+            return
+        self.buffer.sort(key=lambda item: item.get("timestamp") or "", reverse=True)
+        run_file = os.path.join(self.spool_dir, f"run_{len(self.runs):05d}.ndjson")
+        with open(run_file, 'w', encoding='utf-8') as f:
+            for item in self.buffer:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self.runs.append(run_file)
+        self.buffer = []
+
+    def _merged(self):
+        """Yields all entries newest first, with the first occurrence of each id winning."""
+        sources = [iter_saved_entries(run) for run in self.runs] + [iter_saved_entries(path) for path in self.extra_sources]
+        current_timestamp = None
+        seen_ids = set()
+        for item in heapq.merge(*sources, key=lambda item: item.get("timestamp") or "", reverse=True):
+            # Duplicates share a timestamp, so only ids within the current timestamp need tracking
+            if item.get("timestamp") != current_timestamp:
+                current_timestamp = item.get("timestamp")
+                seen_ids.clear()
+            if item.get("id") in seen_ids:
+                continue
+            seen_ids.add(item.get("id"))
+            yield item
+
+    def close(self):
+        """
+        Merges all runs into the output file. Returns the number of entries written.
+        With nothing to write, an existing output file is left untouched.
+        """
+        self._spill()
+        try:
+            merged = self._merged()
+            first = next(merged, None)
+            if first is None:
+                logger.warning(f"No entries to write; leaving {self.output_file} as it was.")
+                return 0
+            self.newest = first
+            with atomic_write(self.output_file) as f:
+                if self.fmt == "json-compact":
+                    f.write("[")
+                for index, item in enumerate(itertools.chain((first,), merged)):
+                    line = json.dumps(item, ensure_ascii=False, separators=(',', ':'))
+                    if self.fmt == "json-compact":
+                        f.write(("\n" if index == 0 else ",\n") + line)
+                    else:
+                        f.write(line + "\n")
+                    self.count += 1
+                if self.fmt == "json-compact":
+                    f.write("\n]\n")
+            logger.info(f"Revision history streamed to {self.output_file} ({self.count} entries, {self.fmt}).")
+        finally:
+            self.discard()
+        return self.count
+
+    def discard(self):
+        """Removes the spooled runs without touching the output file. Safe to call twice."""
+        for path in self.runs:
+            if os.path.exists(path):
+                os.remove(path)
+        self.runs = []
+        self.buffer = []
+        if os.path.isdir(self.spool_dir):
+            os.rmdir(self.spool_dir)